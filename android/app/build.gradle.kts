@@ -47,6 +47,10 @@ android {
     composeOptions {
         kotlinCompilerExtensionVersion = "1.5.4"
     }
+    androidResources {
+        // heroes.bin is memory-mapped straight from the APK
+        noCompress += "bin"
+    }
     packaging {
         resources {
             excludes += "/META-INF/{AL2.0,LGPL2.1}"
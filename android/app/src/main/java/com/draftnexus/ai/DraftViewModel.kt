@@ -48,9 +48,13 @@ class DraftViewModel(application: Application) : AndroidViewModel(application) {
         viewModelScope.launch(Dispatchers.IO) {
             val context = getApplication<Application>().applicationContext
             try {
-                // 1. Load Heroes JSON
-                val jsonString = context.assets.open("heroes.json").bufferedReader().use { it.readText() }
-                val heroList = parseHeroes(jsonString)
+                // 1. Load Heroes: packed binary asset if shipped, JSON otherwise
+                val heroList = if (context.assets.list("")?.contains(HeroAsset.FILE_NAME) == true) {
+                    HeroAsset.load(context).heroes.sortedBy { it.name }
+                } else {
+                    val jsonString = context.assets.open("heroes.json").bufferedReader().use { it.readText() }
+                    parseHeroes(jsonString)
+                }
                 
                 // 2. Load ONNX Model
                 ortEnv = OrtEnvironment.getEnvironment()
@@ -175,8 +179,9 @@ class DraftViewModel(application: Application) : AndroidViewModel(application) {
                 val tensor = OnnxTensor.createTensor(env, floatBuffer, shape)
                 val result = session.run(Collections.singletonMap(inputName, tensor))
                 
-                // Output 1 = Probabilities (Float Tensor [Batch, 2])
-                val outputTensor = result.get(1) as OnnxTensor
+                // Probabilities (Float Tensor [Batch, 2]), looked up by name:
+                // the optimized export drops the label output, so its index is not stable
+                val outputTensor = result.get("probabilities").get() as OnnxTensor
                 val floatArray = outputTensor.floatBuffer.array() 
                 
                 val recs = mutableListOf<Recommendation>()
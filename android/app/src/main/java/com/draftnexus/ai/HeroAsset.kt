@@ -0,0 +1,66 @@
+package com.draftnexus.ai
+
+import android.content.Context
+import java.io.FileInputStream
+import java.nio.ByteBuffer
+import java.nio.ByteOrder
+import java.nio.channels.FileChannel
+
+/**
+ * Reader for assets/heroes.bin, written by scripts/export_hero_asset.py.
+ * The asset is stored uncompressed (see noCompress in build.gradle.kts) so it is memory-mapped
+ * straight from the APK; stats rows are already in model order with the real Early/Mid/Late power.
+ */
+object HeroAsset {
+    const val FILE_NAME = "heroes.bin"
+    private const val MAGIC = 0x41484E44 // "DNHA" little-endian
+    private const val FORMAT_VERSION = 1
+    private const val FLAG_IN_REAL_LOGS = 1
+
+    class Loaded(val heroes: List<Hero>, val encoderVersion: Int, val bundleHash: String?)
+
+    fun load(context: Context): Loaded {
+        context.assets.openFd(FILE_NAME).use { fd ->
+            FileInputStream(fd.fileDescriptor).channel.use { channel ->
+                val buf = channel.map(FileChannel.MapMode.READ_ONLY, fd.startOffset, fd.declaredLength)
+                return parse(buf.order(ByteOrder.LITTLE_ENDIAN))
+            }
+        }
+    }
+
+    fun parse(buf: ByteBuffer): Loaded {
+        require(buf.getInt(0) == MAGIC) { "Not a hero asset" }
+        val version = buf.getShort(4).toInt()
+        require(version <= FORMAT_VERSION) { "Hero asset v$version is newer than supported" }
+        val encoderVersion = buf.getInt(8)
+        val nHeroes = buf.getInt(12)
+        val nStats = buf.getInt(16)
+        val statsOff = buf.getInt(20)
+        val lanesOff = buf.getInt(28)
+        val indexOff = buf.getInt(36)
+        val stringsOff = buf.getInt(44)
+        val hash = ByteArray(32).also { for (i in it.indices) it[i] = buf.get(56 + i) }
+        val bundleHash = if (hash.all { it == 0.toByte() }) null else hash.joinToString("") { "%02x".format(it) }
+
+        fun string(offset: Int, length: Int): String {
+            val bytes = ByteArray(length)
+            for (i in 0 until length) bytes[i] = buf.get(stringsOff + offset + i)
+            return String(bytes, Charsets.UTF_8)
+        }
+
+        val heroes = (0 until nHeroes).map { i ->
+            val lane = lanesOff + i * 16
+            val index = indexOff + i * 16
+            Hero(
+                id = buf.getInt(lane),
+                name = string(buf.getInt(index), buf.getInt(index + 4)),
+                primaryLane = buf.getInt(lane + 4),
+                secondaryLane = buf.getInt(lane + 8),
+                iconUrl = string(buf.getInt(index + 8), buf.getInt(index + 12)),
+                inRealLogs = (buf.getInt(lane + 12) and FLAG_IN_REAL_LOGS) != 0,
+                stats = FloatArray(nStats) { j -> buf.getFloat(statsOff + (i * nStats + j) * 4) }
+            )
+        }
+        return Loaded(heroes, encoderVersion, bundleHash)
+    }
+}
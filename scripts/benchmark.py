@@ -0,0 +1,247 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import io
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import contextlib
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from scripts.recommend_hero import SCENARIOS, recommend
+from scripts.generate_training_data_new import load_data as load_generator_data, parse_real_logs, generate_synthetic_samples
+from scripts.train_draft_model import DATA_DIR, load_data, preprocess_features, train_model
+from scripts.model_registry import build_draft_suite, load_model
+
+# Paths
+RESULTS_PATH = os.path.join(DATA_DIR, 'benchmark_results.json')
+BASELINE_PATH = os.path.join(DATA_DIR, 'benchmark_baseline.json')
+
+SEED = 42
+
+# A metric regresses when it is this much worse than the baseline (0.25 = 25% slower / lower throughput)
+THRESHOLD = 0.25
+
+# Drafts scored per predict call for the latency benchmark
+BATCH_SIZES = [1, 8, 32]
+
+# Synthetic volume for the generation, featurization and training benchmarks (same as generate_data)
+N_SYNTHETIC = 5000
+
+BENCHMARKS = ['recommend', 'featurize', 'score', 'generate', 'train']
+
+def _seed(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+
+def _metric(value, unit, better, gate=True):
+    """gate=False: reported and compared, but too noisy to fail the run (tail latencies)."""
+    return {'value': float(value), 'unit': unit, 'better': better, 'gate': gate}
+
+def _timed(fn, repeats):
+    """Median wall time (s) of fn() over repeats calls."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+def _quiet(fn, *args, **kwargs):
+    """Runs fn with stdout swallowed (the pipeline functions print progress)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+def bench_recommend(repeats=5):
+    """
+    Cold: a fresh interpreter importing recommend_hero and running scenario 1 (imports, CSV reads,
+    model load, scoring). Warm: recommend() in this process, per pinned scenario.
+    """
+    scenario = SCENARIOS[0]
+    code = ("from scripts.recommend_hero import recommend; "
+            f"recommend(allies={scenario['allies']!r}, enemies={scenario['enemies']!r})")
+    cold = _timed(lambda: subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, check=True,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), repeats)
+
+    metrics = {'recommend_cold_s': _metric(cold, 's', 'lower')}
+    for i, scenario in enumerate(SCENARIOS, start=1):
+        _quiet(recommend, scenario['allies'], scenario['enemies']) # warm-up
+        warm = _timed(lambda: _quiet(recommend, scenario['allies'], scenario['enemies']), repeats)
+        metrics[f'recommend_warm_s_scenario_{i}'] = _metric(warm, 's', 'lower')
+    return metrics
+
+def bench_generate(repeats=5):
+    """Real-log parsing and seeded synthetic generation rates (samples/s)."""
+    name_to_id, id_to_stats, id_to_meta, counters, synergies = _quiet(load_generator_data)
+    df_logs = pd.read_csv(os.path.join(DATA_DIR, 'match_logs_real.csv'))
+
+    real = _quiet(parse_real_logs, name_to_id, id_to_meta, df_override=df_logs)
+    real_s = _timed(lambda: _quiet(parse_real_logs, name_to_id, id_to_meta, df_override=df_logs), repeats)
+
+    def synth():
+        _seed()
+        return _quiet(generate_synthetic_samples, id_to_stats, counters, synergies, n_samples=N_SYNTHETIC)
+    synth_s = _timed(synth, repeats)
+
+    return {
+        'parse_real_samples_per_s': _metric(len(real) / real_s, 'samples/s', 'higher'),
+        'generate_synthetic_samples_per_s': _metric(len(synth()) / synth_s, 'samples/s', 'higher')
+    }
+
+def benchmark_training_data():
+    """The fixed training set the featurize/train benchmarks run on: real samples + seeded synthetic ones."""
+    name_to_id, id_to_stats, id_to_meta, counters, synergies = _quiet(load_generator_data)
+    real = _quiet(parse_real_logs, name_to_id, id_to_meta)
+    _seed()
+    synth = _quiet(generate_synthetic_samples, id_to_stats, counters, synergies, n_samples=N_SYNTHETIC)
+    return pd.DataFrame(real + synth)
+
+def bench_featurize(df_train, repeats=5):
+    """Uncached preprocess_features throughput, dense and sparse (rows/s)."""
+    _, df_stats = load_data(pd.DataFrame())
+    metrics = {}
+    for sparse in [False, True]:
+        seconds = _timed(lambda: _quiet(preprocess_features, df_train, df_stats, sparse=sparse), repeats)
+        name = 'featurize_sparse_rows_per_s' if sparse else 'featurize_rows_per_s'
+        metrics[name] = _metric(len(df_train) / seconds, 'rows/s', 'higher')
+    return metrics
+
+def bench_score(repeats=50, batch_sizes=BATCH_SIZES):
+    """
+    Per-draft scoring latency of the default model on the pinned scenarios (every untaken hero as a
+    candidate), with batch_size drafts stacked into each predict_proba call. p50/p99 in ms per draft.
+    """
+    _, df_stats = load_data(pd.DataFrame())
+    clf = load_model(df_stats=df_stats)
+    suite = build_draft_suite(df_stats)
+
+    metrics = {}
+    for batch_size in batch_sizes:
+        X = np.vstack([suite[i % len(suite)] for i in range(batch_size)])
+        clf.predict_proba(X) # warm-up
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            clf.predict_proba(X)
+            times.append((time.perf_counter() - start) * 1000 / batch_size)
+        metrics[f'score_p50_ms_batch_{batch_size}'] = _metric(np.percentile(times, 50), 'ms/draft', 'lower')
+        metrics[f'score_p99_ms_batch_{batch_size}'] = _metric(np.percentile(times, 99), 'ms/draft', 'lower', gate=False)
+    return metrics
+
+def bench_train(df_train):
+    """train_model on the fixed training set (no feature cache, nothing saved)."""
+    _seed()
+    start = time.perf_counter()
+    results = _quiet(train_model, df_train, save_model=False, use_cache=False)
+    total = time.perf_counter() - start
+    return {
+        'train_fit_s': _metric(results['fit_s'], 's', 'lower'),
+        'train_total_s': _metric(total, 's', 'lower')
+    }
+
+def run_benchmarks(selected=BENCHMARKS, repeats=None):
+    """Runs the selected benchmarks and returns {'meta': ..., 'metrics': {name: {value, unit, better}}}."""
+    _seed()
+    metrics = {}
+    df_train = benchmark_training_data() if {'featurize', 'train'} & set(selected) else None
+
+    kwargs = {'repeats': repeats} if repeats else {}
+    for name in selected:
+        print(f"Running '{name}'...")
+        if name == 'recommend':
+            metrics.update(bench_recommend(**kwargs))
+        elif name == 'featurize':
+            metrics.update(bench_featurize(df_train, **kwargs))
+        elif name == 'score':
+            metrics.update(bench_score(**kwargs))
+        elif name == 'generate':
+            metrics.update(bench_generate(**kwargs))
+        elif name == 'train':
+            metrics.update(bench_train(df_train))
+
+    import sklearn
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': SEED,
+        'n_train_rows': len(df_train) if df_train is not None else None
+    }
+    return {'meta': meta, 'metrics': metrics}
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    One row per metric: baseline, current, change (positive = better) and whether it regressed
+    beyond threshold. Metrics missing from the baseline, or not gated, are listed but never regress.
+    """
+    rows = []
+    for name, m in results['metrics'].items():
+        base = baseline.get('metrics', {}).get(name)
+        if base is None or not base['value']:
+            rows.append({'metric': name, 'unit': m['unit'], 'baseline': np.nan, 'current': m['value'],
+                         'change': np.nan, 'regressed': False})
+            continue
+        ratio = m['value'] / base['value']
+        # Express both directions as "fraction better": 0.2 = 20% faster / higher throughput
+        change = (1 / ratio - 1) if m['better'] == 'lower' else (ratio - 1)
+        rows.append({'metric': name, 'unit': m['unit'], 'baseline': base['value'], 'current': m['value'],
+                     'change': change, 'regressed': m.get('gate', True) and change < -threshold})
+    return pd.DataFrame(rows)
+
+def save_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time recommend, featurize, scoring, generation and training against a stored baseline.")
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help=f"Subset to run ({', '.join(BENCHMARKS)}; default: all)")
+    parser.add_argument('--repeats', type=int, default=None, help="Override the per-benchmark repeat count")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="Allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))} (options: {', '.join(BENCHMARKS)})")
+
+    results = run_benchmarks(args.benchmarks or BENCHMARKS, args.repeats)
+    save_json(results, args.output)
+    print(f"\nResults saved to {args.output}")
+
+    if args.save_baseline:
+        save_json(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; store one with --save-baseline.")
+        print(pd.DataFrame({n: m for n, m in results['metrics'].items()}).T[['value', 'unit']].to_string())
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    df = compare(results, baseline, args.threshold)
+    print(f"\nvs baseline from {baseline['meta']['timestamp']} (threshold {args.threshold:.0%}):")
+    print(df.to_string(index=False, formatters={'change': lambda v: '-' if pd.isna(v) else f"{v:+.1%}"},
+                       float_format=lambda v: f"{v:.6g}"))
+
+    regressed = df[df['regressed']]
+    if len(regressed):
+        print(f"\nFAIL: {len(regressed)} metric(s) regressed: {', '.join(regressed['metric'])}")
+        sys.exit(1)
+    print("\nOK: no regressions.")
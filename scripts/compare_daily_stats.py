@@ -1,47 +1,37 @@
 import pandas as pd
 import os
+import sys
 
-# Paths
-DATA_DIR = os.path.join(os.path.dirname(__file__), '../data')
-LOGS_PATH = os.path.join(DATA_DIR, 'match_logs_real.csv')
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def parse_duration(dur_str):
-    try:
-        if ':' in str(dur_str):
-            m, s = dur_str.split(':')
-            return int(m) * 60 + int(s)
-        return 900 # Default 15m
-    except:
-        return 900
+from scripts.match_analytics import LOGS_PATH, load_tables, format_duration, hero_stats
 
-def get_top_picks(df, top_n=5):
-    picks = []
-    for col in ['Winning_Team', 'Losing_Team']:
-        for val in df[col].dropna():
-            # Format: Hero:Role|Hero:Role...
-            if '|' in str(val):
-                for p in val.split('|'):
-                    hero = p.split(':')[0]
-                    picks.append(hero)
-    
-    return pd.Series(picks).value_counts().head(top_n)
+# Unparseable durations count as a 15m game
+DEFAULT_DURATION_S = 900
+
+def pick_counts(picks):
+    """Picks per hero, most picked first; ties broken by hero name so the report is reproducible."""
+    stats = hero_stats(picks).sort_values(['picks', 'hero'], ascending=[False, True])
+    return stats.set_index('hero')['picks'].rename_axis(None)
 
 def compare_stages():
     if not os.path.exists(LOGS_PATH):
         print("No match logs found.")
         return
 
-    df = pd.read_csv(LOGS_PATH)
-    
-    # Ensure Day is string for consistent comparison
-    df['Day'] = df['Day'].astype(str)
-    
-    # Filter Sets
+    matches, picks = load_tables(LOGS_PATH)
+
+    # Filter Sets (Day is numeric in the analytics tables, so 7, 7.0 and "Day 7" all match)
     # Swiss Day 7
-    subset_swiss = df[(df['Stage'] == 'Swiss Stage') & (df['Day'] == '7')]
-    
+    swiss = (matches['stage'] == 'Swiss Stage') & (matches['day'] == 7)
+    subset_swiss = matches[swiss]
+    picks_swiss = picks[(picks['stage'] == 'Swiss Stage') & (picks['day'] == 7)]
+
     # Knockout Day 1
-    subset_ko = df[(df['Stage'] == 'Knockout Stage') & (df['Day'] == '1')]
+    ko = (matches['stage'] == 'Knockout Stage') & (matches['day'] == 1)
+    subset_ko = matches[ko]
+    picks_ko = picks[(picks['stage'] == 'Knockout Stage') & (picks['day'] == 1)]
     
     print("-" * 50)
     print("COMPARISON: Swiss Stage Day 7 vs Knockout Stage Day 1")
@@ -54,8 +44,8 @@ def compare_stages():
     print("")
     
     # 2. Duration
-    dur_swiss = subset_swiss['Game_Duration'].apply(parse_duration)
-    dur_ko = subset_ko['Game_Duration'].apply(parse_duration)
+    dur_swiss = subset_swiss['duration_s'].fillna(DEFAULT_DURATION_S)
+    dur_ko = subset_ko['duration_s'].fillna(DEFAULT_DURATION_S)
     
     avg_swiss = dur_swiss.mean() if not dur_swiss.empty else 0
     avg_ko = dur_ko.mean() if not dur_ko.empty else 0
@@ -69,19 +59,22 @@ def compare_stages():
         f.write(f"- **Knockout (Day 1)**: {len(subset_ko)}\n\n")
         
         f.write("### Average Duration\n")
-        f.write(f"- **Swiss (Day 7)**: {int(avg_swiss // 60)}m {int(avg_swiss % 60)}s\n")
-        f.write(f"- **Knockout (Day 1)**: {int(avg_ko // 60)}m {int(avg_ko % 60)}s\n\n")
+        f.write(f"- **Swiss (Day 7)**: {format_duration(avg_swiss)}\n")
+        f.write(f"- **Knockout (Day 1)**: {format_duration(avg_ko)}\n\n")
         
         f.write("### Top Picks Comparison\n")
-        top_swiss = get_top_picks(subset_swiss)
-        top_ko = get_top_picks(subset_ko)
+        counts_swiss = pick_counts(picks_swiss)
+        counts_ko = pick_counts(picks_ko)
         
+        # Top heroes of either slice, with their full pick counts in both (0 = not picked that day)
+        heroes = counts_swiss.head(5).index.union(counts_ko.head(5).index)
         df_comp = pd.DataFrame({
-            'Swiss (Day 7)': top_swiss,
-            'Knockout (Day 1)': top_ko
+            'Swiss (Day 7)': counts_swiss.reindex(heroes),
+            'Knockout (Day 1)': counts_ko.reindex(heroes)
         }).fillna(0).astype(int)
         
-        df_comp = df_comp.sort_values('Knockout (Day 1)', ascending=False).head(10)
+        df_comp = df_comp.rename_axis('hero').reset_index()
+        df_comp = df_comp.sort_values(['Knockout (Day 1)', 'hero'], ascending=[False, True]).set_index('hero').rename_axis(None).head(10)
         f.write(df_comp.to_markdown())
         
     print("Report saved to comparison_report.md")
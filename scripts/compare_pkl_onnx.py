@@ -1,110 +1,172 @@
+import pandas as pd
 import numpy as np
 import onnxruntime as ort
 import joblib
 import os
 import sys
+import time
+import random
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import build_encoder, decode_id_lists, encode_flat, encode_candidates
+from scripts.train_draft_model import load_data, preprocess_features
+from scripts.generate_training_data_new import (load_data as load_generator_data, parse_real_logs,
+                                                generate_synthetic_samples, random_draft_states)
 
 # Paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(SCRIPT_DIR, '../data')
 PKL_PATH = os.path.join(DATA_DIR, 'draft_model_rf.pkl')
 ONNX_PATH = os.path.join(DATA_DIR, 'draft_model.onnx')
+LOGS_PATH = os.path.join(DATA_DIR, 'match_logs_real.csv')
 
-def compare_models():
-    print(f"Loading PKL from: {PKL_PATH}")
-    try:
-        clf_pkl = joblib.load(PKL_PATH)
-    except Exception as e:
-        print(f"Error loading PKL: {e}")
-        return
+# Benchmark Settings
+BATCH_SIZES = [1, 131, 1000, 10000] # single row, one full draft, bulk scoring
+TOLERANCE = 1e-4 # max |dP| before the models count as diverged
+TOP_K = 5
+MIN_RANK_AGREEMENT = 0.99
+N_SYNTHETIC = 12000
+
+def repeats_for(batch_size):
+    return max(5, min(200, 20000 // batch_size))
+
+def load_models(pkl_path, onnx_path):
+    print(f"Loading PKL from: {pkl_path}")
+    clf = joblib.load(pkl_path)
+    print(f"Loading ONNX from: {onnx_path}")
+    sess = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+
+    onnx_width = sess.get_inputs()[0].shape[1]
+    if onnx_width not in (clf.n_features_in_, None):
+        raise ValueError(f"Width mismatch: PKL {clf.n_features_in_}, ONNX {onnx_width}. Re-export the model.")
+    return clf, sess
+
+def onnx_probabilities(sess, X):
+    """P(class 1) from either export: raw tensor or ZipMap, with or without the label output."""
+    names = [o.name for o in sess.get_outputs()]
+    raw_out = sess.run(['probabilities'] if 'probabilities' in names else None, {sess.get_inputs()[0].name: X})[-1]
 
-    print(f"Loading ONNX from: {ONNX_PATH}")
-    try:
-        ort_session = ort.InferenceSession(ONNX_PATH)
-    except Exception as e:
-        print(f"Error loading ONNX: {e}")
-        return
-
-    # Generate Random Input
-    # Feature size is 277 (based on Android code and previous knowledge)
-    input_size = 277 
-    # Create N random inputs
-    N = 5
-    dummy_input = np.random.rand(N, input_size).astype(np.float32)
-    
-    # 1. Prediction via PKL (Sklearn)
-    print("\nRunning PKL Inference...")
-    # predict_proba returns [N, 2] usually (for binary)
-    pkl_probs = clf_pkl.predict_proba(dummy_input).astype(np.float32)
-    
-    # 2. Prediction via ONNX
-    print("Running ONNX Inference...")
-    input_name = ort_session.get_inputs()[0].name
-    # Output 1 is usually probabilities in sklearn-onnx conversion
-    # Result is a list, usually [label_tensor, probability_tensor]
-    # For ZipMap=False output is usually a tensor.
-    # Let's inspect outputs.
-    # If produced by sklearn-onnx, output[1] is typically 'output_probability' (sequence of maps OR tensor if zipmap=False)
-    
-    onnx_results = ort_session.run(None, {input_name: dummy_input})
-    
-    # We expect the second output to be probabilities
-    # But it depends on how it was exported.
-    # Let's assume standard sklearn-onnx conversion with final_types
-    # If zipmap=True (default), it's a list of dicts. If False, it's a tensor.
-    
-    onnx_probs = None
-    
-    # Check type of second output
-    raw_out = onnx_results[1]
-    
     if isinstance(raw_out, list) and isinstance(raw_out[0], dict):
-        print("ONNX Output is ZipMap (List of Dicts). Converting to Tensor...")
-        # Convert list of dicts to tensor [N, 2]
-        # Dict be like {0: prob_0, 1: prob_1}
-        # Assuming binary classification classes are 0 and 1
-        probs_list = []
-        for d in raw_out:
-            p0 = d.get(0, 0.0)
-            p1 = d.get(1, 0.0)
-            probs_list.append([p0, p1])
-        onnx_probs = np.array(probs_list, dtype=np.float32)
-        
-    elif isinstance(raw_out, np.ndarray):
-        print("ONNX Output is Tensor.")
-        onnx_probs = raw_out.astype(np.float32)
-        
-    else:
-        print(f"Unknown ONNX output format: {type(raw_out)}")
-        print(raw_out)
-        return
-
-    print(f"\nComparing {N} samples...")
-    print(f"{'Sample':<6} | {'PKL Probs':<20} | {'ONNX Probs':<20} | {'Diff':<10}")
-    print("-" * 65)
-
-    max_diff = 0.0
-    for i in range(N):
-        p_pkl = pkl_probs[i]
-        p_onnx = onnx_probs[i]
-        
-        # Compare prediction for class 1 (usually what acts as score)
-        diff = np.abs(p_pkl - p_onnx).max()
-        max_diff = max(max_diff, diff)
-        
-        # Fmt
-        s_pkl = f"[{p_pkl[0]:.4f}, {p_pkl[1]:.4f}]"
-        s_onnx = f"[{p_onnx[0]:.4f}, {p_onnx[1]:.4f}]"
-        
-        print(f"{i:<6} | {s_pkl:<20} | {s_onnx:<20} | {diff:.6f}")
-
-    print("-" * 65)
-    print(f"Max Absolute Difference: {max_diff:.8f}")
-    
-    if max_diff < 1e-5:
-        print("\n✅ MATCH: Models are effectively identical.")
-    else:
-        print("\n⚠️ MISMATCH: Significant difference found.")
+        # ZipMap: list of {class: prob}
+        return np.array([d.get(1, 0.0) for d in raw_out], dtype=np.float32)
+    return np.asarray(raw_out, dtype=np.float32)[:, 1]
+
+def realistic_rows(encoder, df_stats, seed=42):
+    """
+    Draft states that look like production input:
+    - every winning-team prefix from match_logs_real.csv (allies = win[:i], enemies = all 5 losers)
+    - synthetic generator rows (structured counter/synergy scenarios + random drafts)
+    - random partial drafts (0-4 allies, 0-5 enemies)
+    Returns (X_pool, contexts): a row pool for bulk batches and real (allies, enemies) contexts.
+    """
+    name_to_id, id_to_stats, id_to_meta, counters, synergies = load_generator_data()
+    df_real = pd.DataFrame(parse_real_logs(name_to_id, id_to_meta, df_override=pd.read_csv(LOGS_PATH)))
+
+    random.seed(seed)
+    df_synth = pd.DataFrame(generate_synthetic_samples(id_to_stats, counters, synergies, n_samples=N_SYNTHETIC))
+
+    X_real, _, _, _ = preprocess_features(df_real, df_stats)
+    X_synth, _, _, _ = preprocess_features(df_synth, df_stats)
+    n_random = 5000
+    X_random = encode_flat(encoder, n_random, *random_draft_states(encoder['hero_ids'], n_random, seed=seed), dtype=np.float32)
+
+    # Real draft contexts for ranking: one per (allies, enemies) prefix
+    ally_rows, ally_ids, _ = decode_id_lists(df_real['ally_ids'])
+    enemy_rows, enemy_ids, _ = decode_id_lists(df_real['enemy_ids'])
+    contexts = [(ally_ids[ally_rows == r], enemy_ids[enemy_rows == r]) for r in range(len(df_real))]
+
+    X_pool = np.vstack([X_real, X_synth, X_random]).astype(np.float32)
+    print(f"Row pool: {len(X_real)} real, {len(X_synth)} synthetic, {n_random} random states; {len(contexts)} real draft contexts")
+    return X_pool, contexts
+
+def topk_agrees(p_ref, p_new, k, tol):
+    """The candidate's top-k is a valid reference top-k, allowing ties within tol at the cut-off."""
+    kth = np.sort(p_ref)[-k]
+    return bool((p_ref[np.argsort(-p_new, kind='stable')[:k]] >= kth - tol).all())
+
+def time_call(fn, X, repeats):
+    fn(X) # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.percentile(times, [50, 90, 99])
+
+def compare_models(pkl_path=PKL_PATH, onnx_path=ONNX_PATH, batch_sizes=BATCH_SIZES, tolerance=TOLERANCE,
+                   top_k=TOP_K, min_rank_agreement=MIN_RANK_AGREEMENT, seed=42):
+    """Runs the parity and latency benchmark. Returns (df_report, diverged)."""
+    clf, sess = load_models(pkl_path, onnx_path)
+    _, df_stats = load_data(pd.DataFrame())
+    encoder = build_encoder(df_stats)
+    X_pool, contexts = realistic_rows(encoder, df_stats, seed=seed)
+
+    pkl_fn = lambda X: clf.predict_proba(X)[:, 1]
+    onnx_fn = lambda X: onnx_probabilities(sess, X)
+
+    rng = np.random.default_rng(seed)
+    rows = []
+    for batch_size in batch_sizes:
+        if batch_size == len(encoder['hero_ids']):
+            # One real draft context scored against every hero (what a recommend call does)
+            batches = [encode_candidates(encoder, a, e, encoder['hero_ids']) for a, e in contexts]
+        else:
+            n_batches = max(1, min(50, 20000 // batch_size))
+            batches = [X_pool[rng.choice(len(X_pool), batch_size, replace=batch_size > len(X_pool))]
+                       for _ in range(n_batches)]
+
+        max_diff, agree, top1 = 0.0, [], []
+        for X in batches:
+            p_pkl, p_onnx = pkl_fn(X), onnx_fn(X)
+            max_diff = max(max_diff, float(np.abs(p_pkl - p_onnx).max()))
+            if batch_size >= top_k:
+                agree.append(topk_agrees(p_pkl, p_onnx, top_k, tolerance))
+                top1.append(topk_agrees(p_pkl, p_onnx, 1, tolerance))
+
+        repeats = repeats_for(batch_size)
+        pkl_p = time_call(pkl_fn, batches[0], repeats)
+        onnx_p = time_call(onnx_fn, batches[0], repeats)
+
+        rows.append({
+            'Batch': batch_size,
+            'Batches': len(batches),
+            'Max |dP|': max_diff,
+            f'Top-{top_k} Agree': float(np.mean(agree)) if agree else np.nan,
+            'Top-1 Agree': float(np.mean(top1)) if top1 else np.nan,
+            'PKL p50 (ms)': pkl_p[0], 'PKL p90 (ms)': pkl_p[1], 'PKL p99 (ms)': pkl_p[2],
+            'ONNX p50 (ms)': onnx_p[0], 'ONNX p90 (ms)': onnx_p[1], 'ONNX p99 (ms)': onnx_p[2],
+            'Speedup (p50)': pkl_p[0] / onnx_p[0]
+        })
+
+    df = pd.DataFrame(rows)
+    diverged = bool((df['Max |dP|'] > tolerance).any() or (df[f'Top-{top_k} Agree'].dropna() < min_rank_agreement).any())
+    return df, diverged
 
 if __name__ == "__main__":
-    compare_models()
+    parser = argparse.ArgumentParser(description="PKL vs ONNX parity and latency benchmark on realistic draft states.")
+    parser.add_argument('--pkl', default=PKL_PATH)
+    parser.add_argument('--onnx', default=ONNX_PATH)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Max |dP| allowed")
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    parser.add_argument('--min-rank-agreement', type=float, default=MIN_RANK_AGREEMENT)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        df_report, diverged = compare_models(args.pkl, args.onnx, args.batch_sizes, args.tolerance,
+                                             args.top_k, args.min_rank_agreement, args.seed)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    print("\n--- PKL vs ONNX Parity & Latency ---")
+    print(df_report.to_string(index=False, float_format=lambda v: f"{v:.2e}" if 0 < abs(v) < 1e-2 else f"{v:.3f}"))
+
+    if diverged:
+        print(f"\n❌ DIVERGED: max |dP| above {args.tolerance} or top-{args.top_k} agreement below {args.min_rank_agreement}.")
+        sys.exit(1)
+    print("\n✅ MATCH: Models are effectively identical.")
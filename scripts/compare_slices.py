@@ -0,0 +1,233 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import argparse
+from scipy import sparse as sp
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.match_analytics import LOGS_PATH, load_tables, format_duration
+from scripts.rate_intervals import wilson_interval, rate_intervals, format_rate
+
+# Paths
+REPORT_PATH = 'slice_comparison_report.md'
+
+# Slice filter fields. Numeric fields take values like 7, 1-3, 4- or -2 (comma-separated = OR).
+TEXT_FIELDS = ['stage', 'team']
+NUMERIC_FIELDS = ['day', 'game']
+
+# Built-in comparisons (the first slice is the baseline for pick-rate deltas)
+PRESETS = {
+    'stages': ['Swiss Stage:stage=Swiss Stage', 'Knockout Stage:stage=Knockout Stage', 'Grand Finals:stage=Grand Finals'],
+    'daily': ['Swiss (Day 7):stage=Swiss Stage&day=7', 'Knockout (Day 1):stage=Knockout Stage&day=1'],
+    'days': ['Days 1-3:day=1-3', 'Days 4-7:day=4-7'],
+    'games': ['Game 1:game=1', 'Game 2:game=2', 'Game 3+:game=3-']
+}
+
+TOP_N = 5
+MIN_PICKS = 3
+
+def _parse_range(text):
+    lo, sep, hi = text.partition('-')
+    if not sep:
+        return float(lo), float(lo)
+    return (float(lo) if lo.strip() else -np.inf), (float(hi) if hi.strip() else np.inf)
+
+def parse_slice(spec):
+    """
+    'Name:field=value&field=value' -> (name, {field: values}). Without 'Name:' the filter text is the name.
+    Examples: 'Swiss D7:stage=Swiss Stage&day=7', 'day=4-7', 'ONIC:team=ONIC', 'Deciders:game=3-'.
+    An empty filter ('All:') selects every match.
+    """
+    name, sep, expr = spec.partition(':')
+    if not sep:
+        name, expr = spec, spec
+
+    filters = {}
+    for part in filter(None, (p.strip() for p in expr.split('&'))):
+        field, eq, value = part.partition('=')
+        field = field.strip().lower()
+        if not eq or field not in TEXT_FIELDS + NUMERIC_FIELDS:
+            raise ValueError(f"Bad filter '{part}' in slice '{spec}' (fields: {', '.join(TEXT_FIELDS + NUMERIC_FIELDS)})")
+        values = [v.strip() for v in value.split(',') if v.strip()]
+        filters[field] = [_parse_range(v) for v in values] if field in NUMERIC_FIELDS else values
+    return name.strip(), filters
+
+def _numeric_mask(series, ranges):
+    values = series.to_numpy(dtype=float)
+    mask = np.zeros(len(values), dtype=bool)
+    for lo, hi in ranges:
+        mask |= (values >= lo) & (values <= hi)
+    return mask
+
+def slice_masks(filters, matches, picks):
+    """Boolean masks over the matches and picks tables. A team filter keeps that team's own picks."""
+    m_mask = np.ones(len(matches), dtype=bool)
+    p_mask = np.ones(len(picks), dtype=bool)
+    for field, values in filters.items():
+        if field == 'team':
+            m_mask &= (matches['winner'].isin(values) | matches['loser'].isin(values)).to_numpy(dtype=bool)
+            p_mask &= picks['team'].isin(values).to_numpy(dtype=bool)
+        elif field in NUMERIC_FIELDS:
+            m_mask &= _numeric_mask(matches[field], values)
+            p_mask &= _numeric_mask(picks[field], values)
+        else:
+            m_mask &= matches[field].isin(values).to_numpy(dtype=bool)
+            p_mask &= picks[field].isin(values).to_numpy(dtype=bool)
+    return m_mask, p_mask
+
+def compare_slices(slices, logs_path=LOGS_PATH, n_bootstrap=0):
+    """
+    Computes every slice at once: slice membership matrices times the hero one-hot / duration columns.
+    Returns (df_summary, df_heroes); pick-rate deltas are against the first slice.
+    Win rates carry 95% Wilson intervals, plus bootstrap intervals (resampling each slice's matches)
+    when n_bootstrap > 0.
+    """
+    matches, picks = load_tables(logs_path)
+    parsed = [parse_slice(s) for s in slices]
+    names = [name for name, _ in parsed]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Slice names must be unique: {names}")
+
+    masks = [slice_masks(filters, matches, picks) for _, filters in parsed]
+    M_matches = sp.csr_matrix(np.vstack([m for m, _ in masks]).astype(np.float64))
+    M_picks = sp.csr_matrix(np.vstack([p for _, p in masks]).astype(np.float64))
+
+    # [n_picks, n_heroes] one-hot, heroes in first-pick order
+    codes, heroes = pd.factorize(picks['hero'])
+    onehot = sp.csr_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes)), shape=(len(codes), len(heroes)))
+    won = picks['won'].to_numpy(dtype=np.float64)
+
+    pick_counts = (M_picks @ onehot).toarray()
+    win_counts = (M_picks @ sp.diags(won) @ onehot).toarray()
+
+    durations = matches['duration_s'].to_numpy(dtype=float)
+    has_duration = ~np.isnan(durations)
+    games = np.asarray(M_matches.sum(axis=1)).ravel()
+    dur_sum = M_matches @ np.where(has_duration, durations, 0.0)
+    dur_n = M_matches @ has_duration.astype(np.float64)
+
+    # A hero is picked at most once per team, so picks / games is the share of games it appeared in
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pick_rate = pick_counts / games[:, None]
+        win_rate = win_counts / pick_counts
+        avg_duration = dur_sum / dur_n
+
+    df_summary = pd.DataFrame({
+        'slice': names,
+        'filter': [spec.partition(':')[2] if ':' in spec else spec for spec in slices],
+        'games': games.astype(int),
+        'picks': pick_counts.sum(axis=1).astype(int),
+        'avg_duration_s': avg_duration
+    })
+
+    df_heroes = pd.DataFrame({
+        'slice': np.repeat(names, len(heroes)),
+        'hero': np.tile(np.asarray(heroes, dtype=object), len(names)),
+        'picks': pick_counts.ravel().astype(int),
+        'wins': win_counts.ravel().astype(int),
+        'win_rate': win_rate.ravel(),
+        'pick_rate': pick_rate.ravel(),
+        'pick_rate_delta': (pick_rate - pick_rate[0]).ravel()
+    })
+    df_heroes['win_rate_lo'], df_heroes['win_rate_hi'] = wilson_interval(df_heroes['wins'], df_heroes['picks'])
+
+    if n_bootstrap > 0:
+        boot = []
+        for name, (m_mask, p_mask) in zip(names, masks):
+            ci = rate_intervals(matches[m_mask], picks[p_mask], n_bootstrap, heroes=heroes)
+            boot.append(ci[['win_rate_boot_lo', 'win_rate_boot_hi']].to_numpy())
+        df_heroes['win_rate_boot_lo'], df_heroes['win_rate_boot_hi'] = np.vstack(boot).T
+
+    return df_summary, df_heroes[df_heroes['picks'] > 0].reset_index(drop=True)
+
+def top_tables(df_heroes, top_n=TOP_N, min_picks=MIN_PICKS):
+    """Per slice: top picks and top win rates (min_picks or more), ties in first-pick order."""
+    top = {}
+    for name, group in df_heroes.groupby('slice', sort=False):
+        by_picks = group.sort_values('picks', ascending=False, kind='stable').head(top_n)
+        by_wr = group[group['picks'] >= min_picks].sort_values('win_rate', ascending=False, kind='stable').head(top_n)
+        top[name] = (by_picks, by_wr)
+    return top
+
+def delta_table(df_summary, df_heroes, top_n=10):
+    """Heroes with the largest pick-rate change against the baseline slice, one column per slice."""
+    wide = df_heroes.pivot_table(index='hero', columns='slice', values='pick_rate', sort=False).reindex(columns=df_summary['slice']).fillna(0.0)
+    if wide.shape[1] < 2:
+        return wide.head(0)
+    base = wide.columns[0]
+    change = wide.drop(columns=base).sub(wide[base], axis=0)
+    wide['Max Abs Delta'] = change.abs().max(axis=1)
+    return wide.sort_values('Max Abs Delta', ascending=False, kind='stable').head(top_n)
+
+def write_markdown(df_summary, df_heroes, path, top_n=TOP_N, min_picks=MIN_PICKS):
+    summary = df_summary.assign(
+        avg_duration=df_summary['avg_duration_s'].map(lambda s: format_duration(s) if pd.notna(s) else '-')
+    ).drop(columns='avg_duration_s')
+
+    with open(path, 'w') as f:
+        f.write("# Slice Comparison\n\n")
+        f.write("## Overview\n")
+        f.write(summary.to_markdown(index=False))
+        f.write("\n\n")
+
+        for name, (by_picks, by_wr) in top_tables(df_heroes, top_n, min_picks).items():
+            f.write(f"## {name}\n")
+            f.write(f"- **Top Picks**: {', '.join(f'{h} ({c})' for h, c in zip(by_picks['hero'], by_picks['picks'])) or '-'}\n")
+            # Bootstrap intervals when they were computed, Wilson otherwise
+            lo, hi = ('win_rate_boot_lo', 'win_rate_boot_hi') if 'win_rate_boot_lo' in by_wr else ('win_rate_lo', 'win_rate_hi')
+            rates = [f"{h} ({format_rate(wr, l, u)})" for h, wr, l, u in zip(by_wr['hero'], by_wr['win_rate'], by_wr[lo], by_wr[hi])]
+            f.write(f"- **Highest Win Rate (Min {min_picks}, 95% CI)**: {', '.join(rates) or '-'}\n\n")
+
+        df_delta = delta_table(df_summary, df_heroes)
+        if not df_delta.empty:
+            f.write(f"## Pick Rate Shifts (vs {df_summary['slice'].iloc[0]})\n")
+            f.write("Share of each slice's games the hero was picked in.\n\n")
+            f.write(df_delta.to_markdown(floatfmt=".3f"))
+            f.write("\n")
+
+def write_report(df_summary, df_heroes, path, fmt=None, top_n=TOP_N, min_picks=MIN_PICKS):
+    """Writes md, csv (one row per slice x hero, slice totals repeated) or json, picked by fmt or the extension."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower() or 'md'
+    if fmt == 'md':
+        write_markdown(df_summary, df_heroes, path, top_n, min_picks)
+    elif fmt == 'csv':
+        df_heroes.merge(df_summary, on='slice', how='left', suffixes=('', '_slice')).to_csv(path, index=False)
+    elif fmt == 'json':
+        with open(path, 'w') as f:
+            json.dump({
+                'slices': json.loads(df_summary.to_json(orient='records')),
+                'heroes': json.loads(df_heroes.to_json(orient='records'))
+            }, f, indent=2)
+    else:
+        raise ValueError(f"Unknown format '{fmt}' (md, csv, json)")
+    print(f"Report saved to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare any number of match-log slices in one pass.",
+                                     epilog="Slice syntax: 'Name:field=value&field=value', fields stage, team, day, game; "
+                                            "numbers take 7, 1-3, 4- or comma lists.")
+    parser.add_argument('slices', nargs='*', metavar='SLICE')
+    parser.add_argument('--preset', choices=sorted(PRESETS), help="Built-in slice set (used when no slices are given)")
+    parser.add_argument('--output', default=REPORT_PATH)
+    parser.add_argument('--format', choices=['md', 'csv', 'json'], help="Default: from the output extension")
+    parser.add_argument('--top', type=int, default=TOP_N)
+    parser.add_argument('--min-picks', type=int, default=MIN_PICKS)
+    parser.add_argument('--bootstrap', type=int, default=0, help="Bootstrap resamples for win-rate intervals (0 = Wilson only)")
+    args = parser.parse_args()
+
+    slices = args.slices or PRESETS[args.preset or 'stages']
+    if not os.path.exists(LOGS_PATH):
+        print("No match logs found.")
+        sys.exit(1)
+
+    try:
+        df_summary, df_heroes = compare_slices(slices, n_bootstrap=args.bootstrap)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(df_summary.to_string(index=False))
+    write_report(df_summary, df_heroes, args.output, args.format, args.top, args.min_picks)
@@ -1,70 +1,36 @@
-import pandas as pd
 import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.match_analytics import LOGS_PATH, format_duration
+from scripts.hero_aggregates import load_aggregates, pick_table, match_table
+from scripts.rate_intervals import wilson_interval, format_rate
 
 # Paths
-DATA_DIR = os.path.join(os.path.dirname(__file__), '../data')
-LOGS_PATH = os.path.join(DATA_DIR, 'match_logs_real.csv')
 OUTPUT_FILE = 'stage_comparison_report.md'
 
-def parse_duration(dur_str):
-    try:
-        if ':' in str(dur_str):
-            m, s = dur_str.split(':')
-            return int(m) * 60 + int(s)
-        return 0
-    except:
-        return 0
+def get_stats_for_stage(agg, stage):
+    df_matches = match_table(agg, 'stage')
+    df_matches = df_matches[df_matches['stage'] == stage]
+    if df_matches.empty:
+        return {"games": 0, "avg_dur": 0, "top_picks": [], "top_wr": []}
 
-def format_duration(seconds):
-    return f"{int(seconds // 60)}m {int(seconds % 60)}s"
+    # Unparseable durations count as 0s
+    n_games = int(df_matches['games'].iloc[0])
+    avg_dur = df_matches['duration_sum_s'].iloc[0] / n_games
 
-def get_stats_for_stage(df_stage):
-    if df_stage.empty:
-        return {"games": 0, "avg_dur": 0, "top_picks": []}
-    
-    # 1. Games
-    n_games = len(df_stage)
-    
-    # 2. Duration
-    durations = df_stage['Game_Duration'].apply(parse_duration)
-    avg_dur = durations.mean()
-    
-    # 3. Picks & Win Rates
-    pick_counts = {}
-    wins = {}
-    
-    for _, row in df_stage.iterrows():
-        # Winning Team
-        winner = row['Winning_Team']
-        if isinstance(winner, str):
-            for p in winner.split('|'):
-                if ':' in p:
-                    h = p.split(':')[0]
-                    pick_counts[h] = pick_counts.get(h, 0) + 1
-                    wins[h] = wins.get(h, 0) + 1
-                    
-        # Losing Team
-        loser = row['Losing_Team']
-        if isinstance(loser, str):
-            for p in loser.split('|'):
-                if ':' in p:
-                    h = p.split(':')[0]
-                    pick_counts[h] = pick_counts.get(h, 0) + 1
-    
-    # Top Picks
-    sorted_picks = sorted(pick_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_picks_fmt = [f"{h} ({c})" for h, c in sorted_picks]
-    
-    # Top Win Rate (min 3 games)
-    hero_stats = []
-    for h, count in pick_counts.items():
-        if count >= 3:
-            w = wins.get(h, 0)
-            wr = (w / count) * 100
-            hero_stats.append((h, wr, count))
-            
-    sorted_wr = sorted(hero_stats, key=lambda x: x[1], reverse=True)[:3]
-    top_wr_fmt = [f"{h} ({wr:.1f}%)" for h, wr, c in sorted_wr]
+    df_heroes = pick_table(agg, 'hero_stage')
+    df_heroes = df_heroes[df_heroes['stage'] == stage]
+
+    top = df_heroes.sort_values('picks', ascending=False, kind='stable').head(5)
+    top_picks_fmt = [f"{h} ({c})" for h, c in zip(top['hero'], top['picks'])]
+
+    # Top Win Rate (min 3 games), with a 95% Wilson interval: 3-10 games is mostly noise
+    top_wr = df_heroes[df_heroes['picks'] >= 3].sort_values('win_rate', ascending=False, kind='stable').head(3)
+    lo, hi = wilson_interval(top_wr['wins'], top_wr['picks'])
+    top_wr_fmt = [f"{h} ({format_rate(wr, l, u)})" for h, wr, l, u in zip(top_wr['hero'], top_wr['win_rate'], lo, hi)]
 
     return {
         "games": n_games,
@@ -78,8 +44,8 @@ def main():
         print("Log file not found.")
         return
 
-    # Read with string Day to avoid issues
-    df = pd.read_csv(LOGS_PATH, dtype={'Day': str})
+    # Materialized counters, synced with the log file if it changed
+    agg = load_aggregates(LOGS_PATH)
     
     # Identify Stages
     # Order: Swiss -> Knockout -> Grand Finals (Custom sort)
@@ -92,12 +58,11 @@ def main():
         
         # Summary Table
         f.write("## Overview\n")
-        f.write("| Stage | Games | Avg Duration | Top Picks | Highest Win Rate (Min 3) |\n")
+        f.write("| Stage | Games | Avg Duration | Top Picks | Highest Win Rate (Min 3, 95% CI) |\n")
         f.write("|---|---|---|---|---|\n")
         
         for stage in stages:
-            stage_data = df[df['Stage'] == stage]
-            stats = get_stats_for_stage(stage_data)
+            stats = get_stats_for_stage(agg, stage)
             
             dur_str = format_duration(stats['avg_dur'])
             picks_str = ", ".join(stats['top_picks'])
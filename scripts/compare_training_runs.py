@@ -1,84 +1,195 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
+import random
+import argparse
+from joblib import Parallel, delayed
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from scripts.generate_training_data_new import generate_data
-from scripts.train_draft_model import train_model
+from scripts.generate_training_data_new import load_data as load_generator_data, parse_real_logs, generate_synthetic_samples
+from scripts.train_draft_model import load_data, preprocess_features, featurize, fit_and_evaluate
+from scripts.feature_encoder import matrix_nbytes
 
-def main():
-    print("Starting Model Comparison...")
-    
-    # 1. Load Real Logs
-    logs_path = os.path.join('data', 'match_logs_real.csv')
-    if not os.path.exists(logs_path):
-        print("No match logs found.")
-        return
-        
-    df_full = pd.read_csv(logs_path)
-    
-    # ensure string types for filtering
-    df_full['Stage'] = df_full['Stage'].astype(str)
-    df_full['Day'] = df_full['Day'].astype(str)
-    
-    # 2. Prepare Data Subsets
-    # A. Baseline: Swiss + Knockout (Pre-Grand Finals)
-    df_baseline = df_full[df_full['Stage'].isin(['Swiss Stage', 'Knockout Stage'])]
-    print(f"Subset Baseline (Swiss + KO): {len(df_baseline)} matches")
-    
-    # B. Comparison: All Stages (Including Grand Finals)
-    df_all = df_full
-    print(f"Subset All (Swiss + KO + GF): {len(df_all)} matches")
-    
-    # 3. Train Baseline
-    print("\n--- Training Baseline (Swiss + KO) ---")
-    training_data_base = generate_data(df_logs_override=df_baseline)
-    res_base = train_model(df_train_override=training_data_base, save_model=False)
-    
-    # 4. Train Comparison
-    print("\n--- Training Comparison (All Stages) ---")
-    training_data_all = generate_data(df_logs_override=df_all)
-    res_all = train_model(df_train_override=training_data_all, save_model=False)
-    
-    # 5. Generate Report
-    print("\nGenerating Report...")
-    with open('model_training_comparison_report.md', 'w') as f:
+# Paths
+LOGS_PATH = os.path.join('data', 'match_logs_real.csv')
+REPORT_PATH = 'model_training_comparison_report.md'
+
+# Same synthetic volume as generate_data (comparison mode)
+N_SYNTHETIC = 5000
+
+# Named subsets of match_logs_real.csv: name -> pandas query ('' = all matches)
+PRESETS = {
+    'gf': {
+        'Baseline (Swiss + Knockout)': "Stage in ['Swiss Stage', 'Knockout Stage']",
+        'With Grand Finals': ''
+    },
+    'stages': {
+        'Swiss Stage': "Stage == 'Swiss Stage'",
+        'Knockout Stage': "Stage == 'Knockout Stage'",
+        'Swiss + Knockout': "Stage in ['Swiss Stage', 'Knockout Stage']",
+        'All Stages': ''
+    },
+    'days': {
+        'Days 1-3': "Day <= 3",
+        'Days 4-7': "Day >= 4",
+        'Days 1-5': "Day <= 5",
+        'All Days': ''
+    }
+}
+
+def select_subset(df_logs, query):
+    return df_logs if not query else df_logs.query(query)
+
+def build_shared_synthetic(df_stats, seed=42):
+    """Generates the synthetic portion once and featurizes it (memory-mapped via the feature cache)."""
+    random.seed(seed)
+    _, id_to_stats, _, counters, synergies = load_generator_data()
+    df_synth = pd.DataFrame(generate_synthetic_samples(id_to_stats, counters, synergies, n_samples=N_SYNTHETIC))
+    return featurize(df_synth, df_stats)
+
+def peak_rss_mb():
+    """
+    Peak RSS of the current process over its whole lifetime (None where unavailable). joblib reuses
+    workers, so for a worker this covers every task it ran so far, not just the current one.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KB on Linux
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def run_variant(name, X_real, y_real, w_real, X_syn, y_syn, w_syn):
+    """
+    Worker: trains one variant on [real rows of its subset + the shared synthetic rows],
+    in the same row order generate_data produces. X_syn arrives memory-mapped, not copied.
+    """
+    X = np.vstack([X_real, X_syn])
+    y = np.concatenate([y_real, y_syn])
+    w = np.concatenate([w_real, w_syn])
+
+    _, results = fit_and_evaluate(X, y, w, n_jobs=1)
+    results['name'] = name
+    results['matrix_mb'] = matrix_nbytes(X) / 1e6
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+def run_experiments(subsets, n_jobs=-1, seed=42):
+    """Trains one forest per named subset in parallel and returns their results, in input order."""
+    if not os.path.exists(LOGS_PATH):
+        raise FileNotFoundError("No match logs found.")
+
+    df_logs = pd.read_csv(LOGS_PATH)
+    _, df_stats = load_data(pd.DataFrame())
+    name_to_id, _, id_to_meta, _, _ = load_generator_data()
+
+    print(f"Generating the shared synthetic base ({N_SYNTHETIC} samples)...")
+    X_syn, y_syn, w_syn, stat_cols = build_shared_synthetic(df_stats, seed=seed)
+
+    jobs = []
+    for name, query in subsets.items():
+        df_subset = select_subset(df_logs, query)
+        df_real = pd.DataFrame(parse_real_logs(name_to_id, id_to_meta, df_override=df_subset),
+                               columns=['enemy_ids', 'ally_ids', 'candidate_id', 'label', 'is_real'])
+        X_real, y_real, w_real, _ = preprocess_features(df_real, df_stats)
+        print(f"Subset '{name}': {len(df_subset)} matches, {len(df_real)} real samples")
+        jobs.append((name, len(df_subset), (X_real, y_real, w_real)))
+
+    print(f"\nTraining {len(jobs)} variants in parallel...")
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(run_variant)(name, *real, X_syn, y_syn, w_syn) for name, _, real in jobs
+    )
+
+    for (_, n_matches, real), r in zip(jobs, results):
+        r['n_matches'] = n_matches
+        r['n_real'] = len(real[1])
+        r['stat_feature_names'] = stat_cols
+    return results
+
+def write_report(results, subsets, path=REPORT_PATH):
+    base = results[0]
+    stat_names = base['stat_feature_names']
+
+    df_acc = pd.DataFrame([{
+        'Subset': r['name'],
+        'Matches': r['n_matches'],
+        'Real Samples': r['n_real'],
+        'Accuracy': r['accuracy'],
+        'Diff vs Baseline': r['accuracy'] - base['accuracy'],
+        'Fit (s)': r['fit_s'],
+        'Matrix (MB)': r['matrix_mb'],
+        'Worker Cumulative Peak RSS (MB)': r['peak_rss_mb']
+    } for r in results])
+
+    df_imp = pd.DataFrame({'Feature': stat_names})
+    for r in results:
+        df_imp[r['name']] = r['feature_importances'][-len(stat_names):]
+    if len(results) > 1:
+        df_imp['Max Change'] = df_imp[[r['name'] for r in results[1:]]].sub(df_imp[base['name']], axis=0).abs().max(axis=1)
+    df_imp = df_imp.sort_values(results[-1]['name'], ascending=False)
+
+    with open(path, 'w') as f:
         f.write("# Model Training Comparison Report\n")
-        f.write("## Scenario: Swiss+Knockout vs Including Grand Finals\n\n")
-        
-        # A. Accuracy
+        f.write(f"## Scenario: {' vs '.join(r['name'] for r in results)}\n\n")
+        f.write(f"All variants share the same {N_SYNTHETIC} synthetic samples; only the real-match rows differ.\n\n")
 
+        f.write("### Subsets\n")
+        for name, query in subsets.items():
+            f.write(f"- **{name}**: `{query or 'all matches'}`\n")
+        f.write("\n")
+
+        # A. Accuracy
         f.write("### Accuracy\n")
-        f.write(f"- **Baseline (Swiss + Knockout)**: {res_base['accuracy']:.4f}\n")
-        f.write(f"- **With Grand Finals**: {res_all['accuracy']:.4f}\n")
-        diff = res_all['accuracy'] - res_base['accuracy']
-        f.write(f"- **Difference**: {diff:+.4f}\n\n")
-        
+        f.write(df_acc.to_markdown(index=False, floatfmt=".4f"))
+        f.write("\n\n")
+
         # B. Feature Importance (Stats)
         f.write("### Strategic Feature Importance Change\n")
         f.write("Values indicate how much the model relies on specific hero attributes.\n\n")
-        
-        stat_names = res_base['stat_feature_names']
-        imp_base = res_base['feature_importances'][-len(stat_names):]
-        imp_all = res_all['feature_importances'][-len(stat_names):]
-        
-        df_imp = pd.DataFrame({
-            'Feature': stat_names,
-            'Importance (Baseline)': imp_base,
-            'Importance (With GF)': imp_all
-        })
-        df_imp['Change'] = df_imp['Importance (With GF)'] - df_imp['Importance (Baseline)']
-        df_imp = df_imp.sort_values('Importance (With GF)', ascending=False)
-        
         f.write(df_imp.to_markdown(index=False, floatfmt=".4f"))
         f.write("\n\n")
-        
+
         f.write("### Interpretation\n")
-        f.write("- **Accuracy**: Higher is better. A significant drop might indicate the new data conflicts with old patterns (meta shift).\n")
-        f.write("- **Feature Importance**: Changes here show if the model is prioritizing different aspects (e.g., Early Power vs Late Power) due to the new Knockout games.\n")
+        f.write(f"- **Accuracy**: Higher is better, compared against the first subset ({base['name']}). A significant drop might indicate the new data conflicts with old patterns (meta shift).\n")
+        f.write("- **Feature Importance**: Changes here show if the model is prioritizing different aspects (e.g., Early Power vs Late Power) in different stages or days.\n")
+
+    print(f"Success! Report saved to '{path}'")
+    print(df_acc.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+def parse_subset_args(specs):
+    """'Name=query' pairs; an empty query selects all matches."""
+    subsets = {}
+    for spec in specs:
+        name, sep, query = spec.partition('=')
+        if not sep:
+            raise ValueError(f"Subset '{spec}' must look like Name=query")
+        subsets[name.strip()] = query.strip()
+    return subsets
+
+def main():
+    parser = argparse.ArgumentParser(description="Train N variants on named subsets of the real logs and compare them.")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='gf',
+                        help="Built-in subset set (default: Swiss+Knockout vs including Grand Finals)")
+    parser.add_argument('--subset', action='append', default=[], metavar="NAME=QUERY",
+                        help="Custom subset as a pandas query over the logs, e.g. \"Late Days=Day >= 5\" (repeatable, overrides --preset)")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=42, help="Seed for the shared synthetic base")
+    parser.add_argument('--output', default=REPORT_PATH)
+    args = parser.parse_args()
+
+    subsets = parse_subset_args(args.subset) if args.subset else PRESETS[args.preset]
 
-    print("Success! Report saved to 'model_training_comparison_report.md'")
+    print("Starting Model Comparison...")
+    results = run_experiments(subsets, n_jobs=args.n_jobs, seed=args.seed)
+    print("\nGenerating Report...")
+    write_report(results, subsets, args.output)
 
 if __name__ == "__main__":
     main()
@@ -1,22 +1,41 @@
 import joblib
 import numpy as np
 import os
+import sys
+import json
+import gzip
+import time
+import argparse
+import onnx
+from onnx import helper
 from skl2onnx import convert_sklearn
 from skl2onnx.common.data_types import FloatTensorType
 import onnxruntime as rt
 
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.model_bundle import BUNDLE_PATH, MANIFEST_NAME, build_schema, read_manifest
+from scripts.onnx_draft_graph import build_id_model, verify_id_model, score_ids
+from scripts.compare_pkl_onnx import TOLERANCE as PARITY_TOLERANCE, compare_models
+
 # Paths
 DATA_DIR = os.path.join(os.path.dirname(__file__), '../data')
 MODEL_PATH = os.path.join(DATA_DIR, 'draft_model_rf.pkl')
 ONNX_PATH = os.path.join(DATA_DIR, 'draft_model.onnx')
 
-def convert_model():
-    if not os.path.exists(MODEL_PATH):
+# Optimization stage
+FP16_TOLERANCE = PARITY_TOLERANCE # max |dP| allowed when rounding to float16: the result must still pass compare_pkl_onnx
+TOP_K = 5
+BENCH_REPEATS = 50
+
+def convert_model(model_path=MODEL_PATH, onnx_path=ONNX_PATH):
+    if not os.path.exists(model_path):
         print("Model file not found!")
         return
 
     print("Loading Scikit-Learn Model...")
-    clf = joblib.load(MODEL_PATH)
+    clf = joblib.load(model_path)
     
     # Define Input Type
     # Our feature vector size depends on training.
@@ -36,14 +55,39 @@ def convert_model():
     # Force IR Version 9 (Max supported by Android ORT 1.16 in some cases)
     bg_node.ir_version = 9
 
-    with open(ONNX_PATH, "wb") as f:
+    with open(onnx_path, "wb") as f:
         f.write(bg_node.SerializeToString())
         
-    print(f"Success! Model saved to {ONNX_PATH}")
+    print(f"Success! Model saved to {onnx_path}")
+    export_schema(clf, model_path, onnx_path)
+
+def export_schema(clf, model_path, onnx_path):
+    """
+    Writes <onnx>_schema.json next to the ONNX file: hero index order, stat column order and
+    block offsets, so the app builds input vectors from data instead of hard-coded widths.
+    """
+    from scripts.train_draft_model import load_data
+    import pandas as pd
+
+    # The default model ships with a bundle: reuse its schema and tie the export to its hash
+    if model_path == MODEL_PATH and os.path.exists(os.path.join(BUNDLE_PATH, MANIFEST_NAME)):
+        manifest = read_manifest(BUNDLE_PATH)
+        schema = dict(manifest['schema'], bundle_hash=manifest['content_hash'])
+    else:
+        _, df_stats = load_data(pd.DataFrame())
+        schema = build_schema(df_stats)
 
-def verify_onnx():
+    if schema['n_features'] != clf.n_features_in_:
+        raise ValueError(f"Model expects {clf.n_features_in_} features but the schema has {schema['n_features']}. Retrain first.")
+
+    schema_path = os.path.splitext(onnx_path)[0] + '_schema.json'
+    with open(schema_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    print(f"Feature schema saved to {schema_path}")
+
+def verify_onnx(model_path=MODEL_PATH, onnx_path=ONNX_PATH):
     print("Verifying ONNX Model...")
-    sess = rt.InferenceSession(ONNX_PATH)
+    sess = rt.InferenceSession(onnx_path)
     
     input_name = sess.get_inputs()[0].name
     label_name = sess.get_outputs()[0].name
@@ -51,7 +95,7 @@ def verify_onnx():
     # Create dummy input with correct shape
     # We need to know the shape (read from model or assume from above)
     # Let's just reload the pickle to be lazy about shape, or assume 272 (131+131+5+10 etc)
-    clf = joblib.load(MODEL_PATH)
+    clf = joblib.load(model_path)
     n_features = clf.n_features_in_
     
     dummy_input = np.random.rand(1, n_features).astype(np.float32)
@@ -70,6 +114,279 @@ def verify_onnx():
     else:
         print("❌ Mismatch!")
 
+# --- OPTIMIZATION STAGE ---
+def _tree_nodes(model):
+    return [n for n in model.graph.node if n.op_type in ('TreeEnsembleClassifier', 'TreeEnsembleRegressor')]
+
+def _get_attr(node, name):
+    for a in node.attribute:
+        if a.name == name:
+            return a
+    return None
+
+def _set_floats(node, name, values):
+    a = _get_attr(node, name)
+    del a.floats[:]
+    a.floats.extend(values)
+
+def strip_model(model):
+    """
+    Lossless size reductions:
+    - drops graph outputs the app never reads (the label tensor; probabilities are all it uses)
+    - removes optional tree attributes that only repeat their defaults
+      (nodes_hitrates = 1.0, nodes_missing_value_tracks_true = 0)
+    - drops zero class weights (a missing leaf entry already contributes 0)
+    - dedupes opset imports
+    """
+    keep = [o for o in model.graph.output if o.name != 'label']
+    if len(keep) < len(model.graph.output) and keep:
+        del model.graph.output[:]
+        model.graph.output.extend(keep)
+
+    for node in _tree_nodes(model):
+        defaults = {'nodes_hitrates': 1.0, 'nodes_missing_value_tracks_true': 0}
+        for name, default in defaults.items():
+            a = _get_attr(node, name)
+            if a is not None and all(v == default for v in helper.get_attribute_value(a)):
+                node.attribute.remove(a)
+
+        if node.op_type == 'TreeEnsembleClassifier':
+            weights = np.array(_get_attr(node, 'class_weights').floats, dtype=np.float32)
+            nonzero = weights != 0
+            if not nonzero.all() and nonzero.any():
+                for name in ('class_ids', 'class_nodeids', 'class_treeids'):
+                    vals = np.array(_get_attr(node, name).ints)[nonzero]
+                    a = _get_attr(node, name)
+                    del a.ints[:]
+                    a.ints.extend(vals.tolist())
+                _set_floats(node, 'class_weights', weights[nonzero].tolist())
+
+    opsets = {}
+    for o in model.opset_import:
+        opsets[o.domain] = max(opsets.get(o.domain, 0), o.version)
+    del model.opset_import[:]
+    model.opset_import.extend(helper.make_opsetid(d, v) for d, v in opsets.items())
+    return model
+
+def round_float16(model, attrs):
+    """
+    Rounds float attributes to float16 precision (still stored as float32: TreeEnsemble ml opset 1-3,
+    which Android ORT 1.16 loads, has no float16 attributes). The values compress far better in the APK.
+    """
+    for node in _tree_nodes(model):
+        for name in attrs:
+            a = _get_attr(node, name)
+            if a is not None:
+                _set_floats(node, name, np.array(a.floats, dtype=np.float32).astype(np.float16).astype(np.float32).tolist())
+    return model
+
+def parity_inputs(n_states=2000, seed=42):
+    """Realistic feature rows: random draft states plus one full-candidate draft per hero context."""
+    import pandas as pd
+    from scripts.train_draft_model import load_data
+    from scripts.feature_encoder import build_encoder, encode_flat, encode_candidates
+    from scripts.generate_training_data_new import random_draft_states
+
+    _, df_stats = load_data(pd.DataFrame())
+    encoder = build_encoder(df_stats)
+    states = random_draft_states(encoder['hero_ids'], n_states, seed=seed)
+    X_states = encode_flat(encoder, n_states, *states, dtype=np.float32)
+
+    # One draft context scored against every hero: covers every candidate stat value
+    ally_rows, ally_ids, enemy_rows, enemy_ids, _ = random_draft_states(encoder['hero_ids'], 1, seed=seed + 1)
+    X_draft = encode_candidates(encoder, ally_ids, enemy_ids, encoder['hero_ids'])
+    return X_states, X_draft
+
+def _probabilities(sess, X):
+    names = [o.name for o in sess.get_outputs()]
+    out = sess.run(['probabilities'] if 'probabilities' in names else None, {sess.get_inputs()[0].name: X})
+    return out[-1][:, 1]
+
+def parity(sess_ref, sess_new, X_states, X_draft, k=TOP_K):
+    """Max |dP| over all parity rows and whether the top-k of the full-candidate draft is unchanged."""
+    p_ref = np.concatenate([_probabilities(sess_ref, X_states), _probabilities(sess_ref, X_draft)])
+    p_new = np.concatenate([_probabilities(sess_new, X_states), _probabilities(sess_new, X_draft)])
+    d_ref = _probabilities(sess_ref, X_draft)
+    d_new = _probabilities(sess_new, X_draft)
+    same_top_k = list(np.argsort(-d_ref, kind='stable')[:k]) == list(np.argsort(-d_new, kind='stable')[:k])
+    return float(np.abs(p_ref - p_new).max()), same_top_k
+
+def _session(model_bytes, optimization=rt.GraphOptimizationLevel.ORT_ENABLE_ALL):
+    opts = rt.SessionOptions()
+    opts.graph_optimization_level = optimization
+    return rt.InferenceSession(model_bytes, opts, providers=['CPUExecutionProvider'])
+
+def benchmark(path, X_draft, repeats=BENCH_REPEATS):
+    """File size, gzip size (what the APK stores), session creation time and per-draft latency."""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    create_ms = []
+    for _ in range(5):
+        start = time.perf_counter()
+        sess = _session(data)
+        create_ms.append((time.perf_counter() - start) * 1000)
+
+    row = X_draft[:1]
+    lat = {1: [], len(X_draft): []}
+    for X in (row, X_draft):
+        _probabilities(sess, X) # warm-up
+        for _ in range(repeats):
+            start = time.perf_counter()
+            _probabilities(sess, X)
+            lat[len(X)].append((time.perf_counter() - start) * 1000)
+
+    return {
+        'Model': os.path.basename(path),
+        'Size (KB)': len(data) / 1024,
+        'Gzip (KB)': len(gzip.compress(data)) / 1024,
+        'Session (ms)': float(np.median(create_ms)),
+        'p50 batch 1 (ms)': float(np.percentile(lat[1], 50)),
+        f'p50 batch {len(X_draft)} (ms)': float(np.percentile(lat[len(X_draft)], 50)),
+        f'p99 batch {len(X_draft)} (ms)': float(np.percentile(lat[len(X_draft)], 99))
+    }
+
+def optimize_onnx(onnx_path=ONNX_PATH, output_path=None, float16='auto', tolerance=FP16_TOLERANCE, model_path=None):
+    """
+    Optimization stage on top of convert_model:
+    1. strip unused outputs and default attributes (lossless)
+    2. float16 rounding of leaf values, then thresholds, each kept only if parity holds
+       (max |dP| <= tolerance and unchanged top-k); float16='none'/'leaves'/'all' forces a level
+    3. ONNX Runtime basic (portable) graph optimizations, saved offline
+    With model_path (the source pickle), an 'auto' result is also checked with compare_pkl_onnx
+    and re-exported with float32 values if it diverges there.
+    Writes <name>_optimized.onnx and prints a baseline vs optimized report.
+    """
+    import pandas as pd
+
+    output_path = output_path or os.path.splitext(onnx_path)[0] + '_optimized.onnx'
+    base = onnx.load(onnx_path)
+    sess_base = _session(base.SerializeToString())
+    X_states, X_draft = parity_inputs()
+
+    print("Stripping unused outputs and default attributes...")
+    model = strip_model(onnx.load(onnx_path))
+    err, same = parity(sess_base, _session(model.SerializeToString()), X_states, X_draft)
+    if err > 1e-6:
+        raise ValueError(f"Lossless strip changed probabilities (max |dP| {err:.2e}).")
+
+    levels = {'none': [], 'leaves': ['class_weights', 'target_weights'],
+              'all': ['class_weights', 'target_weights', 'nodes_values']}
+    chosen = 'none'
+    for level in (['leaves', 'all'] if float16 == 'auto' else [float16] if float16 != 'none' else []):
+        candidate = round_float16(onnx.load_from_string(model.SerializeToString()), levels[level])
+        err, same = parity(sess_base, _session(candidate.SerializeToString()), X_states, X_draft)
+        ok = err <= tolerance and same
+        print(f"float16 '{level}': max |dP| {err:.2e}, top-{TOP_K} unchanged: {same} -> {'kept' if ok or float16 != 'auto' else 'rejected'}")
+        if ok or float16 != 'auto':
+            model, chosen = candidate, level
+        else:
+            break
+
+    # Offline basic optimizations only: extended/all levels may emit ORT-internal ops Android cannot load
+    opts = rt.SessionOptions()
+    opts.graph_optimization_level = rt.GraphOptimizationLevel.ORT_ENABLE_BASIC
+    opts.optimized_model_filepath = output_path
+    rt.InferenceSession(model.SerializeToString(), opts, providers=['CPUExecutionProvider'])
+
+    # Keep the Android-compatible IR version and opsets (ORT lists every domain it knows)
+    optimized = onnx.load(output_path)
+    optimized.ir_version = base.ir_version
+    del optimized.opset_import[:]
+    optimized.opset_import.extend(model.opset_import)
+    onnx.save(optimized, output_path)
+
+    err, same = parity(sess_base, _session(optimized.SerializeToString()), X_states, X_draft)
+    print(f"Optimized model saved to {output_path} (float16: {chosen}, max |dP| {err:.2e}, top-{TOP_K} unchanged: {same})")
+
+    if model_path is not None and float16 == 'auto' and chosen != 'none':
+        df_parity, diverged = compare_models(model_path, output_path, batch_sizes=[1, len(X_draft)], tolerance=tolerance)
+        if diverged:
+            print(f"float16 '{chosen}' diverges from {os.path.basename(model_path)} "
+                  f"(max |dP| {df_parity['Max |dP|'].max():.2e}); keeping float32 values.")
+            return optimize_onnx(onnx_path, output_path, float16='none', tolerance=tolerance)
+
+    df = pd.DataFrame([benchmark(onnx_path, X_draft), benchmark(output_path, X_draft)])
+    print("\n--- ONNX Export Report ---")
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print("\nThe optimized model only outputs 'probabilities': read it by name (output index 0).")
+    return df
+
+# --- HERO ID GRAPH ---
+def id_contexts(encoder, n_drafts=200, seed=42):
+    """Random drafts with bans, plus edge cases: empty draft, unknown/negative IDs and duplicates."""
+    from scripts.generate_training_data_new import random_draft_states
+
+    rng = np.random.default_rng(seed)
+    hero_ids = encoder['hero_ids']
+    ally_rows, ally_ids, enemy_rows, enemy_ids, _ = random_draft_states(hero_ids, n_drafts, seed=seed)
+
+    contexts = []
+    for r in range(n_drafts):
+        allies, enemies = ally_ids[ally_rows == r], enemy_ids[enemy_rows == r]
+        free = np.setdiff1d(hero_ids, np.concatenate([allies, enemies]))
+        bans = rng.choice(free, rng.integers(0, 7), replace=False)
+        contexts.append((allies, enemies, bans))
+
+    contexts += [
+        (np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([], dtype=np.int64)),
+        (np.array([hero_ids[0], 999, -3]), np.array([hero_ids[1]]), np.array([hero_ids[2], hero_ids[2]])),
+        (np.array([hero_ids[3], hero_ids[3]]), np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+    ]
+    return contexts
+
+def export_id_model(model_path=MODEL_PATH, onnx_path=ONNX_PATH, output_path=None):
+    """
+    Writes <name>_ids.onnx: the converted model behind a baked-in encoder, taking int64
+    ally/enemy/ban hero IDs and returning scores for every hero in one run.
+    """
+    import pandas as pd
+    from scripts.train_draft_model import load_data
+    from scripts.feature_encoder import build_encoder
+
+    output_path = output_path or os.path.splitext(onnx_path)[0] + '_ids.onnx'
+    clf = joblib.load(model_path)
+    _, df_stats = load_data(pd.DataFrame())
+    encoder = build_encoder(df_stats)
+    if encoder['n_features'] != clf.n_features_in_:
+        raise ValueError(f"Model expects {clf.n_features_in_} features but the hero registry encodes {encoder['n_features']}. Retrain first.")
+
+    id_model = build_id_model(strip_model(onnx.load(onnx_path)), encoder)
+    onnx.save(id_model, output_path)
+
+    print("Verifying hero ID graph against the Python encoder...")
+    max_diff = verify_id_model(output_path, clf, encoder, id_contexts(encoder))
+
+    sess = _session(id_model.SerializeToString())
+    allies, enemies, bans = id_contexts(encoder, n_drafts=1)[0]
+    score_ids(sess, allies, enemies, bans) # warm-up
+    times = []
+    for _ in range(BENCH_REPEATS):
+        start = time.perf_counter()
+        score_ids(sess, allies, enemies, bans)
+        times.append((time.perf_counter() - start) * 1000)
+
+    print(f"ID graph saved to {output_path} ({os.path.getsize(output_path) / 1024:.0f} KB): "
+          f"max |dP| {max_diff:.2e}, all {encoder['n_heroes']} heroes scored in p50 {np.percentile(times, 50):.2f} ms per draft")
+    return output_path
+
 if __name__ == "__main__":
-    convert_model()
-    verify_onnx()
+    parser = argparse.ArgumentParser(description="Convert a draft model pickle (forest or distilled student) to ONNX.")
+    parser.add_argument('--model', default=MODEL_PATH, help="Scikit-Learn model pickle")
+    parser.add_argument('--output', default=None, help="ONNX path (default: data/draft_model.onnx, or <model>.onnx for --model)")
+    parser.add_argument('--optimize', action='store_true', help="Also write <name>_optimized.onnx and report size/load/latency")
+    parser.add_argument('--float16', choices=['auto', 'none', 'leaves', 'all'], default='auto',
+                        help="float16 rounding level for --optimize (auto = most aggressive within tolerance)")
+    parser.add_argument('--tolerance', type=float, default=FP16_TOLERANCE, help="Max |dP| allowed for float16 rounding")
+    parser.add_argument('--id-inputs', action='store_true',
+                        help="Also write <name>_ids.onnx, which takes ally/enemy/ban hero IDs and scores every hero")
+    args = parser.parse_args()
+
+    onnx_path = args.output or (ONNX_PATH if args.model == MODEL_PATH else os.path.splitext(args.model)[0] + '.onnx')
+    convert_model(args.model, onnx_path)
+    verify_onnx(args.model, onnx_path)
+
+    if args.optimize:
+        optimize_onnx(onnx_path, float16=args.float16, tolerance=args.tolerance, model_path=args.model)
+    if args.id_inputs:
+        export_id_model(args.model, onnx_path)
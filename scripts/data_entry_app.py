@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import os
-import joblib
+import sys
+import json
 
 # Setup Paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,6 +13,20 @@ BASE_STATS_PATH = os.path.join(DATA_DIR, 'hero_base_stats.csv')
 META_STATS_PATH = os.path.join(DATA_DIR, 'hero_meta_performance.csv')
 MODEL_PATH = os.path.join(DATA_DIR, 'draft_model_rf.pkl')
 
+# Add project root to sys.path
+sys.path.append(os.path.abspath(PROJECT_ROOT))
+
+from scripts.feature_encoder import STAT_COLS, build_encoder, score_candidates
+from scripts.model_registry import has_default_model, load_model, load_registry
+from scripts.hero_aggregates import load_aggregates, real_hero_pool, record_match, source_hash, split_key
+from scripts.match_analytics import load_tables
+from scripts.rate_intervals import rate_intervals, format_rate
+from scripts import team_ratings
+from scripts import spans
+
+# Latency budget used to pick a model from the registry (falls back to the default bundle/MODEL_PATH if empty)
+MODEL_BUDGET = 'server'
+
 st.set_page_config(page_title="DraftNexus AI", layout="wide", page_icon="⚔️")
 
 # --- DATA LOADING ---
@@ -38,11 +52,18 @@ def load_hero_data():
 
 @st.cache_resource
 def load_model_resources():
-    if not os.path.exists(MODEL_PATH) or not os.path.exists(META_STATS_PATH):
+    has_model = has_default_model() or load_registry()
+    if not has_model or not os.path.exists(META_STATS_PATH):
         return None, None
         
-    clf = joblib.load(MODEL_PATH)
     df_meta = pd.read_csv(META_STATS_PATH)
+    df_stats = pd.merge(load_hero_data()[2], df_meta[['Hero_ID', 'Early_Power', 'Mid_Power', 'Late_Power']], on='Hero_ID', how='left')
+    try:
+        clf = load_model(MODEL_BUDGET if load_registry() else None, df_stats=df_stats)
+    except ValueError as e:
+        # Bundle trained on a different hero pool
+        st.error(str(e))
+        return None, None
     return clf, df_meta
 
 heroes, ICON_MAP, DF_BASE = load_hero_data()
@@ -53,25 +74,39 @@ def get_hero_icon(hero_name):
     return ICON_MAP.get(hero_name, "https://static.wikia.nocookie.net/mobile-legends/images/0/05/Empty_Icon.png/revision/latest?cb=20171025063000")
 
 def get_real_match_heroes():
-    if not os.path.exists(LOGS_PATH): return set()
     try:
-        df = pd.read_csv(LOGS_PATH)
-        heroes = set()
-        for col in ['Winning_Team', 'Losing_Team']:
-            # Handle potential float/NaN values strictly
-            if col in df.columns:
-                series = df[col].dropna().astype(str)
-                for val in series:
-                    if '|' in val:
-                        picks = val.split('|')
-                        for p in picks:
-                            if ':' in p:
-                                heroes.add(p.split(':')[0])
-        return heroes
+        return real_hero_pool(load_aggregates(LOGS_PATH))
     except Exception as e:
-        print(f"Error reading match logs: {e}")
+        print(f"Error reading match aggregates: {e}")
         return set()
 
+@spans.timed()
+def get_log_role_counts():
+    """(Hero, Role) -> times played in the real logs, from the stored aggregates."""
+    try:
+        counts = load_aggregates(LOGS_PATH)['pick_counts']['hero_role']
+        return {tuple(split_key(k)): picks for k, (picks, _) in counts.items()}
+    except Exception as e:
+        print(f"Error reading match aggregates: {e}")
+        return {}
+
+@st.cache_data
+def get_hero_rate_intervals(logs_mtime, stage=None, n_bootstrap=1000):
+    """Hero win rates with 95% Wilson/bootstrap intervals (logs_mtime keys the cache)."""
+    matches, picks = load_tables(LOGS_PATH)
+    if stage:
+        matches, picks = matches[matches['stage'] == stage], picks[picks['stage'] == stage]
+    return rate_intervals(matches, picks, n_bootstrap)
+
+def get_team_ratings():
+    """Incremental Elo state for the real logs (synced if the log file changed)."""
+    try:
+        return team_ratings.load_ratings(LOGS_PATH)
+    except Exception as e:
+        print(f"Error reading team ratings: {e}")
+        return team_ratings.empty_state()
+
+@spans.timed()
 def predict_hero_role(hero_name):
     """
     Predicts the most likely role for a hero based on:
@@ -81,24 +116,11 @@ def predict_hero_role(hero_name):
     if not hero_name: return None
     
     # 1. Check Real Logs
-    role_counts = {}
-    if os.path.exists(LOGS_PATH):
-        try:
-            df = pd.read_csv(LOGS_PATH)
-            for col in ['Winning_Team', 'Losing_Team']:
-                if col in df.columns:
-                    series = df[col].dropna().astype(str)
-                    for val in series:
-                        for pick in val.split('|'):
-                            if ':' in pick:
-                                h, r = pick.split(':')
-                                if h == hero_name:
-                                    role_counts[r] = role_counts.get(r, 0) + 1
-        except: pass
+    hero_roles = {r: c for (h, r), c in get_log_role_counts().items() if h == hero_name}
         
-    if role_counts:
+    if hero_roles:
         # Return most frequent role
-        return max(role_counts, key=role_counts.get)
+        return max(hero_roles, key=hero_roles.get)
         
     # 2. Fallback to Base Stats
     # Map ID -> Primary Lane Int -> String
@@ -112,6 +134,7 @@ def predict_hero_role(hero_name):
     except:
         return 'Flex'
 
+@spans.timed()
 def predict_team_roles(hero_names):
     """
     Assigns roles to a list of heroes optimizing for conflict resolution.
@@ -125,20 +148,8 @@ def predict_team_roles(hero_names):
     
     role_map_int = {1: 'Exp', 2: 'Mid', 3: 'Roam', 4: 'Jungle', 5: 'Gold'}
     
-    # Pre-scan logs for frequency "cache"
-    log_freqs = {} # (Hero, Role) -> count
-    if os.path.exists(LOGS_PATH):
-        try:
-            df = pd.read_csv(LOGS_PATH, dtype={'Day': str})
-            for col in ['Winning_Team', 'Losing_Team']:
-                if col in df.columns:
-                    series = df[col].dropna().astype(str)
-                    for val in series:
-                        for pick in val.split('|'):
-                            if ':' in pick:
-                                h, r = pick.split(':')
-                                log_freqs[(h, r)] = log_freqs.get((h, r), 0) + 1
-        except: pass
+    # Role frequencies from the logs: (Hero, Role) -> count
+    log_freqs = get_log_role_counts()
 
     for h in hero_names:
         if not h: continue
@@ -216,7 +227,9 @@ def predict_team_roles(hero_names):
             
     return assignments
 
-def get_recommendations(allies, enemies, banned=None, restrict_pool=False):
+@spans.timed()
+def get_recommendations(allies, enemies, banned=None, restrict_pool=False, context=None):
+    """context: optional (our_team, enemy_team) names; scores then include the Elo matchup odds."""
     # Prepare Data
     if DF_BASE.empty or CLF is None: return []
     if banned is None: banned = []
@@ -225,7 +238,8 @@ def get_recommendations(allies, enemies, banned=None, restrict_pool=False):
     if 'Hero_ID' not in DF_META.columns or 'Hero_ID' not in DF_BASE.columns:
         return []
         
-    df_stats = pd.merge(DF_BASE, DF_META[['Hero_ID', 'Early_Power', 'Mid_Power', 'Late_Power']], on='Hero_ID', how='left')
+    with spans.span('merge'):
+        df_stats = pd.merge(DF_BASE, DF_META[['Hero_ID', 'Early_Power', 'Mid_Power', 'Late_Power']], on='Hero_ID', how='left')
     
     # Mappings
     name_to_id = {name: pid for name, pid in zip(df_stats['Hero_Name'], df_stats['Hero_ID'])}
@@ -241,16 +255,17 @@ def get_recommendations(allies, enemies, banned=None, restrict_pool=False):
     # Real Pool Filtering
     valid_pool = None
     if restrict_pool:
-        real_hero_names = get_real_match_heroes()
+        with spans.span('real_pool'):
+            real_hero_names = get_real_match_heroes()
         valid_pool = set()
         for name in real_hero_names:
             if name in name_to_id:
                 valid_pool.add(name_to_id[name])
     
     # Candidates
-    hero_ids = sorted(df_stats['Hero_ID'].unique())
-    id_to_idx = {hid: i for i, hid in enumerate(hero_ids)}
-    n_heroes = len(hero_ids)
+    with spans.span('build_encoder'):
+        encoder = build_encoder(df_stats)
+    hero_ids = encoder['hero_ids']
     
     candidates = []
     for h in hero_ids:
@@ -260,47 +275,30 @@ def get_recommendations(allies, enemies, banned=None, restrict_pool=False):
         
     if not candidates: return []
     
-    # Prepare Context Vectors
-    ally_vec = np.zeros(n_heroes)
-    enemy_vec = np.zeros(n_heroes)
-    roles_vec = [0.0] * 5
-    
     # Use Predicted Roles for Allies to populate roles_vec
     # This gives the model context on what roles we ALREADY have
-    for name in allies:
-        predicted_role = predict_hero_role(name)
-        if predicted_role in lane_int_map:
-            l_idx = lane_int_map[predicted_role] - 1
-            roles_vec[l_idx] += 1.0
-
-    # Populate One-Hot Vectors
-    for h in ally_ids:
-        if h in id_to_idx: ally_vec[id_to_idx[h]] = 1
-            
-    for h in enemy_ids:
-        if h in id_to_idx: enemy_vec[id_to_idx[h]] = 1
-        
+    roles_vec = [0.0] * 5
+    with spans.span('ally_roles'):
+        for name in allies:
+            predicted_role = predict_hero_role(name)
+            if predicted_role in lane_int_map:
+                l_idx = lane_int_map[predicted_role] - 1
+                roles_vec[l_idx] += 1.0
+
     # Feature Map
-    stat_cols = ['Primary_Lane', 'Damage_Type', 'Hard_CC_Count', 'Flex_Pick_Score', 'Escape_Reliability', 
-                 'Difficulty', 'Economy_Dependency', 'Early_Power', 'Mid_Power', 'Late_Power']
-    stats_map = df_stats.set_index('Hero_ID')[stat_cols].to_dict('index')
-    
-    X_pred = []
-    valid_cands = []
-    
-    for cid in candidates:
-        stats = stats_map.get(cid)
-        if not stats: continue
+    with spans.span('stats_map'):
+        stats_map = df_stats.set_index('Hero_ID')[STAT_COLS].to_dict('index')
+    valid_cands = [cid for cid in candidates if cid in stats_map]
         
-        cand_vec = [stats[c] for c in stat_cols]
-        full_vec = np.concatenate([ally_vec, enemy_vec, roles_vec, cand_vec])
-        X_pred.append(full_vec)
-        valid_cands.append(cid)
-        
-    if not X_pred: return []
+    if not valid_cands: return []
     
-    # Predict
-    probs = CLF.predict_proba(X_pred)[:, 1]
+    # Predict (one batched call over all candidates)
+    probs = score_candidates(CLF, encoder, ally_ids, enemy_ids, valid_cands, role_counts=roles_vec)
+    if context:
+        with spans.span('team_ratings'):
+            state = get_team_ratings()
+        team, opponent = context
+        probs = team_ratings.adjust_for_opponent(probs, team_ratings.team_rating(state, team), team_ratings.team_rating(state, opponent))
     
     # Result Format
     results = []
@@ -360,6 +358,7 @@ def swap_teams():
     st.session_state['input_loser'] = w
 
 # --- UI COMPONENTS ---
+@spans.timed()
 def render_logger():
     st.header("📝 Match Logger")
     roles = ['Exp', 'Jungle', 'Mid', 'Roam', 'Gold']
@@ -392,8 +391,16 @@ def render_logger():
             day = st.text_input("Day (e.g. Day 1)")
             
         # Preview Next Game Number
-        next_game_val = calculate_next_game_number(st.session_state.input_winner, st.session_state.input_loser)
+        with spans.span('next_game_number'):
+            next_game_val = calculate_next_game_number(st.session_state.input_winner, st.session_state.input_loser)
         st.caption(f"🎮 Next Game: **{next_game_val}** (Auto-Detected)")
+        if st.session_state.input_winner and st.session_state.input_loser:
+            with spans.span('team_ratings'):
+                state = get_team_ratings()
+            r_w = team_ratings.team_rating(state, st.session_state.input_winner)
+            r_l = team_ratings.team_rating(state, st.session_state.input_loser)
+            st.caption(f"📈 Elo: {st.session_state.input_winner} **{r_w:.0f}** vs {st.session_state.input_loser} **{r_l:.0f}** "
+                       f"(expected win {float(team_ratings.expected_score(r_w, r_l)) * 100:.0f}%)")
             
         duration = st.text_input("Duration (mm:ss)", value="15:00")
 
@@ -418,7 +425,8 @@ def render_logger():
         # ID Logic
         if os.path.exists(LOGS_PATH):
             try:
-                df = pd.read_csv(LOGS_PATH)
+                with spans.span('read_logs'):
+                    df = pd.read_csv(LOGS_PATH)
                 next_id = df['Match_ID'].max() + 1 if not df.empty else 1
             except: next_id = 1
         else: next_id = 1
@@ -457,7 +465,12 @@ def render_logger():
                 }
                 
                 df_updated = pd.concat([df_current, pd.DataFrame([new_entry])], ignore_index=True)
+                # Stores in sync with the file as it was before this write only need the new match
+                previous_hash = source_hash(LOGS_PATH) if os.path.exists(LOGS_PATH) else None
                 df_updated.to_csv(LOGS_PATH, index=False)
+                # Counters next to the log: only this match's picks are added
+                record_match(new_entry, df_updated, LOGS_PATH, previous_hash=previous_hash)
+                team_ratings.record_match(new_entry, df_updated, LOGS_PATH, previous_hash=previous_hash)
                 st.toast(f"✅ Match {new_id} Saved Successfully!")
                 st.rerun()
 
@@ -465,46 +478,83 @@ def render_logger():
     st.divider()
     st.subheader("📊 Match History")
     if os.path.exists(LOGS_PATH):
-        df_logs = pd.read_csv(LOGS_PATH, dtype={'Day': str}).fillna('')
+        with spans.span('read_logs'):
+            df_logs = pd.read_csv(LOGS_PATH, dtype={'Day': str}).fillna('')
+
+        with st.expander("📈 Hero Win Rates (95% CI)"):
+            stages = sorted(s for s in df_logs.get('Stage', pd.Series(dtype=str)).unique() if s)
+            c_stage, c_min = st.columns(2)
+            stage = c_stage.selectbox("Stage", ["All"] + stages, key="ci_stage")
+            min_picks = c_min.number_input("Min Picks", min_value=1, value=3, key="ci_min_picks")
+            with spans.span('rate_intervals'):
+                df_ci = get_hero_rate_intervals(os.path.getmtime(LOGS_PATH), None if stage == "All" else stage)
+            df_ci = df_ci[df_ci['picks'] >= min_picks].sort_values('win_rate', ascending=False, kind='stable')
+            st.dataframe(pd.DataFrame({
+                'Hero': df_ci['hero'],
+                'Picks': df_ci['picks'],
+                'Win Rate (Wilson)': [format_rate(*v) for v in df_ci[['win_rate', 'win_rate_wilson_lo', 'win_rate_wilson_hi']].to_numpy()],
+                'Win Rate (Bootstrap)': [format_rate(*v) for v in df_ci[['win_rate', 'win_rate_boot_lo', 'win_rate_boot_hi']].to_numpy()]
+            }), hide_index=True, width='stretch')
+            st.caption("Intervals cover the true win rate 95% of the time; wide ones mean too few games to tell.")
+
+        with st.expander("🏅 Team Ratings"), spans.span('team_ratings'):
+            state = get_team_ratings()
+            matches, _ = load_tables(LOGS_PATH)
+            df_elo = team_ratings.elo_table(state)
+            df_stage = team_ratings.ratings_by_stage(matches).round(0)
+            df_stage.columns = [f"BT {c}" for c in df_stage.columns]
+            st.dataframe(df_elo.round({'elo': 0}).merge(df_stage, left_on='team', right_index=True, how='left'),
+                         hide_index=True, width='stretch')
+            st.caption("Elo updates after every logged match; Bradley-Terry (BT) is refitted over all games, overall and per stage.")
+
+            df_hist = team_ratings.rating_history(state)
+            followed = st.multiselect("Rating History", df_elo['team'].tolist(), default=df_elo['team'].head(4).tolist(), key="rating_teams")
+            if followed and not df_hist.empty:
+                df_hist = df_hist.reset_index(names='order')
+                # Each team's rating carried forward across matches it did not play
+                chart = df_hist.pivot_table(index='order', columns='team', values='rating').ffill()
+                st.line_chart(chart[[t for t in followed if t in chart.columns]])
+
         df_logs = df_logs.sort_values('Match_ID', ascending=False)
-        for index, row in df_logs.iterrows():
-            # Build Metadata String
-            meta_parts = []
-            day_val = str(row.get('Day', '')).strip()
-            if day_val and day_val.lower() != 'nan':
-                if day_val.isdigit():
-                    meta_parts.append(f"Day {day_val}")
-                else:
-                    meta_parts.append(day_val)
+        with spans.span('history_html', matches=len(df_logs)):
+            for index, row in df_logs.iterrows():
+                # Build Metadata String
+                meta_parts = []
+                day_val = str(row.get('Day', '')).strip()
+                if day_val and day_val.lower() != 'nan':
+                    if day_val.isdigit():
+                        meta_parts.append(f"Day {day_val}")
+                    else:
+                        meta_parts.append(day_val)
             
-            game_val = str(row.get('Game', '')).strip()
-            if game_val and game_val.lower() != 'nan':
-                 meta_parts.append(f"Game {game_val}" if str(game_val).isdigit() else game_val)
+                game_val = str(row.get('Game', '')).strip()
+                if game_val and game_val.lower() != 'nan':
+                     meta_parts.append(f"Game {game_val}" if str(game_val).isdigit() else game_val)
             
-            meta_parts.append(f"⏱️ {row['Game_Duration']}")
-            meta_str = " | ".join(meta_parts)
-
-            with st.container():
-                st.markdown(f"""
-                <div style="background-color: #1E1E1E; padding: 15px; border-radius: 10px; margin-bottom: 10px; border: 1px solid #333;">
-                    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
-                        <h4 style="margin: 0;">Match #{row['Match_ID']} <span style="font-size: 0.8em; color: #888;">({row.get('Stage', 'Swiss Stage')})</span></h4>
-                        <span style="background-color: #333; padding: 5px 10px; border-radius: 5px; font-size: 0.8em;">
-                            {meta_str}
-                        </span>
-                    </div>
-                    <div style="display: flex; justify-content: space-between;">
-                        <div style="width: 48%; color: #4CAF50;">
-                            <strong>🏆 WIN: {row.get('Winner_Name', 'Unknown')}</strong><br>
-                            {render_team_html(row['Winning_Team'], "left")}
+                meta_parts.append(f"⏱️ {row['Game_Duration']}")
+                meta_str = " | ".join(meta_parts)
+
+                with st.container():
+                    st.markdown(f"""
+                    <div style="background-color: #1E1E1E; padding: 15px; border-radius: 10px; margin-bottom: 10px; border: 1px solid #333;">
+                        <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
+                            <h4 style="margin: 0;">Match #{row['Match_ID']} <span style="font-size: 0.8em; color: #888;">({row.get('Stage', 'Swiss Stage')})</span></h4>
+                            <span style="background-color: #333; padding: 5px 10px; border-radius: 5px; font-size: 0.8em;">
+                                {meta_str}
+                            </span>
                         </div>
-                        <div style="width: 48%; color: #F44336; text-align: right;">
-                            <strong>❌ LOSE: {row.get('Loser_Name', 'Unknown')}</strong><br>
-                            {render_team_html(row['Losing_Team'], "right")}
+                        <div style="display: flex; justify-content: space-between;">
+                            <div style="width: 48%; color: #4CAF50;">
+                                <strong>🏆 WIN: {row.get('Winner_Name', 'Unknown')}</strong><br>
+                                {render_team_html(row['Winning_Team'], "left")}
+                            </div>
+                            <div style="width: 48%; color: #F44336; text-align: right;">
+                                <strong>❌ LOSE: {row.get('Loser_Name', 'Unknown')}</strong><br>
+                                {render_team_html(row['Losing_Team'], "right")}
+                            </div>
                         </div>
                     </div>
-                </div>
-                """, unsafe_allow_html=True)
+                    """, unsafe_allow_html=True)
     else:
         st.info("No logs found yet.")
 
@@ -531,6 +581,7 @@ def clear_draft_state():
     for i in range(5):
         if f"ally_p_{i}" in st.session_state: st.session_state[f"ally_p_{i}"] = ""
 
+@spans.timed()
 def render_recommender():
     c_head, c_btn = st.columns([6, 1])
     with c_head:
@@ -623,10 +674,22 @@ def render_recommender():
     else:
         restrict_pool = False
 
+    # Optional opponent-strength context (team Elo from the logs)
+    context = None
+    with spans.span('team_ratings'):
+        rated_teams = team_ratings.elo_table(get_team_ratings())['team'].tolist()
+    if rated_teams:
+        c_team, c_opp = st.columns(2)
+        our_team = c_team.selectbox("Our Team (optional)", [""] + rated_teams, key="ctx_team")
+        opp_team = c_opp.selectbox("Enemy Team (optional)", [""] + rated_teams, key="ctx_opponent")
+        if our_team and opp_team:
+            context = (our_team, opp_team)
+            st.caption("Scores include the teams' Elo matchup odds.")
+
     # Real-time Analysis
     if enemies or allies or banned: # trigger if banned are set too? meaningful context usually needs picks, but ok.
         with st.spinner("Analyzing Draft..."):
-            recs = get_recommendations(allies, enemies, banned, restrict_pool)
+            recs = get_recommendations(allies, enemies, banned, restrict_pool, context)
             if recs:
                 st.subheader("✨ Best Pick per Role")
                 cols = st.columns(5)
@@ -644,48 +707,71 @@ def render_recommender():
                         if best_by_role[role] is None:
                             best_by_role[role] = r
 
-                for i, target in enumerate(display_roles):
-                    with cols[i]:
-                        is_filled = target in filled_roles
-                        header_text = f"{target} (Alt)" if is_filled else target
-                        header_color = "#888" if is_filled else "#EEE"
+                with spans.span('render_cards'):
+                    for i, target in enumerate(display_roles):
+                        with cols[i]:
+                            is_filled = target in filled_roles
+                            header_text = f"{target} (Alt)" if is_filled else target
+                            header_color = "#888" if is_filled else "#EEE"
                         
-                        st.markdown(f"<h5 style='text-align: center; color: {header_color};'>{header_text}</h5>", unsafe_allow_html=True)
-                        hero_data = best_by_role[target]
+                            st.markdown(f"<h5 style='text-align: center; color: {header_color};'>{header_text}</h5>", unsafe_allow_html=True)
+                            hero_data = best_by_role[target]
                         
-                        if hero_data:
-                            name, score, role, icon = hero_data
-                            border_color = "#888" if is_filled else "#FF4B4B" 
-                            opacity = "0.7" if is_filled else "1.0"
+                            if hero_data:
+                                name, score, role, icon = hero_data
+                                border_color = "#888" if is_filled else "#FF4B4B" 
+                                opacity = "0.7" if is_filled else "1.0"
                             
-                            st.markdown(f"""
-                            <div style="text-align: center; background-color: #262730; padding: 10px; border-radius: 10px; border: 1px solid #444; opacity: {opacity};">
-                                <img src="{icon}" style="width: 64px; height: 64px; border-radius: 50%; border: 2px solid {border_color}; margin-bottom: 5px;">
-                                <h5 style="margin: 0;">{name}</h5>
-                                <h4 style="color: #4CAF50; margin: 5px 0 0 0;">{(score*100):.1f}%</h4>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                             st.markdown(f"""
-                            <div style="text-align: center; padding: 20px; color: #555;">
-                                <i>No Rec</i>
-                            </div>
-                            """, unsafe_allow_html=True)
+                                st.markdown(f"""
+                                <div style="text-align: center; background-color: #262730; padding: 10px; border-radius: 10px; border: 1px solid #444; opacity: {opacity};">
+                                    <img src="{icon}" style="width: 64px; height: 64px; border-radius: 50%; border: 2px solid {border_color}; margin-bottom: 5px;">
+                                    <h5 style="margin: 0;">{name}</h5>
+                                    <h4 style="color: #4CAF50; margin: 5px 0 0 0;">{(score*100):.1f}%</h4>
+                                </div>
+                                """, unsafe_allow_html=True)
+                            else:
+                                 st.markdown(f"""
+                                <div style="text-align: center; padding: 20px; color: #555;">
+                                    <i>No Rec</i>
+                                </div>
+                                """, unsafe_allow_html=True)
             else:
                 st.info("Select heroes to get recommendations.")
     else:
         st.info("Start by selecting Enemy or Allied heroes.")
 
+def render_profile(trace):
+    """Sidebar breakdown of the spans recorded during this rerun."""
+    with st.sidebar.expander("⏱️ Rerun Profile", expanded=True):
+        df = spans.summary(trace)
+        if df.empty:
+            st.caption("No spans recorded.")
+            return
+        st.dataframe(df.round({'total_ms': 2, 'self_ms': 2, 'mean_ms': 2}), hide_index=True, width='stretch',
+                     column_config={'share': st.column_config.ProgressColumn("Share", format="percent", min_value=0.0, max_value=1.0)})
+        st.caption("Self time excludes nested spans. Cached loaders only show up when they miss.")
+        st.download_button("📥 Chrome Trace", json.dumps(spans.chrome_trace(trace)), file_name="draftnexus_trace.json",
+                           mime="application/json", help="Open in chrome://tracing or ui.perfetto.dev")
+
 # --- MAIN APP ---
 def main():
     st.sidebar.title("DraftNexus AI")
     # Swap order to make Recommender default
     mode = st.sidebar.radio("Navigation", ["Draft Recommender", "Match Logger"])
-    
-    if mode == "Match Logger":
-        render_logger()
-    else:
-        render_recommender()
+    profile = st.sidebar.toggle("⏱️ Profile Reruns", key="profile_reruns", help="Time the hot paths of every rerun")
+
+    trace = spans.start() if profile else None
+    try:
+        if mode == "Match Logger":
+            render_logger()
+        else:
+            render_recommender()
+    finally:
+        # Always stop, even when a rerun is triggered mid-render
+        if profile:
+            spans.stop()
+    if profile:
+        render_profile(trace)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+import argparse
+import joblib
+from scipy.stats import spearmanr
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import build_encoder, encode_flat, encode_candidates
+from scripts.train_draft_model import MODEL_OUTPUT_PATH, load_data, featurize
+from scripts.generate_training_data_new import random_draft_states
+from scripts.model_registry import MODELS_DIR, build_draft_suite, measure_latency, register_model
+
+# Student candidates: much smaller than the 100-tree depth-15 teacher.
+# All must convert with convert_model_to_onnx.py (the HistGradientBoosting converter fails on this skl2onnx).
+STUDENTS = {
+    'rf_small': lambda: RandomForestClassifier(n_estimators=20, max_depth=10, min_samples_leaf=5, random_state=42),
+    'rf_tiny': lambda: RandomForestClassifier(n_estimators=8, max_depth=8, min_samples_leaf=10, random_state=42),
+    'logreg': lambda: make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000))
+}
+
+TOP_K = 5
+
+def label_with_teacher(teacher, encoder, n_states, seed=42):
+    """Soft labels: the teacher's P(Good Pick) on random draft states."""
+    ally_rows, ally_ids, enemy_rows, enemy_ids, cand_ids = random_draft_states(encoder['hero_ids'], n_states, seed=seed)
+    X = encode_flat(encoder, n_states, ally_rows, ally_ids, enemy_rows, enemy_ids, cand_ids, dtype=np.float32)
+    return X, teacher.predict_proba(X)[:, 1]
+
+def fit_student(name, X, p_teacher):
+    """
+    Fits a classifier to soft targets: every state appears once as a positive weighted by p
+    and once as a negative weighted by 1 - p, so predict_proba regresses onto the teacher.
+    The student stays a plain classifier and exports through convert_model_to_onnx.py.
+    """
+    X_soft = np.vstack([X, X])
+    y_soft = np.concatenate([np.ones(len(X), dtype=int), np.zeros(len(X), dtype=int)])
+    w_soft = np.concatenate([p_teacher, 1.0 - p_teacher])
+
+    clf = STUDENTS[name]()
+    if name == 'logreg':
+        clf.fit(X_soft, y_soft, logisticregression__sample_weight=w_soft)
+    else:
+        clf.fit(X_soft, y_soft, sample_weight=w_soft)
+    return clf
+
+def eval_contexts(encoder, n_drafts, seed):
+    """Held-out draft contexts, each scored against every untaken hero."""
+    ally_rows, ally_ids, enemy_rows, enemy_ids, _ = random_draft_states(encoder['hero_ids'], n_drafts, seed=seed)
+    batches = []
+    for r in range(n_drafts):
+        allies, enemies = ally_ids[ally_rows == r], enemy_ids[enemy_rows == r]
+        taken = set(allies) | set(enemies)
+        candidates = [h for h in encoder['hero_ids'] if h not in taken]
+        batches.append(encode_candidates(encoder, allies, enemies, candidates))
+    return batches
+
+def fidelity(teacher, student, batches, k=TOP_K):
+    """Mean Spearman rank correlation over all candidates, top-k overlap and mean abs prob error."""
+    rhos, overlaps, errors = [], [], []
+    for X in batches:
+        p_t = teacher.predict_proba(X)[:, 1]
+        p_s = student.predict_proba(X)[:, 1]
+        rhos.append(spearmanr(p_t, p_s).statistic)
+        top_t = set(np.argsort(-p_t)[:k])
+        top_s = set(np.argsort(-p_s)[:k])
+        overlaps.append(len(top_t & top_s) / k)
+        errors.append(np.abs(p_t - p_s).mean())
+    return float(np.nanmean(rhos)), float(np.mean(overlaps)), float(np.mean(errors))
+
+def distill(students=None, n_states=50000, n_eval_drafts=200, teacher_path=MODEL_OUTPUT_PATH, register=True):
+    if not os.path.exists(teacher_path):
+        raise FileNotFoundError(f"Teacher model not found at {teacher_path}")
+
+    df_train, df_stats = load_data()
+    encoder = build_encoder(df_stats)
+    teacher = joblib.load(teacher_path)
+    suite = build_draft_suite(df_stats)
+
+    print(f"Labeling {n_states} synthetic draft states with the teacher...")
+    X, p_teacher = label_with_teacher(teacher, encoder, n_states)
+
+    # Same split as train_model: students only see its training rows, so the held-out
+    # accuracy is comparable to the registry entries
+    X_real, y, w, _ = featurize(df_train, df_stats)
+    X_real_train, X_test, _, y_test, _, _ = train_test_split(np.asarray(X_real), y, w, test_size=0.2, random_state=42)
+
+    # The teacher's own training rows anchor the student on realistic drafts
+    X = np.vstack([X, X_real_train])
+    p_teacher = np.concatenate([p_teacher, teacher.predict_proba(X_real_train)[:, 1]])
+
+    batches = eval_contexts(encoder, n_eval_drafts, seed=7)
+    t_p50, t_p99 = measure_latency(teacher, suite)
+
+    rows = [{
+        'Model': 'teacher',
+        'Size (MB)': os.path.getsize(teacher_path) / 1e6,
+        'p50 (ms)': t_p50,
+        'p99 (ms)': t_p99,
+        'Accuracy': accuracy_score(y_test, teacher.predict(X_test)),
+        'Spearman': 1.0,
+        f'Top-{TOP_K} Overlap': 1.0,
+        'Mean |dP|': 0.0
+    }]
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    for name in students or list(STUDENTS):
+        print(f"Distilling student '{name}'...")
+        start = time.perf_counter()
+        student = fit_student(name, X, p_teacher)
+        fit_s = time.perf_counter() - start
+
+        path = os.path.join(MODELS_DIR, f"draft_model_student_{name}.pkl")
+        joblib.dump(student, path)
+
+        rho, overlap, mae = fidelity(teacher, student, batches)
+        acc = accuracy_score(y_test, student.predict(X_test))
+        p50, p99 = measure_latency(student, suite)
+        rows.append({
+            'Model': f"student_{name}",
+            'Size (MB)': os.path.getsize(path) / 1e6,
+            'p50 (ms)': p50,
+            'p99 (ms)': p99,
+            'Accuracy': acc,
+            'Spearman': rho,
+            f'Top-{TOP_K} Overlap': overlap,
+            'Mean |dP|': mae
+        })
+
+        if register:
+            register_model(f"student_{name}", path, acc, df_stats, extra={
+                'fit_s': fit_s,
+                'teacher_spearman': rho,
+                'teacher_top_k_overlap': overlap
+            })
+
+    df_report = pd.DataFrame(rows)
+    print(f"\n--- Distillation Report ({n_eval_drafts} held-out drafts, all candidates each) ---")
+    print(df_report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print("\nExport a student with: python scripts/convert_model_to_onnx.py --model data/models/draft_model_student_<name>.pkl")
+    return df_report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill the forest into compact student models.")
+    parser.add_argument('students', nargs='*', help=f"Students to train: {', '.join(STUDENTS)} (default: all)")
+    parser.add_argument('--n-states', type=int, default=50000, help="Synthetic draft states labeled by the teacher")
+    parser.add_argument('--eval-drafts', type=int, default=200)
+    parser.add_argument('--teacher', default=MODEL_OUTPUT_PATH)
+    parser.add_argument('--no-register', action='store_true', help="Do not add students to the model registry")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.students if s not in STUDENTS]
+    if unknown:
+        parser.error(f"Unknown student(s): {', '.join(unknown)}")
+
+    distill(args.students or None, n_states=args.n_states, n_eval_drafts=args.eval_drafts,
+            teacher_path=args.teacher, register=not args.no_register)
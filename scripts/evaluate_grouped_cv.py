@@ -0,0 +1,167 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+import argparse
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.generate_training_data_new import load_data as load_generator_data, parse_real_logs
+from scripts.train_draft_model import load_data, featurize
+from scripts.compare_training_runs import LOGS_PATH, build_shared_synthetic
+
+# Paths
+REPORT_PATH = 'grouped_cv_report.md'
+
+# CLI name -> group column written by parse_real_logs
+GROUP_COLUMNS = {
+    'day': 'day',
+    'stage': 'stage',
+    'match': 'match_id'
+}
+
+def build_dataset(seed=42):
+    """
+    Real samples (with their Match_ID/Stage/Day/Game) followed by the shared synthetic base,
+    featurized into one matrix (joblib memory-maps it for the workers). Returns (X, y, w, df_real, n_real).
+    """
+    _, df_stats = load_data(pd.DataFrame())
+    name_to_id, _, id_to_meta, _, _ = load_generator_data()
+    df_real = pd.DataFrame(parse_real_logs(name_to_id, id_to_meta, df_override=pd.read_csv(LOGS_PATH)))
+
+    X_real, y_real, w_real, _ = featurize(df_real, df_stats)
+    X_syn, y_syn, w_syn, _ = build_shared_synthetic(df_stats, seed=seed)
+
+    X = np.vstack([X_real, X_syn])
+    y = np.concatenate([y_real, y_syn])
+    w = np.concatenate([w_real, w_syn])
+    return X, y, w, df_real, len(df_real)
+
+def group_label(value):
+    """Readable fold label: Day 3.0 -> '3', missing -> 'Unknown'."""
+    if pd.isna(value):
+        return 'Unknown'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def assign_folds(df_real, n_total, group_by, n_splits=None, seed=42):
+    """
+    Fold id per row. Real rows are held out by group (one group per fold, or groups bucketed
+    into n_splits folds); synthetic rows are spread uniformly over the folds so every fold
+    also tests on both labels. Returns (fold_ids, fold_names).
+    """
+    rng = np.random.default_rng(seed)
+    labels = df_real[GROUP_COLUMNS[group_by]].map(group_label).to_numpy()
+    groups = sorted(set(labels))
+
+    if n_splits is not None and n_splits < len(groups):
+        # GroupKFold-style buckets of whole groups
+        order = rng.permutation(len(groups))
+        bucket = {groups[g]: i % n_splits for i, g in enumerate(order)}
+        fold_names = [f"{group_by} fold {k + 1}" for k in range(n_splits)]
+    else:
+        bucket = {g: i for i, g in enumerate(groups)}
+        fold_names = [f"{group_by}={g}" for g in groups]
+
+    fold_ids = np.empty(n_total, dtype=np.int64)
+    fold_ids[:len(labels)] = [bucket[g] for g in labels]
+    fold_ids[len(labels):] = rng.integers(len(fold_names), size=n_total - len(labels))
+    return fold_ids, fold_names
+
+def run_fold(name, X, y, w, train_idx, test_idx, n_real):
+    """Worker: fits the production forest on one fold. X/y/w are memory-mapped and shared."""
+    clf = RandomForestClassifier(n_estimators=100, max_depth=15, class_weight='balanced', random_state=42, n_jobs=1)
+    start = time.perf_counter()
+    clf.fit(X[train_idx], y[train_idx], sample_weight=w[train_idx])
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proba = clf.predict_proba(X[test_idx])[:, 1]
+    predict_s = time.perf_counter() - start
+
+    y_test = y[test_idx]
+    y_pred = (proba >= 0.5).astype(int)
+    is_real = test_idx < n_real
+
+    return {
+        'Fold': name,
+        'Test Real': int(is_real.sum()),
+        'Test Synthetic': int((~is_real).sum()),
+        'Accuracy': accuracy_score(y_test, y_pred),
+        # Real rows are all winning picks: recall = share the model calls "Good Pick"
+        'Real Recall': float(y_pred[is_real].mean()) if is_real.any() else np.nan,
+        'Real Mean P': float(proba[is_real].mean()) if is_real.any() else np.nan,
+        'Synthetic Acc': accuracy_score(y_test[~is_real], y_pred[~is_real]) if (~is_real).any() else np.nan,
+        'Fit (s)': fit_s,
+        'Predict (s)': predict_s
+    }
+
+def grouped_cv(group_by='day', n_splits=None, n_jobs=-1, seed=42, include_random=True):
+    X, y, w, df_real, n_real = build_dataset(seed=seed)
+    fold_ids, fold_names = assign_folds(df_real, len(y), group_by, n_splits=n_splits, seed=seed)
+
+    jobs = [(name, np.flatnonzero(fold_ids != k), np.flatnonzero(fold_ids == k))
+            for k, name in enumerate(fold_names)]
+
+    if include_random:
+        # Reference: train_model's random 80/20 split (same train_test_split call, applied to these rows),
+        # which leaks prefixes of the same match into test
+        train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+        jobs.append(('random 80/20 (leaky)', np.sort(train_idx), np.sort(test_idx)))
+
+    print(f"Running {len(jobs)} folds in parallel ({n_real} real + {len(y) - n_real} synthetic rows)...")
+    start = time.perf_counter()
+    rows = Parallel(n_jobs=n_jobs)(
+        delayed(run_fold)(name, X, y, w, tr, te, n_real) for name, tr, te in jobs
+    )
+    wall_s = time.perf_counter() - start
+    return pd.DataFrame(rows), wall_s
+
+def summarize(df_folds):
+    """Mean and std over the grouped folds (the random reference row excluded)."""
+    grouped = df_folds[~df_folds['Fold'].str.startswith('random')]
+    metrics = ['Accuracy', 'Real Recall', 'Real Mean P', 'Synthetic Acc']
+    return pd.DataFrame({'Mean': grouped[metrics].mean(), 'Std': grouped[metrics].std()})
+
+def write_report(df_folds, df_summary, group_by, wall_s, path=REPORT_PATH):
+    with open(path, 'w') as f:
+        f.write("# Grouped Cross-Validation Report\n")
+        f.write(f"Leave-one-{group_by}-out: real matches are held out by `{GROUP_COLUMNS[group_by]}`, ")
+        f.write("synthetic rows are spread over the folds. Real rows are winning picks only, ")
+        f.write("so `Real Recall` is the share of held-out picks the model calls a good pick.\n\n")
+
+        f.write("## Summary (grouped folds)\n")
+        f.write(df_summary.to_markdown(floatfmt=".4f"))
+        f.write("\n\n")
+
+        f.write("## Per Fold\n")
+        f.write(df_folds.to_markdown(index=False, floatfmt=".4f"))
+        f.write("\n\n")
+        f.write(f"Wall time: {wall_s:.1f} s for {len(df_folds)} fits (sum of fit times {df_folds['Fit (s)'].sum():.1f} s).\n")
+
+    print(f"Report saved to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leave-one-group-out evaluation of the draft forest.")
+    parser.add_argument('--group-by', choices=sorted(GROUP_COLUMNS), default='day')
+    parser.add_argument('--n-splits', type=int, default=None,
+                        help="Bucket groups into this many folds (default: one fold per group)")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-random-baseline', action='store_true', help="Skip the leaky random-split reference fold")
+    args = parser.parse_args()
+
+    df_folds, wall_s = grouped_cv(args.group_by, n_splits=args.n_splits, n_jobs=args.n_jobs,
+                                  seed=args.seed, include_random=not args.no_random_baseline)
+    df_summary = summarize(df_folds)
+
+    print(df_folds.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(df_summary.to_string(float_format=lambda v: f"{v:.4f}"))
+    write_report(df_folds, df_summary, args.group_by, wall_s)
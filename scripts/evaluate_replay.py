@@ -0,0 +1,249 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+import joblib
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import build_encoder, decode_id_lists, encode_flat
+from scripts.train_draft_model import last_seen_match_id, load_data
+from scripts.generate_training_data_new import load_data as load_generator_data, parse_real_logs
+from scripts.model_registry import load_model, load_registry
+from scripts.model_bundle import MANIFEST_NAME, load_bundle
+from scripts.match_analytics import LOGS_PATH
+
+HIT_KS = [1, 3, 5]
+
+# Draft steps scored per predict call (x ~130 candidates each); bounds the feature matrix memory
+STEPS_PER_BATCH = 64
+
+def replay_steps(df_logs, name_to_id, id_to_meta):
+    """
+    One row per replayed pick, from the same prefixes the trainer sees (parse_real_logs): the winners'
+    i-th pick with allies = their first i picks and enemies = all five losers.
+    Adds the logged role and the pick number (1-5) of every step.
+    """
+    df_steps = pd.DataFrame(parse_real_logs(name_to_id, id_to_meta, df_override=df_logs))
+    if df_steps.empty:
+        return df_steps
+
+    # parse_real_logs only keeps full 5v5 drafts, so the i-th step of a match is the i-th team entry
+    df_steps['pick'] = df_steps.groupby('match_id', sort=False).cumcount() + 1
+    roles = {}
+    for match_id, team in zip(df_logs['Match_ID'], df_logs['Winning_Team'].astype(str)):
+        roles[match_id] = [p.partition(':')[2].strip() or 'Unknown' for p in team.split('|')]
+    df_steps['role'] = [roles.get(m, [])[p - 1] if p <= len(roles.get(m, [])) else 'Unknown'
+                        for m, p in zip(df_steps['match_id'], df_steps['pick'])]
+    return df_steps.reset_index(drop=True)
+
+def _expand(pair_steps, pair_ids, row_start, n_cands):
+    """Repeats every (step, hero) pair onto all of that step's candidate rows."""
+    reps = n_cands[pair_steps]
+    total = int(reps.sum())
+    within = np.arange(total) - np.repeat(np.cumsum(reps) - reps, reps)
+    return np.repeat(row_start[pair_steps], reps) + within, np.repeat(pair_ids, reps)
+
+def candidate_rows(encoder, ally_lists, enemy_lists, pool=None):
+    """
+    Flattens every step's candidate set (all heroes not already drafted, optionally limited to pool)
+    into one feature matrix layout. Returns (step_of_row, cand_col, ally pairs, enemy pairs) with
+    rows grouped by step and candidates in hero-ID order (the recommenders' tie order).
+    """
+    n_steps = len(ally_lists)
+    id_to_idx = encoder['id_to_idx']
+    a_steps, a_ids, _ = decode_id_lists(ally_lists)
+    e_steps, e_ids, _ = decode_id_lists(enemy_lists)
+
+    available = np.ones((n_steps, encoder['n_heroes']), dtype=bool)
+    if pool is not None:
+        available &= np.isin(encoder['hero_ids'], list(pool))[None, :]
+    for steps, ids in [(a_steps, a_ids), (e_steps, e_ids)]:
+        known = (ids >= 0) & (ids < len(id_to_idx)) & (id_to_idx[np.clip(ids, 0, len(id_to_idx) - 1)] >= 0)
+        available[steps[known], id_to_idx[ids[known]]] = False
+
+    step_of_row, cand_col = np.nonzero(available)
+    n_cands = available.sum(axis=1)
+    row_start = np.concatenate([[0], np.cumsum(n_cands)[:-1]])
+    return step_of_row, cand_col, _expand(a_steps, a_ids, row_start, n_cands), _expand(e_steps, e_ids, row_start, n_cands)
+
+def rank_picks(scores, step_of_row, cand_col, true_col, n_steps):
+    """
+    Rank of the real pick among its step's candidates, as a stable descending sort would list it:
+    1 + candidates scoring higher + equal-scoring candidates earlier in hero-ID order.
+    Steps whose real pick was not a candidate get rank 0.
+    """
+    is_true = cand_col == true_col[step_of_row]
+    true_score = np.full(n_steps, np.nan)
+    true_score[step_of_row[is_true]] = scores[is_true]
+
+    ts = true_score[step_of_row]
+    ahead = (scores > ts) | ((scores == ts) & (cand_col < true_col[step_of_row]))
+    ranks = np.bincount(step_of_row, weights=ahead, minlength=n_steps).astype(int) + 1
+    ranks[np.isnan(true_score)] = 0
+    return ranks
+
+def model_scorer(model=None, df_stats=None):
+    """
+    predict(X) -> P(good pick) for any saved model: None (default bundle/pkl), a registry name,
+    a bundle directory, a .pkl/.joblib file or a feature-matrix .onnx export.
+    """
+    if model is None or model in load_registry():
+        clf = load_model(name=model, df_stats=df_stats)
+        return lambda X: clf.predict_proba(X)[:, 1]
+    if os.path.isdir(model) and os.path.exists(os.path.join(model, MANIFEST_NAME)):
+        clf, _ = load_bundle(model, df_stats)
+        return lambda X: clf.predict_proba(X)[:, 1]
+    if model.endswith('.onnx'):
+        import onnxruntime as ort
+        from scripts.compare_pkl_onnx import onnx_probabilities
+        sess = ort.InferenceSession(model, providers=['CPUExecutionProvider'])
+        if len(sess.get_inputs()[0].shape) != 2 or 'float' not in sess.get_inputs()[0].type:
+            raise ValueError(f"{model} does not take a feature matrix (hero-ID exports are not supported).")
+        return lambda X: onnx_probabilities(sess, np.ascontiguousarray(X, dtype=np.float32))
+    if os.path.exists(model):
+        clf = joblib.load(model)
+        return lambda X: clf.predict_proba(X)[:, 1]
+    raise ValueError(f"Unknown model '{model}' (registry name, bundle directory, .pkl or .onnx path).")
+
+def evaluate(predict, df_steps, df_stats, pool=None, steps_per_batch=STEPS_PER_BATCH):
+    """
+    Scores every step's candidates (batched over many steps per predict call) and returns df_steps
+    with rank, n_candidates and score_s (scoring time share) columns added.
+    """
+    encoder = build_encoder(df_stats)
+    n_steps = len(df_steps)
+    ranks = np.zeros(n_steps, dtype=int)
+    n_cands = np.zeros(n_steps, dtype=int)
+    score_time = 0.0
+
+    cand_ids = df_steps['candidate_id'].to_numpy(dtype=np.int64)
+    true_col = encoder['id_to_idx'][np.clip(cand_ids, 0, len(encoder['id_to_idx']) - 1)]
+
+    for start in range(0, n_steps, steps_per_batch):
+        batch = slice(start, min(start + steps_per_batch, n_steps))
+        step_of_row, cand_col, (a_rows, a_ids), (e_rows, e_ids) = candidate_rows(
+            encoder, df_steps['ally_ids'].iloc[batch], df_steps['enemy_ids'].iloc[batch], pool)
+
+        X = encode_flat(encoder, len(step_of_row), a_rows, a_ids, e_rows, e_ids,
+                        encoder['hero_ids'][cand_col], dtype=np.float32)
+        t0 = time.perf_counter()
+        scores = np.asarray(predict(X), dtype=np.float64)
+        score_time += time.perf_counter() - t0
+
+        n = batch.stop - batch.start
+        ranks[batch] = rank_picks(scores, step_of_row, cand_col, true_col[batch], n)
+        n_cands[batch] = np.bincount(step_of_row, minlength=n)
+
+    out = df_steps.copy()
+    out['rank'] = ranks
+    out['n_candidates'] = n_cands
+    out.attrs['score_s'] = score_time
+    return out
+
+def summarize(df_ranked, by=None, ks=HIT_KS):
+    """hit@k, MRR and mean rank (over steps whose real pick was a candidate), overall or per `by`."""
+    scored = df_ranked[df_ranked['rank'] > 0].assign(rr=lambda d: 1.0 / d['rank'])
+    for k in ks:
+        scored[f'hit@{k}'] = scored['rank'] <= k
+
+    aggs = {'steps': ('rank', 'size'), **{f'hit@{k}': (f'hit@{k}', 'mean') for k in ks},
+            'mrr': ('rr', 'mean'), 'mean_rank': ('rank', 'mean'), 'candidates': ('n_candidates', 'mean')}
+    if by is None:
+        return scored.assign(all='All').groupby('all').agg(**aggs).reset_index(drop=True)
+    return scored.groupby(by, sort=False).agg(**aggs).reset_index()
+
+def write_report(results, path, since_match_id=None):
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt == 'json':
+        with open(path, 'w') as f:
+            json.dump({name: {k: json.loads(v.to_json(orient='records')) for k, v in tables.items()}
+                       for name, tables in results.items()}, f, indent=2)
+    else:
+        with open(path, 'w') as f:
+            f.write("# Replay Evaluation\n\n")
+            f.write("Every logged winning pick replayed with the draft so far (allies = earlier winner picks, "
+                    "enemies = the five losers); rank of the real pick among all scored candidates.\n\n")
+            if since_match_id is not None:
+                f.write(f"Matches with Match_ID > {since_match_id} only.\n\n")
+            else:
+                f.write("All logged matches (may overlap the models' training data).\n\n")
+            for name, tables in results.items():
+                f.write(f"## {name}\n")
+                for title, table in tables.items():
+                    f.write(f"### {title}\n")
+                    f.write(table.to_markdown(index=False, floatfmt=".3f"))
+                    f.write("\n\n")
+    print(f"Report saved to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the real logs pick by pick and measure how highly each model ranked the real picks.")
+    parser.add_argument('models', nargs='*', metavar='MODEL',
+                        help="Registry names, bundle directories, .pkl or .onnx paths (default: the default model)")
+    parser.add_argument('--logs', default=LOGS_PATH)
+    parser.add_argument('--pool', choices=['all', 'real'], default='all',
+                        help="Candidates: every hero, or only heroes seen in the logs (the app's default filter)")
+    parser.add_argument('--since-match-id', type=int, default=None,
+                        help="Replay only matches after this Match_ID (default: the default model's last trained "
+                             "Match_ID from its tree-block metadata; 0 = every match, including training ones)")
+    parser.add_argument('--output', default=None, help="Write the tables to a .md or .json report")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.logs):
+        print("No match logs found.")
+        sys.exit(1)
+
+    _, df_stats = load_data(pd.DataFrame())
+    name_to_id, _, id_to_meta, _, _ = load_generator_data()
+    df_logs = pd.read_csv(args.logs)
+
+    since_match_id = args.since_match_id if args.since_match_id is not None else last_seen_match_id()
+    if since_match_id is None:
+        print("Training window unknown (no Match_ID in the tree-block metadata): replaying every match, "
+              "which may overlap the models' training data.")
+    else:
+        n_total = len(df_logs)
+        df_logs = df_logs[pd.to_numeric(df_logs['Match_ID'], errors='coerce') > since_match_id]
+        source = "--since-match-id" if args.since_match_id is not None else "the default model's training window"
+        print(f"Replaying {len(df_logs)} of {n_total} matches with Match_ID > {since_match_id} ({source}).")
+        if df_logs.empty:
+            print("No matches to replay; pass --since-match-id 0 to replay every match (in-sample for trained models).")
+            sys.exit(0)
+    df_steps = replay_steps(df_logs, name_to_id, id_to_meta)
+
+    pool = None
+    if args.pool == 'real':
+        pool = set(name_to_id[n.lower()] for t in pd.concat([df_logs['Winning_Team'], df_logs['Losing_Team']]).astype(str)
+                   for n in (p.partition(':')[0].strip() for p in t.split('|')) if n.lower() in name_to_id)
+
+    results = {}
+    for model in args.models or [None]:
+        label = model or 'default'
+        try:
+            predict = model_scorer(model, df_stats)
+        except ValueError as e:
+            print(f"Skipping {label}: {e}")
+            continue
+        t0 = time.perf_counter()
+        df_ranked = evaluate(predict, df_steps, df_stats, pool)
+        elapsed = time.perf_counter() - t0
+
+        tables = {
+            'Overall': summarize(df_ranked),
+            'By Role': summarize(df_ranked, 'role'),
+            'By Pick': summarize(df_ranked, 'pick'),
+            'By Stage': summarize(df_ranked, 'stage')
+        }
+        results[label] = tables
+
+        print(f"\n=== {label}: {len(df_ranked)} steps in {elapsed:.2f}s "
+              f"(scoring {df_ranked.attrs['score_s']:.2f}s) ===")
+        for title in ['Overall', 'By Role']:
+            print(tables[title].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    if args.output:
+        write_report(results, args.output, since_match_id)
@@ -0,0 +1,188 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import struct
+import zlib
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import build_encoder
+from scripts.model_bundle import BUNDLE_PATH, MANIFEST_NAME, read_manifest, build_schema, check_schema
+from scripts.export_heroes_json import ASSETS_DIR, load_hero_table
+
+# Paths
+ASSET_PATH = os.path.join(ASSETS_DIR, 'heroes.bin')
+
+# Binary layout (little-endian). Every section starts on an ALIGN boundary so it can be
+# viewed straight out of a memory-mapped file:
+#   header      HEADER_FORMAT (see below), padded to HEADER_SIZE
+#   stats       float32 [n_heroes, n_stats]   candidate stats, model order (schema hero_ids, stat_cols)
+#   lanes       int32   [n_heroes, 4]         hero_id, primary_lane, secondary_lane, flags
+#   string idx  uint32  [n_heroes, 4]         name offset, name length, icon offset, icon length
+#   strings     UTF-8 blob the string index points into (offsets relative to the blob)
+MAGIC = b'DNHA'
+ASSET_FORMAT_VERSION = 1
+ALIGN = 16
+HEADER_SIZE = 128
+FLAG_IN_REAL_LOGS = 1
+
+# Byte offsets: magic 0, format version 4, header size 6, encoder version 8, n_heroes 12, n_stats 16,
+# (offset, size) of stats / lanes / string index / strings 20-51, payload crc32 52,
+# bundle content hash (raw sha256, zeros when untied) 56-87
+HEADER_FORMAT = '<4sHHIII8II32s'
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def _bundle_hash(bundle_path, df_stats):
+    """Content hash of the model bundle the asset is built for (None when there is no bundle)."""
+    if not os.path.exists(os.path.join(bundle_path, MANIFEST_NAME)):
+        return None, build_schema(df_stats)
+    manifest = read_manifest(bundle_path)
+    check_schema(manifest['schema'], df_stats)
+    return manifest['content_hash'], manifest['schema']
+
+def pack_heroes(df_heroes, schema, bundle_hash=None):
+    """Packs the hero table into the binary asset. Rows follow schema['hero_ids'] (the One-Hot column order)."""
+    encoder = build_encoder(df_heroes)
+    if encoder['stat_cols'] != schema['stat_cols']:
+        raise ValueError(f"Stat columns {encoder['stat_cols']} do not match the model's {schema['stat_cols']}.")
+
+    hero_ids = np.asarray(schema['hero_ids'], dtype=np.int64)
+    by_id = df_heroes.drop_duplicates('Hero_ID', keep='last').set_index('Hero_ID').loc[hero_ids]
+
+    # Exactly the candidate-stats block the model sees
+    stats = encoder['stats_table'][hero_ids].astype('<f4')
+
+    flags = np.where(by_id['In_Real_Logs'].to_numpy(dtype=bool), FLAG_IN_REAL_LOGS, 0)
+    lanes = np.column_stack([
+        hero_ids,
+        by_id['Primary_Lane'].fillna(0).to_numpy(dtype=np.int64),
+        by_id['Secondary_Lane'].fillna(0).to_numpy(dtype=np.int64),
+        flags
+    ]).astype('<i4')
+
+    blob = bytearray()
+    string_idx = np.zeros((len(hero_ids), 4), dtype='<u4')
+    for i, (name, icon) in enumerate(zip(by_id['Hero_Name'], by_id['Icon_URL'])):
+        for j, text in enumerate((name, icon)):
+            data = str(text).encode('utf-8') if pd.notna(text) else b''
+            string_idx[i, 2 * j:2 * j + 2] = (len(blob), len(data))
+            blob += data
+
+    sections = [stats.tobytes(), lanes.tobytes(), string_idx.tobytes(), bytes(blob)]
+    offsets, pos = [], HEADER_SIZE
+    for data in sections:
+        offsets += [pos, len(data)]
+        pos = _align(pos + len(data))
+
+    payload = bytearray(pos - HEADER_SIZE)
+    for data, offset in zip(sections, offsets[::2]):
+        payload[offset - HEADER_SIZE:offset - HEADER_SIZE + len(data)] = data
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, ASSET_FORMAT_VERSION, HEADER_SIZE, schema['encoder_version'],
+                         len(hero_ids), stats.shape[1], *offsets, zlib.crc32(payload),
+                         bytes.fromhex(bundle_hash) if bundle_hash else bytes(32))
+    return header.ljust(HEADER_SIZE, b'\0') + bytes(payload)
+
+def read_hero_asset(path=ASSET_PATH):
+    """
+    Memory-maps an asset and returns its sections as zero-copy views:
+    {'version', 'encoder_version', 'bundle_hash', 'stats', 'lanes', 'names', 'icon_urls'}.
+    Raises ValueError on a bad magic, a newer format or a checksum mismatch.
+    """
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    fields = struct.unpack_from(HEADER_FORMAT, raw)
+    magic, version, header_size, encoder_version, n_heroes, n_stats = fields[:6]
+    (stats_off, stats_len, lanes_off, lanes_len, idx_off, idx_len, str_off, str_len), crc, bundle_hash = \
+        fields[6:14], fields[14], fields[15]
+
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a hero asset.")
+    if version > ASSET_FORMAT_VERSION:
+        raise ValueError(f"Hero asset format v{version} is newer than supported (v{ASSET_FORMAT_VERSION}).")
+    if zlib.crc32(raw[header_size:]) != crc:
+        raise ValueError(f"{path} is corrupt (checksum mismatch).")
+
+    stats = raw[stats_off:stats_off + stats_len].view('<f4').reshape(n_heroes, n_stats)
+    lanes = raw[lanes_off:lanes_off + lanes_len].view('<i4').reshape(n_heroes, 4)
+    string_idx = raw[idx_off:idx_off + idx_len].view('<u4').reshape(n_heroes, 4)
+    blob = raw[str_off:str_off + str_len].tobytes()
+
+    def strings(col):
+        return [blob[o:o + n].decode('utf-8') for o, n in string_idx[:, col:col + 2]]
+
+    return {
+        'version': version,
+        'encoder_version': encoder_version,
+        'bundle_hash': bundle_hash.hex() if any(bundle_hash) else None,
+        'stats': stats,
+        'lanes': lanes,
+        'names': strings(0),
+        'icon_urls': strings(2)
+    }
+
+def verify_asset(path, df_heroes, schema, bundle_hash=None):
+    """Round-trips the asset against the hero table. Raises ValueError on any mismatch."""
+    asset = read_hero_asset(path)
+    expected = build_encoder(df_heroes)['stats_table'][np.asarray(schema['hero_ids'])].astype(np.float32)
+
+    if asset['bundle_hash'] != bundle_hash:
+        raise ValueError(f"Asset is tied to bundle {asset['bundle_hash']}, expected {bundle_hash}.")
+    if not np.array_equal(asset['lanes'][:, 0], schema['hero_ids']):
+        raise ValueError("Hero order does not match the model schema.")
+    if not np.array_equal(asset['stats'], expected, equal_nan=True):
+        raise ValueError("Candidate stats do not match the model's stats table.")
+    return asset
+
+def export_asset(path=ASSET_PATH, bundle_path=BUNDLE_PATH):
+    df_heroes = load_hero_table()
+    bundle_hash, schema = _bundle_hash(bundle_path, df_heroes)
+    if bundle_hash is None:
+        print(f"Warning: no model bundle at {bundle_path}; the asset is not tied to a model.")
+
+    data = pack_heroes(df_heroes, schema, bundle_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    asset = verify_asset(path, df_heroes, schema, bundle_hash)
+    checksum = {
+        'asset': os.path.basename(path),
+        'format_version': ASSET_FORMAT_VERSION,
+        'bytes': len(data),
+        'crc32': f"{zlib.crc32(data[HEADER_SIZE:]):08x}",
+        'bundle_hash': bundle_hash
+    }
+    with open(f"{os.path.splitext(path)[0]}.checksum.json", 'w') as f:
+        json.dump(checksum, f, indent=2)
+
+    print(f"Exported {len(asset['names'])} heroes x {asset['stats'].shape[1]} stats to {path} ({len(data)} bytes)")
+    if bundle_hash:
+        print(f"Tied to model bundle {bundle_hash[:12]}")
+    return checksum
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the hero table as a compact binary asset for the Android app.")
+    parser.add_argument('--output', default=ASSET_PATH)
+    parser.add_argument('--bundle', default=BUNDLE_PATH, help="Model bundle the asset is built for")
+    parser.add_argument('--verify', action='store_true', help="Only check an existing asset against the hero table and bundle")
+    args = parser.parse_args()
+
+    try:
+        if args.verify:
+            df_heroes = load_hero_table()
+            bundle_hash, schema = _bundle_hash(args.bundle, df_heroes)
+            verify_asset(args.output, df_heroes, schema, bundle_hash)
+            print(f"Asset OK: {args.output} matches the hero table and model bundle.")
+        else:
+            export_asset(args.output, args.bundle)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,137 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from scipy import sparse as sp
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import ENCODER_VERSION
+
+# Paths
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'features')
+
+# Eviction bound for the whole cache directory
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+STALE_TMP_SECONDS = 3600
+
+# Columns that determine the feature matrix, labels and weights
+TRAIN_COLS = ['ally_ids', 'enemy_ids', 'candidate_id', 'label', 'is_real']
+
+def cache_key(df_train, stats_paths, sparse=False, dtype=np.float32):
+    """Content hash of the training rows, the stats files, the encoder version and the layout."""
+    h = hashlib.sha256()
+    h.update(f"encoder-v{ENCODER_VERSION}|sparse={sparse}|dtype={np.dtype(dtype).name}".encode())
+
+    h.update(pd.util.hash_pandas_object(df_train[TRAIN_COLS], index=False).values.tobytes())
+
+    for path in stats_paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+
+    return h.hexdigest()[:32]
+
+def _entry_dir(key):
+    return os.path.join(CACHE_DIR, key)
+
+def _entry_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+def load_features(key):
+    """Returns memory-mapped (X, y, weights, stat_cols) for a cached key, or None on a miss."""
+    path = _entry_dir(key)
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+        if meta['sparse']:
+            X = sp.csr_matrix((load('X_data'), load('X_indices'), load('X_indptr')), shape=tuple(meta['shape']))
+        else:
+            X = load('X')
+
+        y, weights = load('y'), load('weights')
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Feature cache entry {key} unreadable ({e}), ignoring.")
+        return None
+
+    # Mark as recently used for eviction
+    os.utime(meta_path)
+    return X, y, weights, meta['stat_cols']
+
+def store_features(key, X, y, weights, stat_cols):
+    """Writes a featurized matrix under data/cache/features/<key>/ and enforces the size bound."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _entry_dir(key)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+
+    arrays = {'y': np.asarray(y), 'weights': np.asarray(weights)}
+    if sp.issparse(X):
+        X = X.tocsr()
+        arrays.update({'X_data': X.data, 'X_indices': X.indices, 'X_indptr': X.indptr})
+    else:
+        arrays['X'] = np.ascontiguousarray(X)
+
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), arr)
+
+    # meta.json is written last: an entry without it is never read
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump({
+            'encoder_version': ENCODER_VERSION,
+            'sparse': bool(sp.issparse(X)),
+            'shape': list(X.shape),
+            'stat_cols': list(stat_cols)
+        }, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another process stored the same key first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    evict()
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """Drops least-recently-used entries until the cache fits in max_bytes."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    now = time.time()
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.isdir(path):
+            continue
+        if not os.path.exists(meta_path):
+            # In-flight write, or a leftover from an interrupted one
+            if now - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+            continue
+        entries.append((os.path.getmtime(meta_path), _entry_size(path), path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+def clear():
+    """Removes every cached matrix."""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+from scipy import sparse as sp
+
+from scripts.spans import span
+
+# Bump whenever the feature layout or encoding rules change (invalidates cached matrices)
+ENCODER_VERSION = 1
+
+# Candidate stats block, in model column order
+STAT_COLS = ['Primary_Lane', 'Damage_Type', 'Hard_CC_Count', 'Flex_Pick_Score', 'Escape_Reliability',
+             'Difficulty', 'Economy_Dependency', 'Early_Power', 'Mid_Power', 'Late_Power']
+N_ROLES = 5 # [Exp, Mid, Roam, Jungle, Gold]
+
+# Well-formed stringified ID list, e.g. "[131, 21, 110]" or "[]"
+ID_LIST_PATTERN = r'\[\s*(?:\d+\s*(?:,\s*\d+\s*)*,?\s*)?\]'
+
+def build_encoder(df_stats):
+    """
+    Precomputes the lookup tables that turn drafts into feature rows.
+    Feature Vector = [Ally_OneHot (N)] + [Enemy_OneHot (N)] + [Role_Counts (5)] + [Candidate_Stats (10)]
+    """
+    hero_ids = np.array(sorted(df_stats['Hero_ID'].unique()), dtype=np.int64)
+    n_heroes = len(hero_ids)
+    table_size = int(hero_ids.max()) + 1 if n_heroes else 1
+
+    stats_by_id = df_stats.drop_duplicates('Hero_ID', keep='last').set_index('Hero_ID')
+    known_ids = stats_by_id.index.to_numpy(dtype=np.int64)
+
+    # Hero ID -> One-Hot column (-1 = unknown hero)
+    id_to_idx = np.full(table_size, -1, dtype=np.int64)
+    id_to_idx[hero_ids] = np.arange(n_heroes)
+
+    # Hero ID -> Primary Lane (0 = unknown)
+    lane_table = np.zeros(table_size, dtype=np.int64)
+    lane_table[known_ids] = stats_by_id['Primary_Lane'].fillna(0).to_numpy(dtype=np.int64)
+
+    # Hero ID -> Candidate Stats. The extra last row stays zero for unknown candidates.
+    stats_table = np.zeros((table_size + 1, len(STAT_COLS)))
+    stats_table[known_ids] = stats_by_id[STAT_COLS].to_numpy(dtype=float)
+
+    return {
+        'hero_ids': hero_ids,
+        'n_heroes': n_heroes,
+        'stat_cols': list(STAT_COLS),
+        'n_features': 2 * n_heroes + N_ROLES + len(STAT_COLS),
+        'id_to_idx': id_to_idx,
+        'lane_table': lane_table,
+        'stats_table': stats_table
+    }
+
+def _lookup(table, ids, default):
+    """Vectorized table[ids] that maps out-of-range IDs to `default`."""
+    out = np.full(len(ids), default, dtype=table.dtype)
+    valid = (ids >= 0) & (ids < len(table))
+    out[valid] = table[ids[valid]]
+    return out
+
+def decode_id_lists(values):
+    """
+    Decodes stringified ID lists ("[131, 21, 110]") into flat index arrays.
+    Returns (row_idx, ids, well_formed) so that ids[k] belongs to row row_idx[k].
+    Malformed entries decode to an empty list and are flagged False in well_formed.
+    """
+    s = pd.Series(values).astype(str).str.strip()
+    well_formed = s.str.fullmatch(ID_LIST_PATTERN).fillna(False).to_numpy(dtype=bool)
+
+    body = s.where(well_formed, '').str.replace(r'[\[\]\s]', '', regex=True).str.rstrip(',')
+    lengths = np.where(body.str.len().to_numpy() > 0, body.str.count(',').to_numpy() + 1, 0)
+
+    if lengths.sum() == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), well_formed
+
+    ids = np.fromstring(','.join(body[lengths > 0]), dtype=np.int64, sep=',')
+    row_idx = np.repeat(np.arange(len(s)), lengths)
+    return row_idx, ids, well_formed
+
+def encode_flat(encoder, n_rows, ally_rows, ally_ids, enemy_rows, enemy_ids, candidate_ids,
+                role_counts=None, sparse=False, dtype=np.float64):
+    """
+    Builds the [n_rows, n_features] matrix from flat (row, hero_id) pairs in one pass.
+    role_counts overrides the lane-derived [n_rows, 5] role block (e.g. user-assigned roles).
+    sparse=True returns a CSR matrix instead, since the One-Hot blocks are >95% zeros.
+    """
+    n_heroes = encoder['n_heroes']
+    n_features = encoder['n_features']
+    roles_offset = 2 * n_heroes
+    stats_offset = roles_offset + N_ROLES
+
+    # 1. Composition One-Hots (scatter targets)
+    ally_idx = _lookup(encoder['id_to_idx'], ally_ids, -1)
+    keep_ally = ally_idx >= 0
+    enemy_idx = _lookup(encoder['id_to_idx'], enemy_ids, -1)
+    keep_enemy = enemy_idx >= 0
+
+    onehot_rows = np.concatenate([ally_rows[keep_ally], enemy_rows[keep_enemy]])
+    onehot_cols = np.concatenate([ally_idx[keep_ally], n_heroes + enemy_idx[keep_enemy]])
+
+    # 2. Role Counts of allies (Primary Lane 1-5)
+    if role_counts is None:
+        lanes = _lookup(encoder['lane_table'], ally_ids, 0)
+        keep = (lanes >= 1) & (lanes <= N_ROLES)
+        role_counts = np.bincount(ally_rows[keep] * N_ROLES + (lanes[keep] - 1), minlength=n_rows * N_ROLES)
+        role_counts = role_counts.reshape(n_rows, N_ROLES)
+
+    # 3. Candidate Stats (gather)
+    zero_row = len(encoder['stats_table']) - 1
+    cand_rows = np.asarray(candidate_ids, dtype=np.int64)
+    cand_rows = np.where((cand_rows >= 0) & (cand_rows < zero_row), cand_rows, zero_row)
+    cand_stats = np.take(encoder['stats_table'], cand_rows, axis=0)
+
+    if sparse:
+        return _to_csr(n_rows, n_features, onehot_rows, onehot_cols, role_counts, cand_stats, roles_offset, dtype)
+
+    X = np.zeros((n_rows, n_features), dtype=dtype)
+    X[onehot_rows, onehot_cols] = 1
+    X[:, roles_offset:stats_offset] = role_counts
+    X[:, stats_offset:] = cand_stats
+    return X
+
+def _to_csr(n_rows, n_features, onehot_rows, onehot_cols, role_counts, cand_stats, roles_offset, dtype):
+    """Assembles the CSR matrix straight from the scatter targets, without a dense intermediate."""
+    # A hero listed twice still sets its One-Hot to 1
+    onehot = np.unique(onehot_rows * n_features + onehot_cols)
+
+    tail = np.hstack([np.asarray(role_counts, dtype=float), cand_stats])
+    tail_rows, tail_cols = np.nonzero(tail)
+
+    rows = np.concatenate([onehot // n_features, tail_rows])
+    cols = np.concatenate([onehot % n_features, roles_offset + tail_cols])
+    data = np.concatenate([np.ones(len(onehot)), tail[tail_rows, tail_cols]]).astype(dtype)
+
+    return sp.csr_matrix((data, (rows, cols)), shape=(n_rows, n_features))
+
+def encode_candidates(encoder, ally_ids, enemy_ids, candidate_ids, role_counts=None, sparse=False, dtype=np.float32):
+    """Encodes one draft context against every candidate (one row per candidate)."""
+    cand = np.asarray(candidate_ids, dtype=np.int64)
+    ally = np.asarray(ally_ids, dtype=np.int64)
+    enemy = np.asarray(enemy_ids, dtype=np.int64)
+    n_rows = len(cand)
+    rows = np.arange(n_rows)
+
+    if role_counts is not None:
+        role_counts = np.broadcast_to(np.asarray(role_counts, dtype=float), (n_rows, N_ROLES))
+
+    return encode_flat(encoder, n_rows,
+                       np.repeat(rows, len(ally)), np.tile(ally, n_rows),
+                       np.repeat(rows, len(enemy)), np.tile(enemy, n_rows),
+                       cand, role_counts=role_counts, sparse=sparse, dtype=dtype)
+
+def score_candidates(clf, encoder, ally_ids, enemy_ids, candidate_ids, role_counts=None, sparse=False):
+    """Batch scorer: probability of 'Good Pick' (class 1) for every candidate in one predict call."""
+    if len(candidate_ids) == 0:
+        return np.zeros(0)
+    with span('featurize', rows=len(candidate_ids)):
+        X = encode_candidates(encoder, ally_ids, enemy_ids, candidate_ids, role_counts=role_counts, sparse=sparse)
+    with span('predict_proba'):
+        return clf.predict_proba(X)[:, 1]
+
+def matrix_nbytes(X):
+    """Memory held by a dense or CSR feature matrix."""
+    if sp.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import json
 import random
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Paths
 DATA_DIR = './data'
@@ -16,7 +21,13 @@ OUTPUT_PATH = os.path.join(DATA_DIR, 'training_data_hybrid.csv')
 # Constraints
 MAX_RELATION_LOOKUP = 5 # Top 5 counters/partners
 
-def load_data():
+# Where teammate synergies come from: the scraped compatibility table, pairs mined from the real logs, or both
+SYNERGY_SOURCES = ['scraped', 'mined', 'both']
+
+# Where counters come from: the scraped ladder table, head-to-head counts from the real logs, or both
+COUNTER_SOURCES = ['scraped', 'logs', 'both']
+
+def load_data(synergy_source='scraped', counter_source='scraped'):
     """Lengths stats maps from CSVs"""
     if not os.path.exists(BASE_STATS_PATH) or not os.path.exists(META_STATS_PATH):
         raise FileNotFoundError("Stats files missing")
@@ -59,6 +70,18 @@ def load_data():
                 'worst': [x['heroid'] for x in worst_json if 'heroid' in x]
             }
 
+    if counter_source != 'scraped':
+        from scripts.hero_matchups import load_matchups, matchup_counters, merge_counters
+        pro = matchup_counters(load_matchups(REAL_LOGS_PATH), top_n=MAX_RELATION_LOOKUP)
+        counters = pro if counter_source == 'logs' else merge_counters(counters, pro)
+        print(f"Using {counter_source} counters ({len(pro)} heroes with head-to-head counters)")
+
+    if synergy_source != 'scraped':
+        from scripts.hero_itemsets import load_itemsets, mined_synergies, merge_synergies
+        mined = mined_synergies(load_itemsets(REAL_LOGS_PATH), top_n=MAX_RELATION_LOOKUP)
+        synergies = mined if synergy_source == 'mined' else merge_synergies(synergies, mined)
+        print(f"Using {synergy_source} synergies ({len(mined)} heroes with mined partners)")
+
     return name_to_id, id_to_stats, id_to_meta, counters, synergies
 
 def parse_real_logs(name_to_id, id_to_meta, df_override=None):
@@ -136,7 +159,12 @@ def parse_real_logs(name_to_id, id_to_meta, df_override=None):
                         'ally_ids': str(allies),
                         'candidate_id': candidate,
                         'label': 1,
-                        'is_real': weight
+                        'is_real': weight,
+                        # Group columns for grouped cross-validation (empty on synthetic rows)
+                        'match_id': row.get('Match_ID'),
+                        'stage': row.get('Stage'),
+                        'day': row.get('Day'),
+                        'game': row.get('Game')
                     })
 
         except Exception as e:
@@ -267,9 +295,33 @@ def generate_synthetic_samples(id_to_stats, counters, synergies, n_samples=20000
 
     return samples
 
-def main():
+def random_draft_states(hero_ids, n_states, seed=42):
+    """
+    Vectorized random draft states (no labels): 0-4 allies, 0-5 enemies and one candidate,
+    all distinct heroes. Returns flat (row, id) arrays in the layout feature_encoder.encode_flat takes.
+    """
+    rng = np.random.default_rng(seed)
+    hero_ids = np.asarray(hero_ids, dtype=np.int64)
+
+    # Row-wise random permutations: first slot = candidate, then allies, then enemies
+    perm = np.argsort(rng.random((n_states, len(hero_ids))), axis=1)[:, :10]
+    drafted = hero_ids[perm]
+    n_allies = rng.integers(0, 5, size=n_states)
+    n_enemies = rng.integers(0, 6, size=n_states)
+
+    slots = np.arange(1, 10)
+    ally_mask = slots[None, :] <= n_allies[:, None]
+    enemy_mask = (slots[None, :] > 4) & (slots[None, :] <= 4 + n_enemies[:, None])
+
+    ally_rows, ally_cols = np.nonzero(ally_mask)
+    enemy_rows, enemy_cols = np.nonzero(enemy_mask)
+    return (ally_rows, drafted[ally_rows, ally_cols + 1],
+            enemy_rows, drafted[enemy_rows, enemy_cols + 1],
+            drafted[:, 0])
+
+def main(synergy_source='scraped', counter_source='scraped'):
     try:
-        name_to_id, id_to_stats, id_to_meta, counters, synergies = load_data()
+        name_to_id, id_to_stats, id_to_meta, counters, synergies = load_data(synergy_source, counter_source)
 
         real_data = parse_real_logs(name_to_id, id_to_meta)
         synth_data = generate_synthetic_samples(id_to_stats, counters, synergies)
@@ -286,13 +338,19 @@ def main():
     except Exception as e:
         print(f"Failed to generate data: {e}")
 
-def generate_data(df_logs_override=None):
+def generate_data(df_logs_override=None, synergy_source='scraped', counter_source='scraped'):
     """External API for data generation"""
-    name_to_id, id_to_stats, id_to_meta, counters, synergies = load_data()
+    name_to_id, id_to_stats, id_to_meta, counters, synergies = load_data(synergy_source, counter_source)
     real_data = parse_real_logs(name_to_id, id_to_meta, df_override=df_logs_override)
     synth_data = generate_synthetic_samples(id_to_stats, counters, synergies, n_samples=5000) # Lower sample count for speed in comparison
     all_data = real_data + synth_data
     return pd.DataFrame(all_data)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate the hybrid (real + synthetic) training data.")
+    parser.add_argument('--synergy-source', choices=SYNERGY_SOURCES, default='scraped',
+                        help="Teammate synergies for the synthetic samples (mined = pairs from scripts/hero_itemsets.py)")
+    parser.add_argument('--counter-source', choices=COUNTER_SOURCES, default='scraped',
+                        help="Counters for the synthetic samples (logs = head-to-head from scripts/hero_matchups.py)")
+    args = parser.parse_args()
+    main(args.synergy_source, args.counter_source)
@@ -0,0 +1,313 @@
+import pandas as pd
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.match_analytics import LOGS_PATH, explode_picks
+
+# Paths
+AGGREGATES_PATH = os.path.join(os.path.dirname(LOGS_PATH), 'match_logs_real_aggregates.json')
+
+# Bump when the counter layout changes (stored files are rebuilt)
+AGGREGATES_VERSION = 1
+
+# Raw log columns kept per match, so edits and deletes can be subtracted later
+LOG_COLUMNS = ['Match_ID', 'Winning_Team', 'Losing_Team', 'Game_Duration', 'Winner_Name', 'Loser_Name', 'Day', 'Game', 'Stage']
+
+# Counter tables. Keys join their parts with KEY_SEP ('|' never occurs inside a hero or role name).
+# Pick tables hold [picks, wins]; match tables hold [games, wins, duration_sum_s, duration_n].
+PICK_TABLES = {
+    'hero': ['hero'],
+    'hero_role': ['hero', 'role'],
+    'hero_stage': ['hero', 'stage'],
+    'hero_day': ['hero', 'day']
+}
+MATCH_TABLES = ['stage', 'day', 'team']
+KEY_SEP = '|'
+UNKNOWN = 'Unknown'
+
+def _label(value):
+    """Counter key part: Day 3.0 -> '3', missing -> 'Unknown'."""
+    if pd.isna(value):
+        return UNKNOWN
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _key(*parts):
+    return KEY_SEP.join(_label(p) for p in parts)
+
+def split_key(key):
+    return key.split(KEY_SEP)
+
+def empty_aggregates():
+    return {
+        'version': AGGREGATES_VERSION,
+        'source_hash': None,
+        'totals': {'matches': 0, 'picks': 0},
+        'pick_counts': {name: {} for name in PICK_TABLES},
+        'match_counts': {name: {} for name in MATCH_TABLES},
+        'matches': {}
+    }
+
+def _row_fingerprint(row):
+    return hashlib.sha256(json.dumps([_label(row.get(c)) for c in LOG_COLUMNS]).encode()).hexdigest()[:16]
+
+def _bump(table, key, deltas):
+    counts = table.setdefault(key, [0] * len(deltas))
+    for i, d in enumerate(deltas):
+        counts[i] += d
+    if not any(counts):
+        # A fully subtracted key disappears, so rebuilds and incremental updates compare equal
+        del table[key]
+
+def apply_match(agg, row, sign=1):
+    """
+    Adds (sign=+1) or subtracts (sign=-1) one raw log row. Touches only this match's picks: O(picks).
+    """
+    df_row = pd.DataFrame([{c: row.get(c) for c in LOG_COLUMNS}])
+    matches, picks = explode_picks(df_row, name_to_id={})
+    match = matches.iloc[0]
+
+    for rec in picks.itertuples(index=False):
+        won = int(rec.won)
+        for name, cols in PICK_TABLES.items():
+            _bump(agg['pick_counts'][name], _key(*(getattr(rec, c) for c in cols)), [sign, sign * won])
+
+    has_duration = not pd.isna(match['duration_s'])
+    duration = float(match['duration_s']) if has_duration else 0.0
+    for name in ['stage', 'day']:
+        _bump(agg['match_counts'][name], _key(match[name]), [sign, 0, sign * duration, sign * int(has_duration)])
+    for team, won in [(match['winner'], 1), (match['loser'], 0)]:
+        _bump(agg['match_counts']['team'], _key(team), [sign, sign * won, sign * duration, sign * int(has_duration)])
+
+    agg['totals']['matches'] += sign
+    agg['totals']['picks'] += sign * len(picks)
+
+    match_key = _label(row.get('Match_ID'))
+    if sign > 0:
+        agg['matches'][match_key] = {'fingerprint': _row_fingerprint(row), 'row': {c: _label(row.get(c)) for c in LOG_COLUMNS}}
+    else:
+        agg['matches'].pop(match_key, None)
+
+def _stored_row(entry):
+    """Stored rows keep labels; 'Unknown' goes back to a missing value before re-parsing."""
+    return {c: (None if v == UNKNOWN else v) for c, v in entry['row'].items()}
+
+def source_hash(logs_path):
+    """Content hash of the log file, as stored next to the counters."""
+    with open(logs_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _read_logs(logs_path):
+    return pd.read_csv(logs_path, dtype={'Day': str}) if os.path.exists(logs_path) else pd.DataFrame(columns=LOG_COLUMNS)
+
+def sync(agg, df_logs):
+    """
+    Brings the counters in line with the current log rows: deleted or edited matches are subtracted
+    from their stored row (-1), new or edited ones are added (+1). Unchanged matches cost one hash each.
+    Returns the number of matches added plus removed.
+    """
+    current = {}
+    for row in df_logs.to_dict('records'):
+        current[_label(row.get('Match_ID'))] = row
+
+    changes = 0
+    for match_key, entry in list(agg['matches'].items()):
+        row = current.get(match_key)
+        if row is None or _row_fingerprint(row) != entry['fingerprint']:
+            apply_match(agg, _stored_row(entry), sign=-1)
+            changes += 1
+
+    for match_key, row in current.items():
+        if match_key not in agg['matches']:
+            apply_match(agg, row, sign=1)
+            changes += 1
+    return changes
+
+def rebuild(df_logs):
+    """Recomputes every counter from the full log with groupby calls (the reference for verify)."""
+    agg = empty_aggregates()
+    df_logs = df_logs.reset_index(drop=True)
+    matches, picks = explode_picks(df_logs.reindex(columns=LOG_COLUMNS), name_to_id={})
+
+    for name, cols in PICK_TABLES.items():
+        grouped = picks.groupby(cols, sort=False, dropna=False)['won']
+        counts = pd.DataFrame({'picks': grouped.size(), 'wins': grouped.sum().astype(int)})
+        agg['pick_counts'][name] = {_key(*(k if isinstance(k, tuple) else (k,))): [int(p), int(w)]
+                                    for k, p, w in zip(counts.index, counts['picks'], counts['wins'])}
+
+    sides = pd.concat([
+        matches.assign(team=matches['winner'], won=1),
+        matches.assign(team=matches['loser'], won=0)
+    ])
+    for name, frame in [('stage', matches.assign(won=0)), ('day', matches.assign(won=0)), ('team', sides)]:
+        frame = frame.assign(has_duration=frame['duration_s'].notna().astype(int), duration=frame['duration_s'].fillna(0.0))
+        grouped = frame.groupby(name, sort=False, dropna=False)
+        counts = pd.DataFrame({'games': grouped.size(), 'wins': grouped['won'].sum(),
+                               'duration': grouped['duration'].sum(), 'n': grouped['has_duration'].sum()})
+        agg['match_counts'][name] = {_key(k): [int(g), int(w), float(d), int(n)]
+                                     for k, g, w, d, n in zip(counts.index, counts['games'], counts['wins'],
+                                                              counts['duration'], counts['n'])}
+
+    agg['totals'] = {'matches': len(matches), 'picks': len(picks)}
+    for row in df_logs.to_dict('records'):
+        agg['matches'][_label(row.get('Match_ID'))] = {'fingerprint': _row_fingerprint(row),
+                                                       'row': {c: _label(row.get(c)) for c in LOG_COLUMNS}}
+    return agg
+
+def save_aggregates(agg, path=AGGREGATES_PATH):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(agg, f)
+    os.replace(tmp_path, path)
+
+def load_aggregates(logs_path=LOGS_PATH, path=AGGREGATES_PATH, save=True):
+    """
+    Stored counters, synced with the log file if it changed since they were written
+    (out-of-band edits and deletes included). Missing or outdated files are rebuilt.
+    """
+    if not os.path.exists(logs_path):
+        return empty_aggregates()
+
+    agg = _read_stored(path)
+    current_hash = source_hash(logs_path)
+    if agg is None:
+        agg = rebuild(_read_logs(logs_path))
+    elif agg['source_hash'] == current_hash:
+        return agg
+    else:
+        sync(agg, _read_logs(logs_path))
+
+    agg['source_hash'] = current_hash
+    if save:
+        save_aggregates(agg, path)
+    return agg
+
+def _read_stored(path):
+    try:
+        with open(path) as f:
+            agg = json.load(f)
+        return agg if agg.get('version') == AGGREGATES_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+def _tracks_others(agg, df_logs, row_key):
+    """True if the stored counters cover exactly df_logs' matches other than row_key, unchanged."""
+    current = {_label(row.get('Match_ID')): row for row in df_logs.to_dict('records')}
+    if set(agg['matches']) - {row_key} != set(current) - {row_key}:
+        return False
+    return all(_row_fingerprint(current[k]) == entry['fingerprint'] for k, entry in agg['matches'].items() if k != row_key)
+
+def _update(row_key, df_logs, logs_path, path, new_row=None, previous_hash=None):
+    """
+    Applies a change to one match, given the log rows as written to logs_path. If the stored counters
+    were in sync with the file before this write (previous_hash), or every other tracked match is
+    unchanged, only this match's picks are touched (-1 old row, +1 new row); otherwise the counters
+    are synced with df_logs, so out-of-band edits made since the last load are not lost.
+    """
+    agg = _read_stored(path)
+
+    if agg is None:
+        agg = rebuild(df_logs)
+    elif (previous_hash is not None and agg['source_hash'] == previous_hash) or _tracks_others(agg, df_logs, row_key):
+        if row_key in agg['matches']:
+            apply_match(agg, _stored_row(agg['matches'][row_key]), sign=-1)
+        if new_row is not None:
+            apply_match(agg, new_row, sign=1)
+    else:
+        sync(agg, df_logs)
+
+    agg['source_hash'] = source_hash(logs_path)
+    save_aggregates(agg, path)
+    return agg
+
+def record_match(row, df_logs, logs_path=LOGS_PATH, path=AGGREGATES_PATH, previous_hash=None):
+    """
+    Save-path hook for an appended or edited match, called after df_logs was written to logs_path.
+    previous_hash: source_hash(logs_path) taken before the write, which skips the per-match check.
+    """
+    return _update(_label(row.get('Match_ID')), df_logs, logs_path, path, new_row=row, previous_hash=previous_hash)
+
+def delete_match(match_id, df_logs, logs_path=LOGS_PATH, path=AGGREGATES_PATH, previous_hash=None):
+    """Delete hook, called after df_logs (without match_id) was written to logs_path."""
+    return _update(_label(match_id), df_logs, logs_path, path, previous_hash=previous_hash)
+
+def pick_table(agg, name='hero'):
+    """Counter table as a DataFrame: key columns + picks, wins, win_rate (first-pick order)."""
+    cols = PICK_TABLES[name]
+    table = agg['pick_counts'][name]
+    df = pd.DataFrame([split_key(k) + v for k, v in table.items()], columns=cols + ['picks', 'wins'])
+    df['win_rate'] = df['wins'] / df['picks'].where(df['picks'] > 0)
+    return df
+
+def match_table(agg, name='stage'):
+    """games, wins, avg_duration_s per stage / day / team."""
+    table = agg['match_counts'][name]
+    df = pd.DataFrame([[k] + v for k, v in table.items()], columns=[name, 'games', 'wins', 'duration_sum_s', 'duration_n'])
+    df['avg_duration_s'] = df['duration_sum_s'] / df['duration_n'].where(df['duration_n'] > 0)
+    return df
+
+def real_hero_pool(agg):
+    """Heroes picked at least once in the real logs."""
+    return {split_key(k)[0] for k, (picks, _) in agg['pick_counts']['hero'].items() if picks > 0}
+
+def diff_aggregates(stored, expected):
+    """Human-readable differences between two aggregate sets (empty list = identical)."""
+    problems = []
+    if stored['totals'] != expected['totals']:
+        problems.append(f"totals {stored['totals']} != {expected['totals']}")
+    for section in ['pick_counts', 'match_counts']:
+        for name, table in expected[section].items():
+            got = stored[section].get(name, {})
+            for key in sorted(set(table) | set(got)):
+                a, b = got.get(key), table.get(key)
+                if a is None or b is None or any(abs(x - y) > 1e-6 for x, y in zip(a, b)):
+                    problems.append(f"{section}.{name}[{key}]: stored {a}, rebuilt {b}")
+    if set(stored['matches']) != set(expected['matches']):
+        problems.append("tracked match IDs differ from the log file")
+    return problems
+
+def verify(logs_path=LOGS_PATH, path=AGGREGATES_PATH):
+    """Rebuilds from the log file and diffs against the stored counters (as-is, without syncing)."""
+    if not os.path.exists(path):
+        return ["no aggregates file"]
+    with open(path) as f:
+        stored = json.load(f)
+    problems = diff_aggregates(stored, rebuild(_read_logs(logs_path)))
+    if os.path.exists(logs_path) and stored.get('source_hash') != source_hash(logs_path):
+        problems.append("log file changed since the aggregates were written (next load will sync)")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialized hero/role/stage/day/team counters for the real match logs.")
+    parser.add_argument('command', choices=['show', 'sync', 'rebuild', 'verify'])
+    parser.add_argument('--logs', default=LOGS_PATH)
+    parser.add_argument('--path', default=AGGREGATES_PATH)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        problems = verify(args.logs, args.path)
+        for p in problems[:50]:
+            print(f"  {p}")
+        if problems:
+            print(f"❌ {len(problems)} difference(s) between stored and rebuilt aggregates.")
+            sys.exit(1)
+        print("✅ Stored aggregates match a full rebuild.")
+    elif args.command == 'rebuild':
+        agg = rebuild(_read_logs(args.logs))
+        agg['source_hash'] = source_hash(args.logs)
+        save_aggregates(agg, args.path)
+        print(f"Rebuilt {agg['totals']['matches']} matches, {agg['totals']['picks']} picks -> {args.path}")
+    else:
+        agg = load_aggregates(args.logs, args.path)
+        print(f"{agg['totals']['matches']} matches, {agg['totals']['picks']} picks ({args.path})")
+        if args.command == 'show':
+            print(pick_table(agg).sort_values('picks', ascending=False, kind='stable').head(args.top).to_string(index=False))
+            print(match_table(agg, 'stage').to_string(index=False))
@@ -0,0 +1,217 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import hashlib
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.match_analytics import LOGS_PATH, DATA_DIR, load_picks
+
+# Paths
+CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'itemsets')
+
+# Bump when the mined columns or metrics change (invalidates cached results)
+ITEMSETS_VERSION = 1
+
+# Defaults: an itemset must appear in MIN_COUNT team drafts; rules below MIN_CONFIDENCE are dropped
+MIN_COUNT = 3
+MIN_CONFIDENCE = 0.0
+MAX_SIZE = 3
+MAX_PARTNERS = 5 # same cut-off as the scraped Best/Worst teammate lists
+
+ITEM_COLS = ['hero_1', 'hero_2', 'hero_3']
+
+def team_transactions(picks):
+    """
+    One transaction per team draft: a boolean [n_teams, n_heroes] membership matrix, the team's result
+    and the hero ID of every column. Unknown heroes (hero_id -1) are left out.
+    """
+    known = picks[picks['hero_id'] >= 0]
+    team_codes, _ = pd.factorize(pd.MultiIndex.from_arrays([known['match_id'], known['side']]))
+    item_codes, item_ids = pd.factorize(known['hero_id'], sort=True)
+
+    T = np.zeros((team_codes.max() + 1 if len(team_codes) else 0, len(item_ids)), dtype=bool)
+    T[team_codes, item_codes] = True
+    wins = np.zeros(len(T), dtype=bool)
+    wins[team_codes] = known['won'].to_numpy(dtype=bool)
+    return T, wins, np.asarray(item_ids, dtype=np.int64)
+
+def _popcount(bits):
+    """Set bits per column of a packed [n_bytes, k] bitset matrix."""
+    return np.bitwise_count(bits).sum(axis=0, dtype=np.int64)
+
+def mine_itemsets(T, wins, item_ids, min_count=MIN_COUNT, min_confidence=MIN_CONFIDENCE, max_size=MAX_SIZE):
+    """
+    Bitset Apriori over team drafts. Each hero is a packed bitset over transactions; pair supports come
+    from one matrix product, trio candidates only from frequent pairs (all three sub-pairs frequent),
+    counted with AND + popcount. Cost grows linearly with the number of drafts.
+    Returns one row per itemset: hero_1..hero_3 (-1 = unused), size, count, support, wins, win_rate,
+    confidence (best rule 'rest -> one hero') and lift (observed / independent co-occurrence).
+    """
+    n = len(T)
+    columns = ITEM_COLS + ['size', 'count', 'support', 'wins', 'win_rate', 'confidence', 'lift']
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+
+    counts = T.sum(axis=0)
+    frequent = np.flatnonzero(counts >= min_count)
+    Tf = T[:, frequent]
+    cf = counts[frequent].astype(np.float64)
+    bits = np.packbits(Tf, axis=0)
+    win_bits = np.packbits(wins)[:, None]
+
+    rows = []
+
+    # Pairs: co-occurrence and co-win counts in one product each
+    Ti = Tf.astype(np.int32)
+    pair_counts = Ti.T @ Ti
+    pair_wins = Ti.T @ (Ti * wins[:, None])
+    a, b = np.nonzero(np.triu(pair_counts >= min_count, k=1))
+    c = pair_counts[a, b].astype(np.float64)
+    if max_size >= 2 and len(a):
+        confidence = np.maximum(c / cf[a], c / cf[b])
+        lift = c * n / (cf[a] * cf[b])
+        rows.append(pd.DataFrame({
+            'hero_1': item_ids[frequent[a]], 'hero_2': item_ids[frequent[b]], 'hero_3': -1, 'size': 2,
+            'count': c.astype(int), 'wins': pair_wins[a, b], 'confidence': confidence, 'lift': lift
+        }))
+
+    # Trios: extend each frequent pair (a, b) by every c > b frequent with both a and b
+    if max_size >= 3 and len(a):
+        frequent_pair = np.triu(pair_counts >= min_count, k=1)
+        frequent_pair |= frequent_pair.T
+        trios = []
+        for i, j in zip(a, b):
+            ks = np.flatnonzero(frequent_pair[i] & frequent_pair[j])
+            ks = ks[ks > j]
+            if not len(ks):
+                continue
+            both = bits[:, i] & bits[:, j]
+            triple = both[:, None] & bits[:, ks]
+            k_counts = _popcount(triple)
+            keep = k_counts >= min_count
+            if keep.any():
+                k_wins = _popcount(triple[:, keep] & win_bits)
+                trios.append((np.full(keep.sum(), i), np.full(keep.sum(), j), ks[keep], k_counts[keep], k_wins))
+
+        if trios:
+            ti, tj, tk, tc, tw = (np.concatenate(parts) for parts in zip(*trios))
+            tc = tc.astype(np.float64)
+            # Best rule: the pair with the smallest support predicts the third hero most confidently
+            pair_support = np.minimum(np.minimum(pair_counts[ti, tj], pair_counts[ti, tk]), pair_counts[tj, tk])
+            rows.append(pd.DataFrame({
+                'hero_1': item_ids[frequent[ti]], 'hero_2': item_ids[frequent[tj]], 'hero_3': item_ids[frequent[tk]],
+                'size': 3, 'count': tc.astype(int), 'wins': tw,
+                'confidence': tc / pair_support,
+                'lift': tc * n * n / (cf[ti] * cf[tj] * cf[tk])
+            }))
+
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.concat(rows, ignore_index=True)
+    df['support'] = df['count'] / n
+    df['win_rate'] = df['wins'] / df['count']
+    df = df[df['confidence'] >= min_confidence]
+    return df[columns].sort_values(['size', 'count'], ascending=[True, False], kind='stable').reset_index(drop=True)
+
+def _cache_key(T, wins, item_ids, params):
+    h = hashlib.sha256(f"itemsets-v{ITEMSETS_VERSION}|{params}".encode())
+    for arr in (T, wins, item_ids):
+        h.update(np.ascontiguousarray(arr).tobytes())
+    h.update(str(T.shape).encode())
+    return h.hexdigest()[:32]
+
+def load_itemsets(logs_path=LOGS_PATH, min_count=MIN_COUNT, min_confidence=MIN_CONFIDENCE, max_size=MAX_SIZE,
+                  use_cache=True):
+    """Mined itemsets for the current logs, cached in data/cache/itemsets/ per (logs, parameters)."""
+    T, wins, item_ids = team_transactions(load_picks(logs_path))
+    key = _cache_key(T, wins, item_ids, (min_count, min_confidence, max_size))
+    path = os.path.join(CACHE_DIR, f"{key}.parquet")
+
+    if use_cache and os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Itemset cache unreadable ({e}), mining again.")
+
+    df = mine_itemsets(T, wins, item_ids, min_count, min_confidence, max_size)
+    if use_cache:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except (OSError, ImportError) as e:
+            print(f"Could not write the itemset cache ({e}).")
+    return df
+
+def mined_synergies(df_itemsets, top_n=MAX_PARTNERS):
+    """
+    Pairs as a synergy source in the generator's format: hero_id -> {'best': [...], 'worst': [...]}.
+    best = partners above a 50% win rate together and drafted together more than chance (lift > 1);
+    worst = partners below 50%. Ranked by win rate, then count.
+    """
+    pairs = df_itemsets[df_itemsets['size'] == 2]
+    both = pd.concat([
+        pairs.rename(columns={'hero_1': 'hero', 'hero_2': 'partner'}),
+        pairs.rename(columns={'hero_2': 'hero', 'hero_1': 'partner'})
+    ])[['hero', 'partner', 'count', 'win_rate', 'lift']]
+
+    best = both[(both['win_rate'] > 0.5) & (both['lift'] > 1.0)].sort_values(['win_rate', 'count'], ascending=False, kind='stable')
+    worst = both[both['win_rate'] < 0.5].sort_values(['win_rate', 'count'], ascending=[True, False], kind='stable')
+
+    synergies = {}
+    for label, frame in [('best', best), ('worst', worst)]:
+        for hero, partners in frame.groupby('hero', sort=False)['partner']:
+            synergies.setdefault(int(hero), {'best': [], 'worst': []})[label] = [int(p) for p in partners.head(top_n)]
+    return synergies
+
+def merge_synergies(*sources):
+    """Union of synergy dicts. Earlier sources win: a partner already listed as best or worst is not re-added."""
+    merged = {}
+    for source in sources:
+        for hero, rels in source.items():
+            entry = merged.setdefault(hero, {'best': [], 'worst': []})
+            for label in ('best', 'worst'):
+                entry[label] += [h for h in rels.get(label, []) if h not in entry['best'] and h not in entry['worst']]
+    return merged
+
+def itemsets_with(df_itemsets, candidate, ally_ids):
+    """Mined itemsets made of the candidate plus allies only, best win rate first."""
+    heroes = df_itemsets[ITEM_COLS].to_numpy()
+    allowed = np.isin(heroes, list(ally_ids) + [candidate, -1]).all(axis=1)
+    has_candidate = (heroes == candidate).any(axis=1)
+    return df_itemsets[allowed & has_candidate].sort_values(['win_rate', 'count'], ascending=False, kind='stable')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mine hero pairs and trios drafted together in the real logs.")
+    parser.add_argument('--min-count', type=int, default=MIN_COUNT, help="Minimum team drafts containing the itemset")
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE)
+    parser.add_argument('--max-size', type=int, choices=[2, 3], default=MAX_SIZE)
+    parser.add_argument('--sort', choices=['count', 'lift', 'win_rate', 'confidence'], default='lift')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--output', help="Also write all itemsets to this CSV")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    df = load_itemsets(min_count=args.min_count, min_confidence=args.min_confidence,
+                       max_size=args.max_size, use_cache=not args.no_cache)
+
+    id_to_name = load_picks().drop_duplicates('hero_id').set_index('hero_id')['hero'].to_dict()
+    named = df.assign(heroes=[' + '.join(id_to_name.get(h, str(h)) for h in row if h >= 0)
+                              for row in df[ITEM_COLS].to_numpy()])
+
+    for size in sorted(named['size'].unique()):
+        label = {2: 'Pairs', 3: 'Trios'}[size]
+        subset = named[named['size'] == size].sort_values(args.sort, ascending=False, kind='stable').head(args.top)
+        print(f"\n--- {label} ({(named['size'] == size).sum()} with count >= {args.min_count}) ---")
+        print(subset[['heroes', 'count', 'support', 'win_rate', 'confidence', 'lift']].to_string(
+            index=False, float_format=lambda v: f"{v:.3f}"))
+
+    if args.output:
+        named.to_csv(args.output, index=False)
+        print(f"\nSaved {len(named)} itemsets to {args.output}")
@@ -0,0 +1,288 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import hashlib
+import argparse
+from scipy import sparse as sp
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.match_analytics import LOGS_PATH, BASE_STATS_PATH, explode_picks, hero_name_to_id
+
+# Paths
+MATCHUPS_PATH = os.path.join(os.path.dirname(LOGS_PATH), 'match_logs_real_matchups.npz')
+
+# Bump when the stored arrays change (stored files are rebuilt)
+MATCHUPS_VERSION = 1
+
+# Only these columns decide who played against whom
+LOG_COLUMNS = ['Match_ID', 'Winning_Team', 'Losing_Team']
+
+# Generator export: an opponent needs MIN_GAMES head-to-head games to count as a pro-play counter
+MIN_GAMES = 2
+MAX_RELATION_LOOKUP = 5
+
+def _match_key(value):
+    if pd.isna(value):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _fingerprint(row):
+    return hashlib.sha256(json.dumps([_match_key(row.get(c)) for c in LOG_COLUMNS]).encode()).hexdigest()[:16]
+
+def _source_hash(logs_path):
+    with open(logs_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def hero_order(stats_path=BASE_STATS_PATH):
+    """Matrix order: hero_base_stats.csv row order (the order of the model's one-hot columns)."""
+    return np.array(list(hero_name_to_id(stats_path).values()), dtype=np.int64)
+
+def membership_matrices(df_logs, hero_ids, name_to_id=None):
+    """
+    Sparse [n_rows, n_heroes] 0/1 team membership of the winners (W) and losers (L) of every log row,
+    columns in hero_ids order. Heroes outside hero_ids are ignored.
+    """
+    n = len(df_logs)
+    # Positional match IDs, so every pick maps straight back to its log row
+    rows = df_logs.reindex(columns=LOG_COLUMNS).reset_index(drop=True).assign(Match_ID=np.arange(n))
+    _, picks = explode_picks(rows, name_to_id)
+
+    col_of = pd.Series(np.arange(len(hero_ids)), index=hero_ids)
+    picks = picks[picks['hero_id'].isin(col_of.index)]
+
+    mats = []
+    for side in ['win', 'lose']:
+        side_picks = picks[picks['side'] == side]
+        m = sp.csr_matrix((np.ones(len(side_picks), dtype=np.int32),
+                           (side_picks['match_id'].to_numpy(dtype=np.int64), col_of[side_picks['hero_id']].to_numpy())),
+                          shape=(n, len(hero_ids)))
+        m.data[:] = 1 # a hero listed twice in one team still counts once
+        mats.append(m)
+    return mats[0], mats[1]
+
+def head_to_head(W, L):
+    """
+    wins[i, j] = games hero i's team beat a team with hero j, from one sparse product.
+    Games between i and j are wins + wins.T; hero i's losses to j are wins.T.
+    """
+    return np.asarray((W.T @ L).toarray(), dtype=np.int64)
+
+def empty_store(hero_ids):
+    n_heroes = len(hero_ids)
+    return {
+        'hero_ids': np.asarray(hero_ids, dtype=np.int64),
+        'wins': np.zeros((n_heroes, n_heroes), dtype=np.int64),
+        'match_keys': np.array([], dtype=object),
+        'fingerprints': np.array([], dtype=object),
+        'W': sp.csr_matrix((0, n_heroes), dtype=np.int32),
+        'L': sp.csr_matrix((0, n_heroes), dtype=np.int32),
+        'source_hash': ''
+    }
+
+def _append(store, df_rows):
+    """Adds log rows: one sparse product for the whole batch."""
+    if df_rows.empty:
+        return
+    W, L = membership_matrices(df_rows, store['hero_ids'])
+    store['wins'] += head_to_head(W, L)
+    store['W'] = sp.vstack([store['W'], W], format='csr')
+    store['L'] = sp.vstack([store['L'], L], format='csr')
+    records = df_rows.to_dict('records')
+    store['match_keys'] = np.concatenate([store['match_keys'], np.array([_match_key(r.get('Match_ID')) for r in records], dtype=object)])
+    store['fingerprints'] = np.concatenate([store['fingerprints'], np.array([_fingerprint(r) for r in records], dtype=object)])
+
+def _remove(store, positions):
+    """Subtracts tracked matches using their stored membership rows."""
+    if not len(positions):
+        return
+    store['wins'] -= head_to_head(store['W'][positions], store['L'][positions])
+    keep = np.setdiff1d(np.arange(store['W'].shape[0]), positions)
+    for name in ['W', 'L']:
+        store[name] = store[name][keep]
+    for name in ['match_keys', 'fingerprints']:
+        store[name] = store[name][keep]
+
+def sync(store, df_logs):
+    """
+    Brings the matrix in line with the log rows: matches deleted or edited since the last sync are
+    subtracted, new or edited ones added. Appending k matches costs one k-row product.
+    Returns the number of matches added plus removed.
+    """
+    records = df_logs.to_dict('records')
+    current = {_match_key(r.get('Match_ID')): _fingerprint(r) for r in records}
+
+    stale = [i for i, (key, fp) in enumerate(zip(store['match_keys'], store['fingerprints'])) if current.get(key) != fp]
+    _remove(store, np.array(stale, dtype=np.int64))
+
+    tracked = set(store['match_keys'])
+    new_rows = [i for i, r in enumerate(records) if _match_key(r.get('Match_ID')) not in tracked]
+    _append(store, df_logs.iloc[new_rows])
+    return len(stale) + len(new_rows)
+
+def rebuild(df_logs, hero_ids=None):
+    store = empty_store(hero_order() if hero_ids is None else hero_ids)
+    _append(store, df_logs)
+    return store
+
+def save_matchups(store, path=MATCHUPS_PATH):
+    tmp_path = f"{path}.tmp{os.getpid()}.npz"
+    np.savez_compressed(
+        tmp_path, version=MATCHUPS_VERSION, source_hash=store['source_hash'],
+        hero_ids=store['hero_ids'], wins=store['wins'],
+        match_keys=store['match_keys'].astype(str), fingerprints=store['fingerprints'].astype(str),
+        W_indptr=store['W'].indptr, W_indices=store['W'].indices,
+        L_indptr=store['L'].indptr, L_indices=store['L'].indices
+    )
+    os.replace(tmp_path, path)
+
+def _read_stored(path, hero_ids):
+    try:
+        with np.load(path) as f:
+            if int(f['version']) != MATCHUPS_VERSION or not np.array_equal(f['hero_ids'], hero_ids):
+                return None
+            shape = (len(f['match_keys']), len(hero_ids))
+            membership = {name: sp.csr_matrix((np.ones(len(f[f'{name}_indices']), dtype=np.int32),
+                                               f[f'{name}_indices'], f[f'{name}_indptr']), shape=shape)
+                          for name in ['W', 'L']}
+            return {
+                'hero_ids': f['hero_ids'], 'wins': f['wins'].astype(np.int64),
+                'match_keys': f['match_keys'].astype(object), 'fingerprints': f['fingerprints'].astype(object),
+                'source_hash': str(f['source_hash']), **membership
+            }
+    except (OSError, ValueError, KeyError):
+        return None
+
+def load_matchups(logs_path=LOGS_PATH, path=MATCHUPS_PATH, save=True):
+    """
+    Head-to-head store for the log file: read from disk, synced incrementally if the logs changed
+    since it was written, rebuilt if missing or written for a different hero list.
+    """
+    hero_ids = hero_order()
+    if not os.path.exists(logs_path):
+        return empty_store(hero_ids)
+
+    store = _read_stored(path, hero_ids)
+    source_hash = _source_hash(logs_path)
+    if store is not None and store['source_hash'] == source_hash:
+        return store
+
+    df_logs = pd.read_csv(logs_path)
+    if store is None:
+        store = rebuild(df_logs, hero_ids)
+    else:
+        changes = sync(store, df_logs)
+        print(f"Matchups synced ({changes} match change(s)).")
+
+    store['source_hash'] = source_hash
+    if save:
+        save_matchups(store, path)
+    return store
+
+def dense_matrices(store):
+    """(hero_ids, wins, games) as dense [n_heroes, n_heroes] arrays; wins[i, j] = i beat j."""
+    wins = store['wins']
+    return store['hero_ids'], wins, wins + wins.T
+
+def matchup_counters(store, min_games=MIN_GAMES, top_n=MAX_RELATION_LOOKUP):
+    """
+    Pro-play counters in the generator's format: hero_id -> {'strong': [...], 'weak': [...]}.
+    strong = opponents beaten in more than half of at least min_games meetings, weak = below half;
+    ranked by the Laplace-smoothed rate (wins + 1) / (games + 2), then games.
+    """
+    hero_ids, wins, games = dense_matrices(store)
+    rate = (wins + 1) / (games + 2)
+    counters = {}
+    for i, hero in enumerate(hero_ids):
+        seen = np.flatnonzero(games[i] >= min_games)
+        if not len(seen):
+            continue
+        raw = wins[i, seen] / games[i, seen]
+        strong = seen[raw > 0.5][np.lexsort((-games[i, seen][raw > 0.5], -rate[i, seen][raw > 0.5]))]
+        weak = seen[raw < 0.5][np.lexsort((-games[i, seen][raw < 0.5], rate[i, seen][raw < 0.5]))]
+        if len(strong) or len(weak):
+            counters[int(hero)] = {'strong': [int(h) for h in hero_ids[strong[:top_n]]],
+                                   'weak': [int(h) for h in hero_ids[weak[:top_n]]]}
+    return counters
+
+def merge_counters(*sources):
+    """Union of counter dicts. Earlier sources win: an opponent already listed as strong or weak is not re-added."""
+    merged = {}
+    for source in sources:
+        for hero, rels in source.items():
+            entry = merged.setdefault(hero, {'strong': [], 'weak': []})
+            for label in ('strong', 'weak'):
+                entry[label] += [h for h in rels.get(label, []) if h not in entry['strong'] and h not in entry['weak']]
+    return merged
+
+def verify(logs_path=LOGS_PATH, path=MATCHUPS_PATH):
+    """Compares the stored matrix (as-is) against a rebuild from the full log file."""
+    hero_ids = hero_order()
+    stored = _read_stored(path, hero_ids)
+    if stored is None:
+        return ["no usable matchups file"]
+    expected = rebuild(pd.read_csv(logs_path), hero_ids)
+    problems = []
+    diff = np.argwhere(stored['wins'] != expected['wins'])
+    problems += [f"wins[{hero_ids[i]}, {hero_ids[j]}]: stored {stored['wins'][i, j]}, rebuilt {expected['wins'][i, j]}" for i, j in diff]
+    if sorted(stored['match_keys']) != sorted(expected['match_keys']):
+        problems.append("tracked match IDs differ from the log file")
+    if stored['source_hash'] != _source_hash(logs_path):
+        problems.append("log file changed since the matrix was written (next load will sync)")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hero-vs-hero head-to-head counts from the real match logs.")
+    parser.add_argument('command', choices=['show', 'sync', 'rebuild', 'verify', 'export'])
+    parser.add_argument('--logs', default=LOGS_PATH)
+    parser.add_argument('--path', default=MATCHUPS_PATH)
+    parser.add_argument('--hero', help="show: one hero's opponents")
+    parser.add_argument('--min-games', type=int, default=MIN_GAMES)
+    parser.add_argument('--output', default='hero_matchups_dense.npz', help="export: hero_ids, wins, games arrays")
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        problems = verify(args.logs, args.path)
+        for p in problems[:50]:
+            print(f"  {p}")
+        if problems:
+            print(f"❌ {len(problems)} difference(s) between stored and rebuilt matchups.")
+            sys.exit(1)
+        print("✅ Stored matchups match a full rebuild.")
+        sys.exit(0)
+
+    if args.command == 'rebuild':
+        store = rebuild(pd.read_csv(args.logs))
+        store['source_hash'] = _source_hash(args.logs)
+        save_matchups(store, args.path)
+    else:
+        store = load_matchups(args.logs, args.path)
+
+    hero_ids, wins, games = dense_matrices(store)
+    print(f"{len(store['match_keys'])} matches, {int(games.sum()) // 2} hero-vs-hero meetings ({args.path})")
+
+    if args.command == 'export':
+        np.savez(args.output, hero_ids=hero_ids, wins=wins, games=games)
+        print(f"Dense matrices saved to {args.output}")
+    elif args.command == 'show':
+        id_to_name = {v: k for k, v in hero_name_to_id().items()}
+        if args.hero:
+            name_to_id = {k.lower(): v for k, v in hero_name_to_id().items()}
+            if args.hero.lower() not in name_to_id:
+                parser.error(f"Unknown hero '{args.hero}'")
+            i = int(np.flatnonzero(hero_ids == name_to_id[args.hero.lower()])[0])
+            seen = np.flatnonzero(games[i] > 0)
+            df = pd.DataFrame({'opponent': [id_to_name[h] for h in hero_ids[seen]], 'games': games[i, seen], 'wins': wins[i, seen]})
+            df['win_rate'] = df['wins'] / df['games']
+            print(df.sort_values(['games', 'win_rate'], ascending=False, kind='stable').to_string(index=False))
+        else:
+            i, j = np.nonzero(np.triu(games >= args.min_games, k=1))
+            df = pd.DataFrame({'hero': [id_to_name[h] for h in hero_ids[i]], 'opponent': [id_to_name[h] for h in hero_ids[j]],
+                               'games': games[i, j], 'hero_wins': wins[i, j]})
+            df['hero_win_rate'] = df['hero_wins'] / df['games']
+            print(df.sort_values('games', ascending=False, kind='stable').head(15).to_string(index=False))
@@ -0,0 +1,211 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import hashlib
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Paths
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+LOGS_PATH = os.path.join(DATA_DIR, 'match_logs_real.csv')
+BASE_STATS_PATH = os.path.join(DATA_DIR, 'hero_base_stats.csv')
+CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'analytics')
+
+# Bump when the parsed tables change shape or meaning (invalidates cached files)
+ANALYTICS_VERSION = 1
+
+# One row per match, in log order
+MATCH_COLUMNS = ['match_id', 'stage', 'day', 'game', 'duration_s', 'winner', 'loser']
+
+# One row per pick: both teams of every match, winners first, in draft slot order
+PICK_COLUMNS = ['match_id', 'side', 'won', 'team', 'slot', 'hero', 'hero_id', 'role',
+                'stage', 'day', 'game', 'duration_s']
+SIDES = {'win': ('Winning_Team', 'Winner_Name'), 'lose': ('Losing_Team', 'Loser_Name')}
+
+ROLE_NAMES = {1: 'Exp', 2: 'Mid', 3: 'Roam', 4: 'Jungle', 5: 'Gold'}
+
+# In-process memo: (logs path, mtime, size) -> (matches, picks)
+_MEMO = {}
+
+def parse_duration(values):
+    """Vectorized 'mm:ss' -> seconds (float). Anything else is NaN; callers pick their own default."""
+    parts = pd.Series(values).astype('string').str.extract(r'^\s*(\d+):(\d{1,2})\s*$')
+    return parts[0].astype(float) * 60 + parts[1].astype(float)
+
+def format_duration(seconds):
+    return f"{int(seconds // 60)}m {int(seconds % 60)}s"
+
+def hero_name_to_id(stats_path=BASE_STATS_PATH):
+    if not os.path.exists(stats_path):
+        return {}
+    df = pd.read_csv(stats_path, usecols=['Hero_ID', 'Hero_Name'])
+    return dict(zip(df['Hero_Name'].astype(str), df['Hero_ID'].astype(int)))
+
+def build_matches(df_logs):
+    """Normalizes the raw log columns. Day/Game become numbers ('Day 3' -> 3, unparseable -> NaN)."""
+    def numeric(col):
+        if col not in df_logs.columns:
+            return pd.Series(np.nan, index=df_logs.index)
+        s = df_logs[col].astype('string').str.extract(r'(\d+(?:\.\d+)?)')[0]
+        return pd.to_numeric(s, errors='coerce')
+
+    def text(col):
+        return df_logs[col].astype('string') if col in df_logs.columns else pd.Series(pd.NA, index=df_logs.index, dtype='string')
+
+    matches = pd.DataFrame({
+        'match_id': pd.to_numeric(df_logs['Match_ID'], errors='coerce').astype('Int64'),
+        'stage': text('Stage'),
+        'day': numeric('Day'),
+        'game': numeric('Game'),
+        'duration_s': parse_duration(df_logs['Game_Duration']) if 'Game_Duration' in df_logs.columns else np.nan,
+        'winner': text('Winner_Name'),
+        'loser': text('Loser_Name')
+    })
+    return matches.reset_index(drop=True)
+
+def explode_picks(df_logs, name_to_id=None):
+    """
+    Splits every 'Hero:Role|Hero:Role|...' team string into one row per pick, vectorized.
+    Entries without ':' are dropped; heroes missing from hero_base_stats.csv get hero_id -1.
+    """
+    if name_to_id is None:
+        name_to_id = hero_name_to_id()
+
+    df_logs = df_logs.reset_index(drop=True)
+    matches = build_matches(df_logs)
+
+    frames = []
+    for side_rank, (side, (team_col, name_col)) in enumerate(SIDES.items()):
+        if team_col not in df_logs.columns:
+            continue
+        picks = df_logs[team_col].astype('string').str.split('|').explode().dropna()
+        picks = picks[picks.str.contains(':', regex=False)]
+
+        hero_role = picks.str.partition(':')
+        frame = pd.DataFrame({
+            'row': picks.index.to_numpy(),
+            'side_rank': side_rank,
+            'side': side,
+            'hero': hero_role[0].str.strip().to_numpy(),
+            'role': hero_role[2].str.strip().to_numpy()
+        })
+        frame['slot'] = frame.groupby('row').cumcount()
+        frame['team'] = df_logs[name_col].astype('string').to_numpy()[frame['row']] if name_col in df_logs.columns else pd.NA
+        frames.append(frame)
+
+    if not frames:
+        return matches, pd.DataFrame(columns=PICK_COLUMNS)
+
+    picks = pd.concat(frames, ignore_index=True).sort_values(['row', 'side_rank', 'slot'], kind='stable')
+    picks['won'] = picks['side'] == 'win'
+    picks['hero_id'] = picks['hero'].map(name_to_id).fillna(-1).astype(np.int64)
+
+    meta = matches.iloc[picks['row'].to_numpy()]
+    for col in ['match_id', 'stage', 'day', 'game', 'duration_s']:
+        picks[col] = meta[col].to_numpy()
+
+    picks['team'] = picks['team'].astype('string')
+    picks['hero'] = picks['hero'].astype('string')
+    picks['role'] = picks['role'].astype('string')
+    picks['match_id'] = picks['match_id'].astype('Int64')
+    return matches, picks[PICK_COLUMNS].reset_index(drop=True)
+
+def _source_key(logs_path, stats_path):
+    h = hashlib.sha256(f"analytics-v{ANALYTICS_VERSION}".encode())
+    for path in (logs_path, stats_path):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()[:32]
+
+def _path_key(logs_path):
+    """Short hash of the logs path: cache files of different log files never replace each other."""
+    return hashlib.sha256(os.path.abspath(logs_path).encode()).hexdigest()[:8]
+
+def _write_parquet(df, path):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def load_tables(logs_path=LOGS_PATH, stats_path=BASE_STATS_PATH, use_cache=True):
+    """
+    (matches, picks) for a log file. Parsed once per content hash of the logs and hero registry,
+    then read back from data/cache/analytics/ as Parquet (pyarrow) and memoized per process.
+    """
+    if not os.path.exists(logs_path):
+        empty = pd.DataFrame(columns=MATCH_COLUMNS), pd.DataFrame(columns=PICK_COLUMNS)
+        return empty
+
+    stat = os.stat(logs_path)
+    memo_key = (os.path.abspath(logs_path), stat.st_mtime_ns, stat.st_size, os.path.abspath(stats_path))
+    if use_cache and memo_key in _MEMO:
+        return _MEMO[memo_key]
+
+    path_key = _path_key(logs_path)
+    key = _source_key(logs_path, stats_path)
+    matches_path = os.path.join(CACHE_DIR, f"matches_{path_key}_{key}.parquet")
+    picks_path = os.path.join(CACHE_DIR, f"picks_{path_key}_{key}.parquet")
+
+    tables = None
+    if use_cache and os.path.exists(picks_path) and os.path.exists(matches_path):
+        try:
+            tables = pd.read_parquet(matches_path), pd.read_parquet(picks_path)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Analytics cache unreadable ({e}), re-parsing logs.")
+
+    if tables is None:
+        tables = explode_picks(pd.read_csv(logs_path), hero_name_to_id(stats_path))
+        if use_cache:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                # Older parses of the same log file are dead weight (other --logs files keep theirs)
+                for name in os.listdir(CACHE_DIR):
+                    if name.endswith('.parquet') and f"_{path_key}_" in name and key not in name:
+                        os.remove(os.path.join(CACHE_DIR, name))
+                _write_parquet(tables[0], matches_path)
+                _write_parquet(tables[1], picks_path)
+            except (OSError, ImportError) as e:
+                print(f"Could not write the analytics cache ({e}).")
+
+    if use_cache:
+        _MEMO.clear()
+        _MEMO[memo_key] = tables
+    return tables
+
+def load_picks(logs_path=LOGS_PATH, use_cache=True):
+    return load_tables(logs_path, use_cache=use_cache)[1]
+
+def load_matches(logs_path=LOGS_PATH, use_cache=True):
+    return load_tables(logs_path, use_cache=use_cache)[0]
+
+def hero_stats(picks, by=None, key='hero'):
+    """Picks, wins and win rate per hero (and per `by` slice columns), in first-pick order."""
+    keys = list(by or []) + [key]
+    grouped = picks.groupby(keys, sort=False, dropna=False)['won']
+    out = pd.DataFrame({'picks': grouped.size(), 'wins': grouped.sum().astype(int)})
+    out['win_rate'] = out['wins'] / out['picks']
+    return out.reset_index()
+
+def top_picks(picks, n=5, key='hero'):
+    """Most picked heroes: Series hero -> picks (ties keep first-pick order)."""
+    counts = hero_stats(picks, key=key).set_index(key)['picks']
+    return counts.sort_values(ascending=False, kind='stable').head(n)
+
+def top_win_rates(picks, n=3, min_picks=3, key='hero'):
+    """Highest win rates among heroes with at least min_picks picks: DataFrame [hero, picks, wins, win_rate]."""
+    stats = hero_stats(picks, key=key)
+    stats = stats[stats['picks'] >= min_picks]
+    return stats.sort_values('win_rate', ascending=False, kind='stable').head(n)
+
+def role_counts(picks):
+    """(hero, role) -> times played, in first-pick order."""
+    return picks.groupby(['hero', 'role'], sort=False).size()
+
+def match_summary(matches, by=None):
+    """Games and mean duration per slice of the matches table."""
+    if not by:
+        return pd.DataFrame({'games': [len(matches)], 'avg_duration_s': [matches['duration_s'].mean()]})
+    grouped = matches.groupby(by, dropna=False)
+    return pd.DataFrame({'games': grouped.size(), 'avg_duration_s': grouped['duration_s'].mean()}).reset_index()
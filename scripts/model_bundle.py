@@ -0,0 +1,259 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import joblib
+from scipy import sparse as sp
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import ENCODER_VERSION, N_ROLES, build_encoder
+
+# Paths
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+BUNDLE_PATH = os.path.join(DATA_DIR, 'draft_model_bundle')
+
+# Bump when the bundle layout changes; loaders refuse newer bundles
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+MODEL_FILE = 'model.joblib'
+
+# Flattened forest: all trees' nodes concatenated, child indices global (-1 = leaf)
+FOREST_ARRAYS = ['roots', 'children_left', 'children_right', 'feature', 'threshold', 'leaf_proba']
+
+def build_schema(df_stats):
+    """Feature schema the model was trained against: hero index order, stat column order and block layout."""
+    encoder = build_encoder(df_stats)
+    n = encoder['n_heroes']
+    return {
+        'encoder_version': ENCODER_VERSION,
+        'hero_ids': encoder['hero_ids'].tolist(),
+        'stat_cols': encoder['stat_cols'],
+        'n_features': encoder['n_features'],
+        'layout': {
+            'ally_onehot': [0, n],
+            'enemy_onehot': [n, 2 * n],
+            'role_counts': [2 * n, 2 * n + N_ROLES],
+            'candidate_stats': [2 * n + N_ROLES, encoder['n_features']]
+        }
+    }
+
+def check_schema(schema, df_stats):
+    """Raises ValueError if a bundle's schema does not match the current hero registry (hero_base_stats.csv)."""
+    current = build_schema(df_stats)
+    problems = []
+    if schema['encoder_version'] != current['encoder_version']:
+        problems.append(f"encoder v{schema['encoder_version']} (current v{current['encoder_version']})")
+    if schema['hero_ids'] != current['hero_ids']:
+        added = sorted(set(current['hero_ids']) - set(schema['hero_ids']))
+        removed = sorted(set(schema['hero_ids']) - set(current['hero_ids']))
+        problems.append(f"hero pool differs (added {added}, removed {removed})" if added or removed
+                        else "hero index order differs")
+    if schema['stat_cols'] != current['stat_cols']:
+        problems.append(f"stat columns {schema['stat_cols']} (current {current['stat_cols']})")
+    if schema['n_features'] != current['n_features']:
+        problems.append(f"{schema['n_features']} features (current {current['n_features']})")
+
+    if problems:
+        raise ValueError("Model bundle does not match the hero registry: " + "; ".join(problems) +
+                         ". Retrain with: python scripts/train_draft_model.py")
+
+def flatten_forest(clf):
+    """Concatenates every tree of a fitted forest into flat node arrays for the numpy scorer."""
+    trees = [est.tree_ for est in clf.estimators_]
+    sizes = np.array([t.node_count for t in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+    def children(t, offset, side):
+        c = getattr(t, side).astype(np.int64)
+        return np.where(c >= 0, c + offset, -1)
+
+    # Per-tree class distribution at each node, normalized as in DecisionTreeClassifier.predict_proba
+    values = np.concatenate([t.value[:, 0, :] for t in trees])
+    normalizer = values.sum(axis=1, keepdims=True)
+    normalizer[normalizer == 0.0] = 1.0
+
+    return {
+        'roots': roots,
+        'children_left': np.concatenate([children(t, o, 'children_left') for t, o in zip(trees, roots)]),
+        'children_right': np.concatenate([children(t, o, 'children_right') for t, o in zip(trees, roots)]),
+        'feature': np.concatenate([np.maximum(t.feature, 0) for t in trees]).astype(np.int64),
+        'threshold': np.concatenate([t.threshold for t in trees]),
+        'leaf_proba': values / normalizer
+    }
+
+class BundledForest:
+    """
+    Random forest scorer over memory-mapped node arrays. Matches RandomForestClassifier.predict_proba
+    but loads in milliseconds and lets every process share the same pages.
+    """
+
+    def __init__(self, arrays, classes, max_depth):
+        self.__dict__.update(arrays)
+        self.classes_ = np.asarray(classes)
+        self.n_estimators = len(self.roots)
+        self.n_features_in_ = None
+        self.max_depth = max_depth
+
+    def predict_proba(self, X):
+        if sp.issparse(X):
+            X = X.toarray()
+        X = np.asarray(X, dtype=np.float32) # the forest compares float32 inputs
+        rows = np.arange(len(X))
+
+        # Walk all trees for all rows at once, one depth level per step
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.max_depth):
+            left = self.children_left[node]
+            if (left < 0).all():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(left < 0, node, np.where(go_left, left, self.children_right[node]))
+
+        return self.leaf_proba[node].mean(axis=0)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+def _jsonable(params):
+    return {k: (v if isinstance(v, (int, float, str, bool, type(None))) else repr(v)) for k, v in params.items()}
+
+def _content_hash(path, manifest):
+    """sha256 over the schema, the model section and every payload file."""
+    h = hashlib.sha256()
+    h.update(json.dumps({'schema': manifest['schema'], 'model': manifest['model']}, sort_keys=True).encode())
+    for name in sorted(manifest['model']['files']):
+        with open(os.path.join(path, name), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+def save_bundle(clf, df_stats, path=BUNDLE_PATH, metadata=None):
+    """
+    Writes a versioned bundle directory: manifest.json (schema, metadata, content hash),
+    the estimator as an uncompressed joblib file and, for forests, flat .npy node arrays.
+    The directory is swapped in atomically.
+    """
+    schema = build_schema(df_stats)
+    if getattr(clf, 'n_features_in_', schema['n_features']) != schema['n_features']:
+        raise ValueError(f"Model expects {clf.n_features_in_} features but the hero registry "
+                         f"encodes {schema['n_features']}.")
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    joblib.dump(clf, os.path.join(tmp_path, MODEL_FILE))
+    files = [MODEL_FILE]
+
+    model = {
+        'class': type(clf).__name__,
+        'params': _jsonable(clf.get_params(deep=False)),
+        'classes': np.asarray(clf.classes_).tolist()
+    }
+
+    if hasattr(clf, 'estimators_') and hasattr(clf.estimators_[0], 'tree_'):
+        for name, arr in flatten_forest(clf).items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), arr)
+            files.append(f"{name}.npy")
+        model['max_depth'] = int(max(est.tree_.max_depth for est in clf.estimators_))
+
+    model['files'] = files
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'schema': schema,
+        'model': model,
+        'metadata': dict(metadata or {}, created_at=pd.Timestamp.now().isoformat(timespec='seconds'))
+    }
+    manifest['content_hash'] = _content_hash(tmp_path, manifest)
+
+    with open(os.path.join(tmp_path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    print(f"Model bundle saved to {path} (hash {manifest['content_hash'][:12]})")
+    return manifest
+
+def read_manifest(path=BUNDLE_PATH):
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version', 0) > BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Bundle format v{manifest['format_version']} is newer than supported "
+                         f"(v{BUNDLE_FORMAT_VERSION}).")
+    return manifest
+
+def load_bundle(path=BUNDLE_PATH, df_stats=None, engine='auto', verify=False):
+    """
+    Loads a bundle. Returns (model, manifest).
+    df_stats: when given, the schema is checked against it and a mismatch raises ValueError.
+    engine: 'auto' uses the memory-mapped BundledForest when the bundle has forest arrays,
+            'sklearn' always returns the original estimator (joblib, mmap_mode='r').
+    verify: recompute the content hash (reads every payload byte).
+    """
+    if not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        raise FileNotFoundError(f"No model bundle at {path}")
+
+    manifest = read_manifest(path)
+    if df_stats is not None:
+        check_schema(manifest['schema'], df_stats)
+
+    if verify and _content_hash(path, manifest) != manifest['content_hash']:
+        raise ValueError(f"Model bundle at {path} is corrupt (content hash mismatch).")
+
+    model = manifest['model']
+    if engine == 'auto' and 'roots.npy' in model['files']:
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in FOREST_ARRAYS}
+        clf = BundledForest(arrays, model['classes'], model['max_depth'])
+        clf.n_features_in_ = manifest['schema']['n_features']
+    else:
+        clf = joblib.load(os.path.join(path, MODEL_FILE), mmap_mode='r')
+
+    return clf, manifest
+
+def describe(path=BUNDLE_PATH, df_stats=None):
+    manifest = read_manifest(path)
+    schema = manifest['schema']
+    print(f"Bundle: {path}")
+    print(f"  Format v{manifest['format_version']}, hash {manifest['content_hash']}")
+    print(f"  Model: {manifest['model']['class']} ({len(manifest['model']['files'])} files)")
+    print(f"  Schema: {len(schema['hero_ids'])} heroes, {schema['n_features']} features, encoder v{schema['encoder_version']}")
+    for block, (start, end) in schema['layout'].items():
+        print(f"    {block:<16} [{start}, {end})")
+    for key, value in manifest['metadata'].items():
+        print(f"  {key}: {value}")
+
+    if df_stats is not None:
+        try:
+            check_schema(schema, df_stats)
+            print("  Schema matches the current hero registry.")
+        except ValueError as e:
+            print(f"  {e}")
+
+if __name__ == "__main__":
+    from scripts.train_draft_model import MODEL_OUTPUT_PATH, load_data
+
+    parser = argparse.ArgumentParser(description="Inspect, verify or build the versioned model bundle.")
+    parser.add_argument('command', choices=['info', 'verify', 'build'])
+    parser.add_argument('--path', default=BUNDLE_PATH)
+    parser.add_argument('--model', default=MODEL_OUTPUT_PATH, help="Pickle to bundle (build)")
+    args = parser.parse_args()
+
+    _, df_stats = load_data(pd.DataFrame())
+
+    if args.command == 'build':
+        save_bundle(joblib.load(args.model), df_stats, args.path, metadata={'source': os.path.basename(args.model)})
+    elif args.command == 'verify':
+        load_bundle(args.path, df_stats, verify=True)
+        print("Bundle OK: schema matches and content hash verified.")
+    else:
+        describe(args.path, df_stats)
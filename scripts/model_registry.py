@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+import joblib
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import build_encoder, encode_candidates
+from scripts.train_draft_model import DATA_DIR, MODEL_OUTPUT_PATH, load_data, featurize
+from scripts.model_bundle import BUNDLE_PATH, MANIFEST_NAME, load_bundle
+
+# Paths
+MODELS_DIR = os.path.join(DATA_DIR, 'models')
+REGISTRY_PATH = os.path.join(MODELS_DIR, 'registry.json')
+
+# Engines trained on the same feature encoder
+ENGINES = {
+    'rf': lambda: RandomForestClassifier(n_estimators=100, max_depth=15, class_weight='balanced', random_state=42),
+    'hgb': lambda: HistGradientBoostingClassifier(max_iter=200, max_depth=8, class_weight='balanced', random_state=42),
+    'logreg': lambda: make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000, class_weight='balanced'))
+}
+
+# Per-draft p99 scoring budgets (ms)
+LATENCY_BUDGETS = {
+    'mobile': 5.0,
+    'server': 50.0
+}
+
+LATENCY_REPEATS = 50
+
+def load_registry():
+    if not os.path.exists(REGISTRY_PATH):
+        return {}
+    with open(REGISTRY_PATH) as f:
+        return json.load(f)
+
+def save_registry(registry):
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    with open(REGISTRY_PATH, 'w') as f:
+        json.dump(registry, f, indent=2)
+
+def build_draft_suite(df_stats):
+    """
+    Standard draft suite: the pinned recommend_hero.py scenarios, each encoded
+    against every untaken hero (one candidate batch per draft).
+    """
+    from scripts.recommend_hero import SCENARIOS # recommend_hero loads models through this module
+
+    encoder = build_encoder(df_stats)
+    name_to_id = {name.lower(): pid for name, pid in zip(df_stats['Hero_Name'], df_stats['Hero_ID'])}
+
+    batches = []
+    for scenario in SCENARIOS:
+        ally_ids = [name_to_id[n.lower()] for n in scenario['allies'] if n.lower() in name_to_id]
+        enemy_ids = [name_to_id[n.lower()] for n in scenario['enemies'] if n.lower() in name_to_id]
+        taken = set(ally_ids + enemy_ids)
+        candidates = [h for h in encoder['hero_ids'] if h not in taken]
+        batches.append(encode_candidates(encoder, ally_ids, enemy_ids, candidates))
+    return batches
+
+def measure_latency(clf, batches, repeats=LATENCY_REPEATS):
+    """p50/p99 per-draft scoring latency (ms) over the draft suite."""
+    for X in batches:
+        clf.predict_proba(X) # warm-up
+
+    times = []
+    for _ in range(repeats):
+        for X in batches:
+            start = time.perf_counter()
+            clf.predict_proba(X)
+            times.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 99))
+
+def train_engine(engine, df_train_override=None):
+    """Trains one engine type, stores its artifact and records its accuracy/size/latency entry."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Options: {', '.join(ENGINES)}")
+
+    df_train, df_stats = load_data(df_train_override)
+    X, y, sample_weights, _ = featurize(df_train, df_stats)
+
+    # Same split as train_model so accuracies are comparable
+    X_train, X_test, y_train, y_test, w_train, w_test = train_test_split(X, y, sample_weights, test_size=0.2, random_state=42)
+
+    print(f"Training '{engine}'...")
+    clf = ENGINES[engine]()
+    start = time.perf_counter()
+    if engine == 'logreg':
+        clf.fit(X_train, y_train, logisticregression__sample_weight=w_train)
+    else:
+        clf.fit(X_train, y_train, sample_weight=w_train)
+    fit_s = time.perf_counter() - start
+
+    acc = accuracy_score(y_test, clf.predict(X_test))
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    path = os.path.join(MODELS_DIR, f"draft_model_{engine}.pkl")
+    joblib.dump(clf, path)
+
+    return register_model(engine, path, acc, df_stats, extra={'fit_s': fit_s})
+
+def register_model(name, path, accuracy, df_stats, extra=None):
+    """Measures a stored artifact (size, load time, draft-suite latency) and records it in the registry."""
+    start = time.perf_counter()
+    clf = joblib.load(path)
+    load_s = time.perf_counter() - start
+
+    p50, p99 = measure_latency(clf, build_draft_suite(df_stats))
+
+    entry = {
+        'path': os.path.relpath(path, DATA_DIR),
+        'accuracy': float(accuracy),
+        'size_bytes': os.path.getsize(path),
+        'load_s': load_s,
+        'latency_p50_ms': p50,
+        'latency_p99_ms': p99,
+        'registered_at': pd.Timestamp.now().isoformat(timespec='seconds')
+    }
+    entry.update(extra or {})
+
+    registry = load_registry()
+    registry[name] = entry
+    save_registry(registry)
+
+    print(f"Registered '{name}': acc {accuracy:.4f}, {entry['size_bytes'] / 1e6:.2f} MB, "
+          f"load {load_s * 1000:.0f} ms, p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+    return entry
+
+def resolve_budget(budget):
+    """Accepts a named budget ('mobile', 'server') or a number of milliseconds."""
+    if budget is None:
+        return None
+    if isinstance(budget, str) and budget in LATENCY_BUDGETS:
+        return LATENCY_BUDGETS[budget]
+    return float(budget)
+
+def select_model(budget=None):
+    """
+    Picks the most accurate registered model whose p99 latency fits the budget.
+    Falls back to the fastest model if none fits. Returns (name, entry) or (None, None).
+    """
+    registry = load_registry()
+    if not registry:
+        return None, None
+
+    budget_ms = resolve_budget(budget)
+    fitting = {n: e for n, e in registry.items() if budget_ms is None or e['latency_p99_ms'] <= budget_ms}
+
+    if fitting:
+        name = max(fitting, key=lambda n: fitting[n]['accuracy'])
+    else:
+        name = min(registry, key=lambda n: registry[n]['latency_p99_ms'])
+        print(f"Warning: no model fits {budget_ms} ms, using fastest ('{name}').")
+    return name, registry[name]
+
+def load_default_model(df_stats=None):
+    """
+    The default forest: the versioned bundle (memory-mapped, schema-checked against df_stats)
+    when one exists, otherwise the bare draft_model_rf.pkl.
+    """
+    if os.path.exists(os.path.join(BUNDLE_PATH, MANIFEST_NAME)):
+        return load_bundle(BUNDLE_PATH, df_stats)[0]
+    return joblib.load(MODEL_OUTPUT_PATH)
+
+def has_default_model():
+    return os.path.exists(os.path.join(BUNDLE_PATH, MANIFEST_NAME)) or os.path.exists(MODEL_OUTPUT_PATH)
+
+def load_model(budget=None, name=None, df_stats=None):
+    """
+    Loads a registry model by name or latency budget. Without either, loads the default model
+    (see load_default_model); df_stats makes a bundle with a stale hero schema fail loudly.
+    """
+    if name is None and budget is None:
+        return load_default_model(df_stats)
+
+    if name is None:
+        name, entry = select_model(budget)
+    else:
+        entry = load_registry().get(name)
+        if entry is None:
+            raise ValueError(f"Model '{name}' is not registered.")
+
+    if entry is None:
+        return load_default_model(df_stats)
+
+    print(f"Using registered model '{name}' (p99 {entry['latency_p99_ms']:.2f} ms, acc {entry['accuracy']:.4f})")
+    return joblib.load(os.path.join(DATA_DIR, entry['path']))
+
+def print_registry():
+    registry = load_registry()
+    if not registry:
+        print("Registry is empty. Train engines with: python scripts/model_registry.py train rf hgb logreg")
+        return
+
+    df = pd.DataFrame.from_dict(registry, orient='index')
+    df['size_mb'] = df['size_bytes'] / 1e6
+    df['load_ms'] = df['load_s'] * 1000
+    cols = ['accuracy', 'size_mb', 'load_ms', 'latency_p50_ms', 'latency_p99_ms']
+    print(df[cols].sort_values('accuracy', ascending=False).to_string(float_format=lambda v: f"{v:.4f}"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model registry: train, list and select draft models.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_train = sub.add_parser('train', help="Train and register engines")
+    p_train.add_argument('engines', nargs='+', choices=sorted(ENGINES))
+
+    sub.add_parser('list', help="Show registered models")
+
+    p_select = sub.add_parser('select', help="Pick a model for a latency budget")
+    p_select.add_argument('--budget', default='server', help="'mobile', 'server' or milliseconds")
+
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        for engine in args.engines:
+            train_engine(engine)
+        print_registry()
+    elif args.command == 'list':
+        print_registry()
+    else:
+        name, entry = select_model(args.budget)
+        if name is None:
+            print("Registry is empty.")
+        else:
+            print(f"Budget {resolve_budget(args.budget)} ms -> '{name}' ({os.path.join(DATA_DIR, entry['path'])})")
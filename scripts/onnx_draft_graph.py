@@ -0,0 +1,152 @@
+import numpy as np
+import os
+import sys
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+import onnxruntime as rt
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import N_ROLES, encode_candidates
+
+# Graph I/O names (the Android app binds these)
+ID_INPUTS = ['ally_ids', 'enemy_ids', 'ban_ids']
+SCORES_OUTPUT = 'scores'
+HERO_IDS_OUTPUT = 'hero_ids'
+MASKED_SCORE = -1.0 # taken and banned heroes
+
+def _const(name, array):
+    return numpy_helper.from_array(np.asarray(array), name=name)
+
+def build_id_model(model, encoder, features_input='float_input'):
+    """
+    Wraps a converted [N, n_features] model into a graph that takes hero IDs:
+      ally_ids, enemy_ids, ban_ids : int64 [k] (any length, may be empty)
+      scores   : float [n_heroes]  P(Good Pick) per hero, MASKED_SCORE for taken/banned heroes
+      hero_ids : int64 [n_heroes]  hero ID of every score position
+    The encoding is baked in as constants (ID -> column table, lane one-hots, candidate stats),
+    so clients never rebuild the feature layout.
+    """
+    n = encoder['n_heroes']
+    hero_ids = encoder['hero_ids']
+    n_features = encoder['n_features']
+
+    # ID -> One-Hot column; unknown/out-of-range IDs map to the dummy column n (sliced off below).
+    # Negative IDs clip to 0 and anything past the table clips to its last entry, both dummies.
+    id_table = np.full(int(hero_ids.max()) + 2, n, dtype=np.int64)
+    id_table[hero_ids] = np.arange(n)
+
+    # Column -> Primary Lane one-hot (zero row for the dummy and for lanes outside 1-5)
+    lanes = encoder['lane_table'][hero_ids]
+    lane_onehot = np.zeros((n + 1, N_ROLES), dtype=np.float32)
+    valid = (lanes >= 1) & (lanes <= N_ROLES)
+    lane_onehot[np.arange(n)[valid], lanes[valid] - 1] = 1.0
+
+    # Every hero is a candidate, in One-Hot column order
+    cand_stats = encoder['stats_table'][hero_ids].astype(np.float32)
+
+    initializers = [
+        _const('id_table', id_table),
+        _const('id_min', np.array(0, dtype=np.int64)),
+        _const('id_max', np.array(len(id_table) - 1, dtype=np.int64)),
+        _const('onehot_depth', np.array([n + 1], dtype=np.int64)),
+        _const('onehot_values', np.array([0.0, 1.0], dtype=np.float32)),
+        _const('axis0', np.array([0], dtype=np.int64)),
+        _const('zero_f', np.array(0.0, dtype=np.float32)),
+        _const('one_f', np.array(1.0, dtype=np.float32)),
+        _const('slice_start', np.array([0], dtype=np.int64)),
+        _const('slice_end', np.array([n], dtype=np.int64)),
+        _const('lane_onehot', lane_onehot),
+        _const('cand_stats', cand_stats),
+        _const('expand_shape', np.array([n, 2 * n + N_ROLES], dtype=np.int64)),
+        _const('positive_class', np.array(1, dtype=np.int64)),
+        _const('masked_score', np.array(MASKED_SCORE, dtype=np.float32)),
+        _const('hero_id_table', hero_ids.astype(np.int64))
+    ]
+
+    nodes = []
+    onehots = {}
+    for name in ID_INPUTS:
+        prefix = name.replace('_ids', '')
+        nodes += [
+            helper.make_node('Clip', [name, 'id_min', 'id_max'], [f'{prefix}_clipped']),
+            helper.make_node('Gather', ['id_table', f'{prefix}_clipped'], [f'{prefix}_idx']),
+            helper.make_node('OneHot', [f'{prefix}_idx', 'onehot_depth', 'onehot_values'], [f'{prefix}_rows'], axis=-1),
+            # Sum over picks (0 for an empty list), then cap duplicates at 1
+            helper.make_node('ReduceSum', [f'{prefix}_rows', 'axis0'], [f'{prefix}_sum'], keepdims=0),
+            helper.make_node('Clip', [f'{prefix}_sum', 'zero_f', 'one_f'], [f'{prefix}_capped']),
+            helper.make_node('Slice', [f'{prefix}_capped', 'slice_start', 'slice_end'], [f'{prefix}_onehot'])
+        ]
+        onehots[prefix] = f'{prefix}_onehot'
+
+    nodes += [
+        # Role counts: lane one-hots of the allies, summed
+        helper.make_node('Gather', ['lane_onehot', 'ally_idx'], ['ally_lanes']),
+        helper.make_node('ReduceSum', ['ally_lanes', 'axis0'], ['role_counts'], keepdims=0),
+
+        # Shared context row [ally | enemy | roles], expanded against every candidate's stats
+        helper.make_node('Concat', [onehots['ally'], onehots['enemy'], 'role_counts'], ['context'], axis=0),
+        helper.make_node('Unsqueeze', ['context', 'axis0'], ['context_row']),
+        helper.make_node('Expand', ['context_row', 'expand_shape'], ['context_rows']),
+        helper.make_node('Concat', ['context_rows', 'cand_stats'], [features_input], axis=1)
+    ]
+
+    # The converted model, fed by the baked encoding instead of a graph input
+    inner = model.graph
+    prob_name = [o.name for o in inner.output if o.name != 'label'][-1]
+    nodes += list(inner.node)
+    initializers += list(inner.initializer)
+
+    nodes += [
+        helper.make_node('Gather', [prob_name, 'positive_class'], ['raw_scores'], axis=1),
+        helper.make_node('Add', [onehots['ally'], onehots['enemy']], ['picked']),
+        helper.make_node('Add', ['picked', onehots['ban']], ['unavailable']),
+        helper.make_node('Greater', ['unavailable', 'zero_f'], ['masked']),
+        helper.make_node('Where', ['masked', 'masked_score', 'raw_scores'], [SCORES_OUTPUT]),
+        helper.make_node('Identity', ['hero_id_table'], [HERO_IDS_OUTPUT])
+    ]
+
+    inputs = [helper.make_tensor_value_info(name, TensorProto.INT64, [f'n_{name}']) for name in ID_INPUTS]
+    outputs = [
+        helper.make_tensor_value_info(SCORES_OUTPUT, TensorProto.FLOAT, [n]),
+        helper.make_tensor_value_info(HERO_IDS_OUTPUT, TensorProto.INT64, [n])
+    ]
+
+    graph = helper.make_graph(nodes, 'draft_id_scorer', inputs, outputs, initializers)
+    id_model = helper.make_model(graph, opset_imports=list(model.opset_import))
+    id_model.ir_version = model.ir_version
+    id_model.doc_string = f"Draft scorer over hero IDs: {n} heroes, {n_features} features baked in."
+    onnx.checker.check_model(id_model)
+    return id_model
+
+def score_ids(sess, ally_ids, enemy_ids, ban_ids=()):
+    """Runs the ID graph. Returns (scores, hero_ids)."""
+    feed = {name: np.asarray(ids, dtype=np.int64).reshape(-1)
+            for name, ids in zip(ID_INPUTS, (ally_ids, enemy_ids, ban_ids))}
+    return tuple(sess.run([SCORES_OUTPUT, HERO_IDS_OUTPUT], feed))
+
+def verify_id_model(id_model_path, clf, encoder, contexts, tolerance=1e-4):
+    """
+    Compares the ID graph against encode_candidates + predict_proba on (allies, enemies, bans) contexts.
+    Returns the max |dP| over unmasked heroes; raises ValueError on a masking or parity error.
+    """
+    sess = rt.InferenceSession(id_model_path, providers=['CPUExecutionProvider'])
+    hero_ids = encoder['hero_ids']
+    max_diff = 0.0
+
+    for allies, enemies, bans in contexts:
+        scores, ids = score_ids(sess, allies, enemies, bans)
+        if not np.array_equal(ids, hero_ids):
+            raise ValueError("hero_ids output does not match the encoder's hero order.")
+
+        unavailable = np.isin(hero_ids, np.concatenate([allies, enemies, bans]).astype(np.int64))
+        if not (scores[unavailable] == MASKED_SCORE).all():
+            raise ValueError("Taken or banned heroes were not masked.")
+
+        expected = clf.predict_proba(encode_candidates(encoder, allies, enemies, hero_ids))[:, 1]
+        max_diff = max(max_diff, float(np.abs(scores[~unavailable] - expected[~unavailable]).max(initial=0.0)))
+
+    if max_diff > tolerance:
+        raise ValueError(f"ID graph diverges from the encoder path (max |dP| {max_diff:.2e}).")
+    return max_diff
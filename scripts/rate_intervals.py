@@ -0,0 +1,165 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import argparse
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.match_analytics import LOGS_PATH, load_tables
+
+# 95% intervals by default
+ALPHA = 0.05
+N_BOOTSTRAP = 2000
+SEED = 42
+
+# Resamples are drawn in fixed-size chunks, each from its own child seed, so results do not depend on
+# how many workers run them. Chunks run in parallel once B reaches PARALLEL_MIN_B.
+CHUNK_SIZE = 500
+PARALLEL_MIN_B = 5000
+
+def _z(alpha):
+    from scipy.stats import norm
+    return norm.ppf(1 - alpha / 2)
+
+def wilson_interval(successes, n, alpha=ALPHA):
+    """Vectorized Wilson score interval. n == 0 gives (nan, nan)."""
+    successes = np.asarray(successes, dtype=np.float64)
+    n = np.asarray(n, dtype=np.float64)
+    z = _z(alpha)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = successes / n
+        denom = 1 + z ** 2 / n
+        center = (p + z ** 2 / (2 * n)) / denom
+        half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return center - half, center + half
+
+def match_matrices(matches, picks, heroes):
+    """
+    Per-match hero matrices over the given matches: picked[m, h] and won[m, h] (0/1 counts),
+    heroes in the given order. Picks of matches outside `matches` are ignored.
+    """
+    row = pd.Index(matches['match_id']).get_indexer(picks['match_id'])
+    col = pd.Index(heroes).get_indexer(picks['hero'])
+    keep = (row >= 0) & (col >= 0)
+    row, col = row[keep], col[keep]
+    won = picks['won'].to_numpy(dtype=np.float64)[keep]
+
+    picked = np.zeros((len(matches), len(heroes)))
+    wins = np.zeros((len(matches), len(heroes)))
+    np.add.at(picked, (row, col), 1.0)
+    np.add.at(wins, (row, col), won)
+    return picked, wins
+
+def _resample_counts(rng, b, n):
+    """[b, n] matrix: how often each match is drawn in each bootstrap resample."""
+    draws = rng.integers(0, n, size=(b, n))
+    offsets = (np.arange(b) * n)[:, None]
+    return np.bincount((draws + offsets).ravel(), minlength=b * n).reshape(b, n).astype(np.float64)
+
+def _bootstrap_chunk(seed, b, picked, wins):
+    R = _resample_counts(np.random.default_rng(seed), b, len(picked))
+    return R @ picked, R @ wins
+
+def bootstrap_rates(picked, wins, n_bootstrap=N_BOOTSTRAP, seed=SEED, n_jobs=None):
+    """
+    Resamples whole matches: every chunk draws a [b, n_matches] count matrix R, and R @ picked / R @ wins
+    give all heroes' resampled pick and win counts in two matrix products.
+    Returns (pick_rates, win_rates) as [B, n_heroes] arrays (win rate NaN where a hero was never drawn).
+    """
+    n = len(picked)
+    if n == 0 or n_bootstrap <= 0:
+        empty = np.full((0, picked.shape[1]), np.nan)
+        return empty, empty
+
+    sizes = [min(CHUNK_SIZE, n_bootstrap - start) for start in range(0, n_bootstrap, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if n_bootstrap >= PARALLEL_MIN_B and len(sizes) > 1 and n_jobs != 1:
+        # numpy's matrix products release the GIL, so threads are enough
+        with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+            parts = list(pool.map(_bootstrap_chunk, seeds, sizes, [picked] * len(sizes), [wins] * len(sizes)))
+    else:
+        parts = [_bootstrap_chunk(s, b, picked, wins) for s, b in zip(seeds, sizes)]
+
+    pick_counts = np.vstack([p for p, _ in parts])
+    win_counts = np.vstack([w for _, w in parts])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rates = np.where(pick_counts > 0, win_counts / pick_counts, np.nan)
+    return pick_counts / n, win_rates
+
+def _percentiles(samples, alpha):
+    if not len(samples):
+        nan = np.full(samples.shape[1], np.nan)
+        return nan, nan
+    # A hero missing from a resample has no win rate there; heroes never drawn stay NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        lo, hi = np.nanquantile(samples, [alpha / 2, 1 - alpha / 2], axis=0)
+    return lo, hi
+
+def rate_intervals(matches, picks, n_bootstrap=N_BOOTSTRAP, alpha=ALPHA, seed=SEED, n_jobs=None, heroes=None):
+    """
+    Pick and win rates with Wilson and bootstrap intervals for every hero in `picks`, over the games in
+    `matches`. Columns: hero, picks, wins, pick_rate, win_rate, and *_wilson_lo/hi, *_boot_lo/hi for both
+    rates (bootstrap columns are NaN with n_bootstrap=0). Heroes keep first-pick order.
+    """
+    if heroes is None:
+        heroes = pd.unique(picks['hero'])
+    picked, wins = match_matrices(matches, picks, heroes)
+    n_games = len(matches)
+    pick_counts, win_counts = picked.sum(axis=0), wins.sum(axis=0)
+
+    df = pd.DataFrame({'hero': heroes, 'picks': pick_counts.astype(int), 'wins': win_counts.astype(int)})
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['pick_rate'] = pick_counts / n_games if n_games else np.nan
+        df['win_rate'] = np.where(pick_counts > 0, win_counts / pick_counts, np.nan)
+
+    df['pick_rate_wilson_lo'], df['pick_rate_wilson_hi'] = wilson_interval(pick_counts, np.full(len(heroes), n_games), alpha)
+    df['win_rate_wilson_lo'], df['win_rate_wilson_hi'] = wilson_interval(win_counts, pick_counts, alpha)
+
+    boot_picks, boot_wins = bootstrap_rates(picked, wins, n_bootstrap, seed, n_jobs)
+    df['pick_rate_boot_lo'], df['pick_rate_boot_hi'] = _percentiles(boot_picks, alpha)
+    df['win_rate_boot_lo'], df['win_rate_boot_hi'] = _percentiles(boot_wins, alpha)
+    return df
+
+def format_rate(rate, lo, hi):
+    """'60.0% [23-88]': rate with its interval in whole percent."""
+    if pd.isna(rate):
+        return '-'
+    if pd.isna(lo) or pd.isna(hi):
+        return f"{rate * 100:.1f}%"
+    return f"{rate * 100:.1f}% [{lo * 100:.0f}-{hi * 100:.0f}]"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hero pick/win rates with Wilson and bootstrap confidence intervals.")
+    parser.add_argument('--stage', help="Only matches from this stage")
+    parser.add_argument('--bootstrap', type=int, default=N_BOOTSTRAP, help="Resamples (0 = Wilson only)")
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    parser.add_argument('--min-picks', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=None, help="Worker threads for large --bootstrap (default: all cores)")
+    parser.add_argument('--output', help="Also write the full table to this CSV")
+    args = parser.parse_args()
+
+    matches, picks = load_tables(LOGS_PATH)
+    if args.stage:
+        matches = matches[matches['stage'] == args.stage]
+        picks = picks[picks['stage'] == args.stage]
+
+    df = rate_intervals(matches, picks, args.bootstrap, args.alpha, n_jobs=args.jobs)
+    level = f"{(1 - args.alpha) * 100:g}%"
+    shown = df[df['picks'] >= args.min_picks].sort_values('win_rate', ascending=False, kind='stable')
+    print(f"{len(matches)} games, {args.bootstrap} bootstrap resamples, {level} intervals\n")
+    print(pd.DataFrame({
+        'hero': shown['hero'],
+        'picks': shown['picks'],
+        'win_rate (Wilson)': [format_rate(*v) for v in shown[['win_rate', 'win_rate_wilson_lo', 'win_rate_wilson_hi']].to_numpy()],
+        'win_rate (bootstrap)': [format_rate(*v) for v in shown[['win_rate', 'win_rate_boot_lo', 'win_rate_boot_hi']].to_numpy()]
+    }).to_string(index=False))
+
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"\nSaved {len(df)} heroes to {args.output}")
@@ -1,36 +1,48 @@
 import pandas as pd
-import numpy as np
 import os
-import joblib
 import sys
 import argparse
 
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import STAT_COLS, build_encoder, score_candidates
+from scripts.model_registry import has_default_model, load_model, load_registry
+from scripts.hero_itemsets import load_itemsets, itemsets_with
+from scripts import spans
+
 # Paths
 DATA_DIR = './data'
 BASE_STATS_PATH = os.path.join(DATA_DIR, 'hero_base_stats.csv')
 META_STATS_PATH = os.path.join(DATA_DIR, 'hero_meta_performance.csv')
 MODEL_PATH = os.path.join(DATA_DIR, 'draft_model_rf.pkl')
 
-def load_resources():
-    if not os.path.exists(BASE_STATS_PATH) or not os.path.exists(MODEL_PATH) or not os.path.exists(META_STATS_PATH):
+def load_resources(budget=None):
+    has_model = has_default_model() or (budget is not None and load_registry())
+    if not os.path.exists(BASE_STATS_PATH) or not has_model or not os.path.exists(META_STATS_PATH):
         print("Error: Missing data or model file.")
         sys.exit(1)
         
     df_base = pd.read_csv(BASE_STATS_PATH)
     df_meta = pd.read_csv(META_STATS_PATH)
-    clf = joblib.load(MODEL_PATH)
-    
+
     # Merge Base + Meta
     df_stats = pd.merge(df_base, df_meta[['Hero_ID', 'Early_Power', 'Mid_Power', 'Late_Power']], on='Hero_ID', how='left')
     
+    # Default model (bundle, schema-checked against df_stats), or the most accurate registered model within the latency budget
+    clf = load_model(budget, df_stats=df_stats)
+    
     return df_stats, clf
 
 def get_hero_id(name, name_to_id):
     name_clean = name.strip().lower()
     return name_to_id.get(name_clean)
 
-def recommend(allies, enemies, top_k=5):
-    df_stats, clf = load_resources()
+@spans.timed()
+def recommend(allies, enemies, top_k=5, budget=None, itemsets=None):
+    """itemsets: optional mined pairs/trios (scripts/hero_itemsets.py); matching ones are listed under each pick."""
+    with spans.span('load_resources'):
+        df_stats, clf = load_resources(budget)
     
     # Mappings
     name_to_id = {name.lower(): pid for name, pid in zip(df_stats['Hero_Name'], df_stats['Hero_ID'])}
@@ -49,73 +61,30 @@ def recommend(allies, enemies, top_k=5):
         if hid: enemy_ids.append(hid)
         else: print(f"Warning: Enemy hero '{name}' not found.")
         
-    # Feature Engineering Prep (Must match train_model.py)
-    hero_ids = sorted(df_stats['Hero_ID'].unique())
-    id_to_idx = {hid: i for i, hid in enumerate(hero_ids)}
-    n_heroes = len(hero_ids)
-    
-    stat_cols = ['Primary_Lane', 'Damage_Type', 'Hard_CC_Count', 'Flex_Pick_Score', 'Escape_Reliability', 
-                 'Difficulty', 'Economy_Dependency', 'Early_Power', 'Mid_Power', 'Late_Power']
-    stats_map = df_stats.set_index('Hero_ID')[stat_cols].to_dict('index')
-    
+    # Feature Engineering Prep (shared with train_draft_model.py)
+    with spans.span('build_encoder'):
+        encoder = build_encoder(df_stats)
+        hero_ids = encoder['hero_ids']
+
+        stats_map = df_stats.set_index('Hero_ID')[STAT_COLS].to_dict('index')
+
     # Filter taken heroes
     taken_ids = set(ally_ids + enemy_ids)
     candidates = [h for h in hero_ids if h not in taken_ids]
     
     print(f"\nAnalyzing {len(candidates)} candidates for Allied Team: {allies} vs Enemy Team: {enemies}...")
     
-    predictions = []
-    
-    # Base Vectors (Context)
-    ally_vec = np.zeros(n_heroes)
-    enemy_vec = np.zeros(n_heroes)
-    
-    # Precompute Role Map
-    lane_map = df_stats.set_index('Hero_ID')['Primary_Lane'].to_dict()
-    roles_vec = [0.0] * 5
-    
-    for h in ally_ids:
-        if h in id_to_idx: ally_vec[id_to_idx[h]] = 1
-        if h in lane_map:
-            lane = lane_map[h]
-            if 1 <= lane <= 5:
-                    roles_vec[lane-1] += 1.0
-                    
-    for h in enemy_ids:
-        if h in id_to_idx: enemy_vec[id_to_idx[h]] = 1
-        
     # Evaluate Candidates
-    X_pred = []
-    valid_candidates = []
-    
-    for cand_id in candidates:
-        c_stats = stats_map.get(cand_id)
-        if not c_stats: continue
-        
-        cand_vec = [
-            c_stats['Primary_Lane'],
-            c_stats['Damage_Type'],
-            c_stats['Hard_CC_Count'],
-            c_stats['Flex_Pick_Score'],
-            c_stats['Escape_Reliability'],
-            c_stats['Difficulty'],
-            c_stats['Economy_Dependency'],
-            c_stats['Early_Power'],
-            c_stats['Mid_Power'],
-            c_stats['Late_Power']
-        ]
+    valid_candidates = [cand_id for cand_id in candidates if cand_id in stats_map]
         
-        full_vec = np.concatenate([ally_vec, enemy_vec, roles_vec, cand_vec])
-        X_pred.append(full_vec)
-        valid_candidates.append(cand_id)
-        
-    if not X_pred:
+    if not valid_candidates:
         print("No valid candidates found.")
         return
 
     # Batch Predict Probabilities
     # We want Probability of Class 1 (Good Pick)
-    probs = clf.predict_proba(X_pred)[:, 1]
+    with spans.span('score', candidates=len(valid_candidates)):
+        probs = score_candidates(clf, encoder, ally_ids, enemy_ids, valid_candidates)
     
     # Rank
     results = []
@@ -134,32 +103,69 @@ def recommend(allies, enemies, top_k=5):
         role_map = {1: 'Exp', 2: 'Mid', 3: 'Roam', 4: 'Jungle', 5: 'Gold'}
         role = role_map.get(s['Primary_Lane'], 'Unknown')
         print(f"{i+1}. {name.title()} ({role}) - Score: {score:.4f}")
+        if itemsets is not None and ally_ids:
+            for row in itemsets_with(itemsets, pid, ally_ids).head(2).itertuples():
+                mates = [id_to_name[h].title() for h in (row.hero_1, row.hero_2, row.hero_3) if h >= 0 and h != pid]
+                print(f"   with {' + '.join(mates)}: {row.count} real games, {row.win_rate * 100:.0f}% won (lift {row.lift:.1f})")
         
+# Pinned draft scenarios (also the standard suite for latency measurements)
+SCENARIOS = [
+    {
+        # Logic: Empty board. Should recommend strong Roamers or Flexible picks.
+        'title': 'Scenario 1: First Pick (Roam Priority)',
+        'allies': [],
+        'enemies': ['Lancelot']
+    },
+    {
+        # Logic: Team has Exp, Roam, Jungle, Mid. Needs Gold Lane (Magic Dmg preferred due to YZ/Haya).
+        'title': 'Scenario 2: Filling Gold Lane (M7 Match)',
+        'allies': ['Yu Zhong', 'Chou', 'Hayabusa', 'Valentina'],
+        'enemies': ['Lancelot', 'Grock', 'Claude', 'Lapu-Lapu', 'Lunox']
+    },
+    {
+        # Logic: 4 Physical Heroes. Model MUST suggest a Mage for Mid.
+        'title': 'Scenario 3: Balancing Damage Type (Needs Mage)',
+        'allies': ['Saber', 'Brody', 'Chou', 'Yu Zhong'],
+        'enemies': ['Tigreal']
+    },
+    {
+        # Logic: Enemy has Fanny (High Mobility). Model should suggest Hard CC (Khufra, Franco, Kaja).
+        'title': 'Scenario 4: Counter-Pick (Anti-Fanny)',
+        'allies': ['Clint'],
+        'enemies': ['Fanny']
+    },
+    {
+        # Logic: Team needs an Exp Laner to face Dyroth (Strong 1v1).
+        'title': 'Scenario 5: Exp Lane Fill (Vs Dyroth)',
+        'allies': ['Pharsa', 'Tigreal', 'Granger', 'Nolan'],
+        'enemies': ['Dyrroth']
+    }
+]
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pinned draft scenarios.")
+    parser.add_argument('--budget', default=None, help="Pick a registered model by latency budget ('mobile', 'server' or ms)")
+    parser.add_argument('--synergy', action='store_true', help="List mined hero pairs/trios from the real logs under each pick")
+    parser.add_argument('--profile', action='store_true', help="Print a per-span timing breakdown at the end")
+    parser.add_argument('--trace', default=None, help="Also write the spans as Chrome-trace JSON to this path")
+    args = parser.parse_args()
+
+    if args.profile or args.trace:
+        trace = spans.start()
+
+    itemsets = load_itemsets() if args.synergy else None
+
     print("\n=== MOBA DRAFT RECOMMENDER TESTS ===\n")
 
-    # Scenario 1: The "Safe Opener"
-    # Logic: Empty board. Should recommend strong Roamers or Flexible picks.
-    print("--- Scenario 1: First Pick (Roam Priority) ---")
-    recommend(allies=[], enemies=["Lancelot"])
-    
-    # Scenario 2: The "M7 Gold Lane"
-    # Logic: Team has Exp, Roam, Jungle, Mid. Needs Gold Lane (Magic Dmg preferred due to YZ/Haya).
-    print("\n--- Scenario 2: Filling Gold Lane (M7 Match) ---")
-    recommend(allies=['Yu Zhong', 'Chou', 'Hayabusa', 'Valentina'], 
-              enemies=['Lancelot', 'Grock', 'Claude', 'Lapu-Lapu', 'Lunox'])
-              
-    # Scenario 3: "We Need Magic!"
-    # Logic: 4 Physical Heroes. Model MUST suggest a Mage for Mid.
-    print("\n--- Scenario 3: Balancing Damage Type (Needs Mage) ---")
-    recommend(allies=['Saber', 'Brody', 'Chou', 'Yu Zhong'], enemies=['Tigreal'])
-    
-    # Scenario 4: "Stop the Fanny"
-    # Logic: Enemy has Fanny (High Mobility). Model should suggest Hard CC (Khufra, Franco, Kaja).
-    print("\n--- Scenario 4: Counter-Pick (Anti-Fanny) ---")
-    recommend(allies=['Clint'], enemies=['Fanny'])
-    
-    # Scenario 5: "Exp Lane Duel"
-    # Logic: Team needs an Exp Laner to face Dyroth (Strong 1v1).
-    print("\n--- Scenario 5: Exp Lane Fill (Vs Dyroth) ---")
-    recommend(allies=['Pharsa', 'Tigreal', 'Granger', 'Nolan'], enemies=['Dyrroth'])
+    for i, scenario in enumerate(SCENARIOS):
+        prefix = "" if i == 0 else "\n"
+        print(f"{prefix}--- {scenario['title']} ---")
+        recommend(allies=scenario['allies'], enemies=scenario['enemies'], budget=args.budget, itemsets=itemsets)
+
+    if args.profile or args.trace:
+        spans.stop()
+        if args.profile:
+            print("\n=== PROFILE ===\n")
+            print(spans.format_summary(trace))
+        if args.trace:
+            spans.save_chrome_trace(trace, args.trace)
@@ -0,0 +1,145 @@
+import pandas as pd
+import os
+import json
+import time
+import threading
+import functools
+import contextlib
+import contextvars
+
+# Lightweight hot-path timers. Code marks regions with span()/timed(); nothing is recorded unless a
+# trace is active in the current context (one Streamlit rerun, one CLI run). With no trace active,
+# span() is a context-variable lookup returning a shared no-op context manager.
+
+_active = contextvars.ContextVar('active_trace', default=None)
+_NOOP = contextlib.nullcontext()
+
+class Trace:
+    """Completed spans of one recording, in start order: name, path, start/duration (ns), depth, parent, tid, args."""
+
+    def __init__(self):
+        self.events = []
+        self.origin_ns = time.perf_counter_ns()
+        self._stack = []
+
+class _Span:
+    __slots__ = ('trace', 'name', 'args', 'index')
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        trace = self.trace
+        parent = trace._stack[-1] if trace._stack else None
+        path = self.name if parent is None else f"{trace.events[parent]['path']}/{self.name}"
+        self.index = len(trace.events)
+        trace.events.append({'name': self.name, 'path': path, 'start_ns': time.perf_counter_ns(), 'dur_ns': 0,
+                             'depth': len(trace._stack), 'parent': parent, 'tid': threading.get_ident(),
+                             'args': self.args})
+        trace._stack.append(self.index)
+        return self
+
+    def __exit__(self, *exc):
+        event = self.trace.events[self.index]
+        event['dur_ns'] = time.perf_counter_ns() - event['start_ns']
+        self.trace._stack.pop()
+        return False
+
+def span(name, **args):
+    """Times the with-block as `name` (nested under any open span) when a trace is active."""
+    trace = _active.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, args or None)
+
+def timed(name=None):
+    """Decorator form of span(); the span is named after the function unless `name` is given."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _active.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with _Span(trace, label, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def start():
+    """Starts recording in the current context and returns the new Trace."""
+    trace = Trace()
+    _active.set(trace)
+    return trace
+
+def stop():
+    """Stops recording in the current context; returns the finished Trace (None if none was active)."""
+    trace = _active.get()
+    _active.set(None)
+    return trace
+
+@contextlib.contextmanager
+def recording():
+    """with recording() as trace: ... records every span opened inside the block."""
+    trace = Trace()
+    token = _active.set(trace)
+    try:
+        yield trace
+    finally:
+        # Restores whatever was recording before (usually nothing)
+        _active.reset(token)
+
+def summary(trace):
+    """
+    One row per span path (first-seen order): calls, total/self/mean ms and share of the traced wall time.
+    Self time excludes time spent in child spans.
+    """
+    columns = ['span', 'calls', 'total_ms', 'self_ms', 'mean_ms', 'share']
+    if trace is None or not trace.events:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.DataFrame(trace.events)
+    child_ns = df[df['parent'].notna()].groupby('parent')['dur_ns'].sum()
+    df['self_ns'] = df['dur_ns'] - df.index.map(child_ns).fillna(0)
+
+    wall_ns = df.loc[df['depth'] == 0, 'dur_ns'].sum()
+    g = df.groupby('path', sort=False).agg(calls=('dur_ns', 'size'), total_ns=('dur_ns', 'sum'),
+                                          self_ns=('self_ns', 'sum'), depth=('depth', 'first'))
+    return pd.DataFrame({
+        'span': ['  ' * d + p.rsplit('/', 1)[-1] for p, d in zip(g.index, g['depth'])],
+        'calls': g['calls'].to_numpy(),
+        'total_ms': g['total_ns'].to_numpy() / 1e6,
+        'self_ms': g['self_ns'].to_numpy() / 1e6,
+        'mean_ms': (g['total_ns'] / g['calls']).to_numpy() / 1e6,
+        'share': g['total_ns'].to_numpy() / wall_ns if wall_ns else 0.0
+    })
+
+def chrome_trace(trace):
+    """Trace Event Format dict (complete 'X' events, µs) for chrome://tracing or ui.perfetto.dev."""
+    pid = os.getpid()
+    events = []
+    for e in (trace.events if trace is not None else []):
+        event = {'name': e['name'], 'cat': e['path'].split('/', 1)[0], 'ph': 'X', 'pid': pid, 'tid': e['tid'],
+                 'ts': (e['start_ns'] - trace.origin_ns) / 1e3, 'dur': e['dur_ns'] / 1e3}
+        if e['args']:
+            event['args'] = {k: str(v) for k, v in e['args'].items()}
+        events.append(event)
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+def save_chrome_trace(trace, path):
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(trace), f)
+    print(f"Chrome trace saved to {path} (open in chrome://tracing or ui.perfetto.dev)")
+
+def format_summary(trace):
+    df = summary(trace)
+    if df.empty:
+        return "No spans recorded."
+    # Left-justified so the nesting indentation of span names stays visible
+    width = df['span'].str.len().max()
+    return df.to_string(index=False, justify='left',
+                        formatters={'span': lambda v: v.ljust(width), 'share': lambda v: f"{v * 100:.1f}%"},
+                        float_format=lambda v: f"{v:.2f}")
@@ -0,0 +1,299 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.match_analytics import LOGS_PATH, build_matches
+
+# Paths
+RATINGS_PATH = os.path.join(os.path.dirname(LOGS_PATH), 'match_logs_real_ratings.json')
+
+# Bump when the stored state changes (stored files are rebuilt)
+RATINGS_VERSION = 1
+
+# Elo: every team starts at BASE_RATING; a 400-point gap means 10:1 odds
+BASE_RATING = 1500.0
+K_FACTOR = 32.0
+SCALE = 400.0
+
+# Bradley-Terry: each team gets PRIOR_GAMES virtual win + loss against a BASE_RATING team, so
+# undefeated / winless teams get finite strengths
+PRIOR_GAMES = 1.0
+
+# Recommendations: how much of the Elo log-odds is added to the draft model's log-odds
+CONTEXT_WEIGHT = 0.5
+
+# Raw log columns that decide a match's rating update
+LOG_COLUMNS = ['Match_ID', 'Winner_Name', 'Loser_Name', 'Stage', 'Day']
+
+def _label(value):
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip() or None
+
+def _fingerprint(row):
+    return hashlib.sha256(json.dumps([_label(row.get(c)) for c in LOG_COLUMNS]).encode()).hexdigest()[:16]
+
+def _source_hash(logs_path):
+    with open(logs_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def expected_score(rating_a, rating_b):
+    """P(a beats b) under Elo."""
+    return 1.0 / (1.0 + 10 ** ((np.asarray(rating_b) - np.asarray(rating_a)) / SCALE))
+
+def empty_state():
+    return {'version': RATINGS_VERSION, 'source_hash': None, 'k': K_FACTOR,
+            'ratings': {}, 'games': {}, 'tracked': [], 'history': []}
+
+def apply_match(state, row):
+    """One Elo update, O(1): only the two teams' ratings change. Every row gets a history entry."""
+    winner, loser = _label(row.get('Winner_Name')), _label(row.get('Loser_Name'))
+    entry = {'match_id': _label(row.get('Match_ID')), 'stage': _label(row.get('Stage')), 'day': _label(row.get('Day')),
+             'winner': winner, 'loser': loser, 'winner_before': None, 'loser_before': None, 'delta': 0.0}
+
+    if winner and loser and winner != loser:
+        r_w = state['ratings'].get(winner, BASE_RATING)
+        r_l = state['ratings'].get(loser, BASE_RATING)
+        delta = state['k'] * (1.0 - float(expected_score(r_w, r_l)))
+        state['ratings'][winner] = r_w + delta
+        state['ratings'][loser] = r_l - delta
+        for team in (winner, loser):
+            state['games'][team] = state['games'].get(team, 0) + 1
+        entry.update(winner_before=r_w, loser_before=r_l, delta=delta)
+
+    state['tracked'].append(_fingerprint(row))
+    state['history'].append(entry)
+
+def _rewind(state, n_keep):
+    """Undoes the updates after the first n_keep matches, newest first, from the stored before-ratings."""
+    while len(state['history']) > n_keep:
+        entry = state['history'].pop()
+        state['tracked'].pop()
+        if entry['winner_before'] is None:
+            continue
+        for team, before in [(entry['winner'], entry['winner_before']), (entry['loser'], entry['loser_before'])]:
+            state['games'][team] -= 1
+            if state['games'][team] == 0:
+                del state['games'][team], state['ratings'][team]
+            else:
+                state['ratings'][team] = before
+
+def sync(state, df_logs):
+    """
+    Elo depends on match order, so the state follows the log row order. Rows appended after the tracked
+    ones cost one update each; an edit or delete rewinds to the first changed row and replays from there.
+    Returns the number of matches re-applied.
+    """
+    rows = df_logs.to_dict('records')
+    fingerprints = [_fingerprint(r) for r in rows]
+    common = 0
+    for old, new in zip(state['tracked'], fingerprints):
+        if old != new:
+            break
+        common += 1
+
+    _rewind(state, common)
+    for row in rows[common:]:
+        apply_match(state, row)
+    return len(rows) - common
+
+def rebuild(df_logs):
+    state = empty_state()
+    sync(state, df_logs)
+    return state
+
+def save_ratings(state, path=RATINGS_PATH):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def _read_stored(path):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        return state if state.get('version') == RATINGS_VERSION and state.get('k') == K_FACTOR else None
+    except (OSError, ValueError):
+        return None
+
+def _read_logs(logs_path):
+    return pd.read_csv(logs_path, dtype={'Day': str}) if os.path.exists(logs_path) else pd.DataFrame(columns=LOG_COLUMNS)
+
+def load_ratings(logs_path=LOGS_PATH, path=RATINGS_PATH, save=True):
+    """Stored Elo state, synced with the log file if it changed since it was written."""
+    if not os.path.exists(logs_path):
+        return empty_state()
+
+    state = _read_stored(path)
+    source_hash = _source_hash(logs_path)
+    if state is not None and state['source_hash'] == source_hash:
+        return state
+
+    state = state or empty_state()
+    sync(state, _read_logs(logs_path))
+    state['source_hash'] = source_hash
+    if save:
+        save_ratings(state, path)
+    return state
+
+def record_match(row, df_logs, logs_path=LOGS_PATH, path=RATINGS_PATH, previous_hash=None):
+    """
+    Save-path hook for an appended match (df_logs already written to logs_path, row is its last row).
+    previous_hash is the log file's hash before the write: if the stored state was in sync with that
+    file, this is a single O(1) Elo update. Otherwise the state is synced (rewind to the first changed
+    row and replay), so out-of-band edits made since the last load are not lost.
+    """
+    state = _read_stored(path)
+    if state is None:
+        state = rebuild(df_logs)
+    elif previous_hash is not None and state['source_hash'] == previous_hash and len(state['tracked']) == len(df_logs) - 1:
+        apply_match(state, row)
+    else:
+        sync(state, df_logs)
+
+    state['source_hash'] = _source_hash(logs_path)
+    save_ratings(state, path)
+    return state
+
+def elo_table(state):
+    """team, elo, games; strongest first."""
+    df = pd.DataFrame({'team': list(state['ratings']), 'elo': list(state['ratings'].values())})
+    df['games'] = df['team'].map(state['games']).astype(int)
+    return df.sort_values('elo', ascending=False, kind='stable').reset_index(drop=True)
+
+def rating_history(state):
+    """Long format, one row per team per match: match_id, stage, day, team, opponent, won, rating (after the match)."""
+    rows = []
+    for e in state['history']:
+        if e['winner_before'] is None:
+            continue
+        rows.append((e['match_id'], e['stage'], e['day'], e['winner'], e['loser'], True, e['winner_before'] + e['delta']))
+        rows.append((e['match_id'], e['stage'], e['day'], e['loser'], e['winner'], False, e['loser_before'] - e['delta']))
+    return pd.DataFrame(rows, columns=['match_id', 'stage', 'day', 'team', 'opponent', 'won', 'rating'])
+
+def fit_bradley_terry(winners, losers, prior=PRIOR_GAMES, tol=1e-10, max_iter=10000):
+    """
+    Batch Bradley-Terry fit, P(i beats j) = p_i / (p_i + p_j), with the vectorized MM update
+    p_i <- W_i / sum_j n_ij / (p_i + p_j) over the whole [teams x teams] games matrix per iteration.
+    Returns DataFrame team, games, wins, strength, rating (Elo scale, prior opponent = BASE_RATING).
+    """
+    winners, losers = pd.Series(winners, dtype=object), pd.Series(losers, dtype=object)
+    valid = winners.notna() & losers.notna() & (winners != losers)
+    winners, losers = winners[valid], losers[valid]
+    codes, teams = pd.factorize(pd.concat([winners, losers], ignore_index=True))
+    n_teams = len(teams)
+    if n_teams == 0:
+        return pd.DataFrame(columns=['team', 'games', 'wins', 'strength', 'rating'])
+
+    w_idx, l_idx = codes[:len(winners)], codes[len(winners):]
+    wins_vs = np.zeros((n_teams, n_teams))
+    np.add.at(wins_vs, (w_idx, l_idx), 1.0)
+    games_vs = wins_vs + wins_vs.T
+    wins = wins_vs.sum(axis=1)
+
+    # The prior opponent has strength 1, which also pins the scale (rating BASE_RATING)
+    p = np.ones(n_teams)
+    for _ in range(max_iter):
+        denom = (games_vs / (p[:, None] + p[None, :])).sum(axis=1) + 2 * prior / (p + 1.0)
+        p_new = (wins + prior) / denom
+        if np.max(np.abs(np.log(p_new) - np.log(p))) < tol:
+            p = p_new
+            break
+        p = p_new
+
+    df = pd.DataFrame({'team': np.asarray(teams, dtype=object), 'games': games_vs.sum(axis=1).astype(int),
+                       'wins': wins.astype(int), 'strength': p})
+    df['rating'] = BASE_RATING + SCALE * np.log10(p)
+    return df.sort_values('rating', ascending=False, kind='stable').reset_index(drop=True)
+
+def ratings_by_stage(matches, prior=PRIOR_GAMES):
+    """Bradley-Terry fitted separately per stage, plus 'Overall': team x stage rating table."""
+    fits = {'Overall': fit_bradley_terry(matches['winner'], matches['loser'], prior)}
+    for stage, group in matches.groupby('stage', sort=False):
+        fits[stage] = fit_bradley_terry(group['winner'], group['loser'], prior)
+    table = pd.DataFrame({stage: fit.set_index('team')['rating'] for stage, fit in fits.items()})
+    return table.sort_values('Overall', ascending=False, kind='stable')
+
+def team_rating(state, team):
+    """Current Elo of a team (BASE_RATING for teams never seen)."""
+    return state['ratings'].get(_label(team), BASE_RATING)
+
+def adjust_for_opponent(probs, team_rating_value, opponent_rating_value, weight=CONTEXT_WEIGHT):
+    """
+    Opponent-strength context for draft scores: adds weight x the Elo log-odds of the matchup to every
+    candidate's log-odds. The ranking is unchanged; the scores become matchup win chances.
+    """
+    probs = np.clip(np.asarray(probs, dtype=np.float64), 1e-6, 1 - 1e-6)
+    shift = weight * np.log(10) * (team_rating_value - opponent_rating_value) / SCALE
+    return 1.0 / (1.0 + np.exp(-(np.log(probs / (1 - probs)) + shift)))
+
+def verify(logs_path=LOGS_PATH, path=RATINGS_PATH):
+    """Compares the stored state (as-is) against a replay of the full log."""
+    stored = _read_stored(path)
+    if stored is None:
+        return ["no usable ratings file"]
+    expected = rebuild(_read_logs(logs_path))
+    problems = []
+    for team in sorted(set(stored['ratings']) | set(expected['ratings'])):
+        a, b = stored['ratings'].get(team), expected['ratings'].get(team)
+        if a is None or b is None or abs(a - b) > 1e-6 or stored['games'].get(team) != expected['games'].get(team):
+            problems.append(f"{team}: stored {a} ({stored['games'].get(team)} games), replayed {b} ({expected['games'].get(team)} games)")
+    if stored['tracked'] != expected['tracked']:
+        problems.append("tracked matches differ from the log file")
+    if stored['source_hash'] != _source_hash(logs_path):
+        problems.append("log file changed since the ratings were written (next load will sync)")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Team ratings from the real match logs: incremental Elo and batch Bradley-Terry.")
+    parser.add_argument('command', choices=['show', 'stages', 'history', 'predict', 'sync', 'rebuild', 'verify'])
+    parser.add_argument('teams', nargs='*', help="history: team names to follow; predict: TEAM_A TEAM_B")
+    parser.add_argument('--logs', default=LOGS_PATH)
+    parser.add_argument('--path', default=RATINGS_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        problems = verify(args.logs, args.path)
+        for p in problems[:50]:
+            print(f"  {p}")
+        if problems:
+            print(f"❌ {len(problems)} difference(s) between stored and replayed ratings.")
+            sys.exit(1)
+        print("✅ Stored ratings match a full replay.")
+        sys.exit(0)
+
+    if args.command == 'rebuild':
+        state = rebuild(_read_logs(args.logs))
+        state['source_hash'] = _source_hash(args.logs)
+        save_ratings(state, args.path)
+    else:
+        state = load_ratings(args.logs, args.path)
+    print(f"{len(state['tracked'])} matches, {len(state['ratings'])} teams ({args.path})\n")
+
+    matches = build_matches(_read_logs(args.logs))
+    if args.command in ('show', 'sync', 'rebuild'):
+        bt = fit_bradley_terry(matches['winner'], matches['loser'])
+        table = elo_table(state).merge(bt[['team', 'wins', 'rating']].rename(columns={'rating': 'bradley_terry'}), on='team', how='left')
+        print(table.to_string(index=False, float_format=lambda v: f"{v:.0f}"))
+    elif args.command == 'stages':
+        print(ratings_by_stage(matches).to_string(float_format=lambda v: f"{v:.0f}", na_rep='-'))
+    elif args.command == 'history':
+        history = rating_history(state)
+        if args.teams:
+            history = history[history['team'].isin(args.teams)]
+        print(history.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    elif args.command == 'predict':
+        if len(args.teams) != 2:
+            parser.error("predict needs two team names")
+        a, b = args.teams
+        r_a, r_b = team_rating(state, a), team_rating(state, b)
+        print(f"{a} ({r_a:.0f}) vs {b} ({r_b:.0f}): {a} wins {float(expected_score(r_a, r_b)) * 100:.1f}%")
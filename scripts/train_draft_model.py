@@ -1,18 +1,32 @@
 import pandas as pd
 import numpy as np
 import os
-import ast
+import sys
+import json
+import time
+import argparse
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
+from sklearn.utils.class_weight import compute_class_weight
 import joblib
 
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import STAT_COLS, build_encoder, decode_id_lists, encode_flat, matrix_nbytes
+from scripts import feature_cache
+from scripts.model_bundle import save_bundle
+from scripts.generate_training_data_new import generate_data
+
 # Paths
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
 TRAIN_DATA_PATH = os.path.join(DATA_DIR, 'training_data_hybrid.csv')
 BASE_STATS_PATH = os.path.join(DATA_DIR, 'hero_base_stats.csv')
 META_STATS_PATH = os.path.join(DATA_DIR, 'hero_meta_performance.csv')
 MODEL_OUTPUT_PATH = os.path.join(DATA_DIR, 'draft_model_rf.pkl')
+MODEL_META_PATH = os.path.join(DATA_DIR, 'draft_model_rf_meta.json')
+REAL_LOGS_PATH = os.path.join(DATA_DIR, 'match_logs_real.csv')
 
 def load_data(df_train_override=None):
     if not os.path.exists(BASE_STATS_PATH) or not os.path.exists(META_STATS_PATH):
@@ -32,117 +46,284 @@ def load_data(df_train_override=None):
 
     return df_train, df_stats
 
-def preprocess_features(df_train, df_stats):
+def preprocess_features(df_train, df_stats, sparse=False, dtype=np.float32):
     """
     Converts raw draft logs into ML Feature Vectors.
-    Feature Vector = [Ally_OneHot (131)] + [Enemy_OneHot (131)] + [Candidate_Stats]
+    Feature Vector = [Ally_OneHot (131)] + [Enemy_OneHot (131)] + [Role_Counts (5)] + [Candidate_Stats (10)]
+    All rows are encoded in bulk: hero lists are decoded into flat index arrays and scattered into one matrix.
+    sparse=True returns a CSR matrix. float32 is lossless here: the forest casts its input to float32 anyway.
     """
     print("Preprocessing Features...")
 
-    # map Hero ID to Index (0-130) for OneHot
-    hero_ids = sorted(df_stats['Hero_ID'].unique())
-    id_to_idx = {hid: i for i, hid in enumerate(hero_ids)}
-    n_heroes = len(hero_ids)
-
-    # Prepare Stats Map for Candidate
-    # We want to give the model context about the candidate (is it hard? is it Flex?)
-    # Columns to include:
-    stat_cols = ['Primary_Lane', 'Damage_Type', 'Hard_CC_Count', 'Flex_Pick_Score', 'Escape_Reliability',
-                 'Difficulty', 'Economy_Dependency', 'Early_Power', 'Mid_Power', 'Late_Power']
-    stats_map = df_stats.set_index('Hero_ID')[stat_cols].to_dict('index')
+    encoder = build_encoder(df_stats)
 
-    X = []
     y = df_train['label'].values
 
     # 'is_real' column now holds the actual weight value (e.g. 1.0 for mock, 3.0 or 5.0 for real)
     # We just cast it to float
     weights = df_train['is_real'].astype(float).values
 
-    # Helper for Role Counts
-    lane_map = df_stats.set_index('Hero_ID')['Primary_Lane'].to_dict()
+    ally_rows, ally_ids, ally_ok = decode_id_lists(df_train['ally_ids'])
+    enemy_rows, enemy_ids, enemy_ok = decode_id_lists(df_train['enemy_ids'])
 
-    for _, row in df_train.iterrows():
-        # Parse Lists
-        try:
-            ally_ids = ast.literal_eval(row['ally_ids'])
-            enemy_ids = ast.literal_eval(row['enemy_ids'])
-        except:
-            # Fallback if string format is weird
-            ally_ids = []
-            enemy_ids = []
+    # Fallback if string format is weird: drop both lists of that row
+    row_ok = ally_ok & enemy_ok
+    ally_rows, ally_ids = ally_rows[row_ok[ally_rows]], ally_ids[row_ok[ally_rows]]
+    enemy_rows, enemy_ids = enemy_rows[row_ok[enemy_rows]], enemy_ids[row_ok[enemy_rows]]
 
-        cand_id = row['candidate_id']
+    X = encode_flat(encoder, len(df_train), ally_rows, ally_ids, enemy_rows, enemy_ids,
+                    df_train['candidate_id'].to_numpy(), sparse=sparse, dtype=dtype)
 
-        # 1. Composition Vectors
-        ally_vec = np.zeros(n_heroes)
-        enemy_vec = np.zeros(n_heroes)
-        
-        # 2. Role Counts
-        # Vector: [Exp_Count, Mid_Count, Roam_Count, Jungle_Count, Gold_Count]
-        roles_vec = [0.0] * 5
-
-        for h in ally_ids:
-            if h in id_to_idx: ally_vec[id_to_idx[h]] = 1
-            if h in lane_map:
-                lane = lane_map[h]
-                if 1 <= lane <= 5:
-                     roles_vec[lane-1] += 1.0
-
-        for h in enemy_ids:
-            if h in id_to_idx: enemy_vec[id_to_idx[h]] = 1
-
-        # 3. Candidate Stats Vector
-        c_stats = stats_map.get(cand_id, {k:0 for k in stat_cols})
-
-        cand_vec = [
-            c_stats['Primary_Lane'],
-            c_stats['Damage_Type'],
-            c_stats['Hard_CC_Count'],
-            c_stats['Flex_Pick_Score'],
-            c_stats['Escape_Reliability'],
-            c_stats['Difficulty'],
-            c_stats['Economy_Dependency'],
-            c_stats['Early_Power'],
-            c_stats['Mid_Power'],
-            c_stats['Late_Power']
-        ]
-
-        # Combine
-        full_vec = np.concatenate([ally_vec, enemy_vec, roles_vec, cand_vec])
-        X.append(full_vec)
-
-    return np.array(X), y, weights, stat_cols
-
-def train_model(df_train_override=None, save_model=True):
+    return X, y, weights, encoder['stat_cols']
+
+def featurize(df_train, df_stats, sparse=False, use_cache=True):
+    """
+    preprocess_features behind the content-hash cache in data/cache/features/.
+    A hit skips featurization entirely. With the cache on, arrays are always returned
+    memory-mapped, so worker processes can share the pages instead of copying them.
+    """
+    if not use_cache:
+        return preprocess_features(df_train, df_stats, sparse=sparse)
+
+    key = feature_cache.cache_key(df_train, [BASE_STATS_PATH, META_STATS_PATH], sparse=sparse)
+    cached = feature_cache.load_features(key)
+    if cached is not None:
+        print(f"Feature cache hit ({key[:12]}), skipping preprocessing.")
+        return cached
+
+    X, y, weights, stat_cols = preprocess_features(df_train, df_stats, sparse=sparse)
+    feature_cache.store_features(key, X, y, weights, stat_cols)
+    return feature_cache.load_features(key) or (X, y, weights, stat_cols)
+
+def train_model(df_train_override=None, save_model=True, sparse=False, use_cache=True):
     df_train, df_stats = load_data(df_train_override)
 
-    X, y, sample_weights, stat_feature_names = preprocess_features(df_train, df_stats)
+    X, y, sample_weights, stat_feature_names = featurize(df_train, df_stats, sparse=sparse, use_cache=use_cache)
+
+    clf, results = fit_and_evaluate(X, y, sample_weights)
+    results['stat_feature_names'] = stat_feature_names
+    
+    # Save
+    if save_model:
+        joblib.dump(clf, MODEL_OUTPUT_PATH)
+        print(f"Model saved to {MODEL_OUTPUT_PATH}")
+        # The last Match_ID trained on marks where the next --incremental update starts
+        window = {'source': 'full'}
+        if 'match_id' in df_train.columns and df_train['match_id'].notna().any():
+            window['last_match_id'] = int(df_train['match_id'].max())
+        save_tree_blocks([tree_block(clf.n_estimators, window, results['n_train_rows'])])
+        save_bundle(clf, df_stats, metadata={'source': 'full', 'n_train_rows': results['n_train_rows'],
+                                             'accuracy': results['accuracy']})
+        
+    return results
 
+def fit_and_evaluate(X, y, sample_weights, n_jobs=None):
+    """Fixed 80/20 split, forest fit and held-out evaluation shared by train_model and the experiment runner."""
     # Split
     X_train, X_test, y_train, y_test, w_train, w_test = train_test_split(X, y, sample_weights, test_size=0.2, random_state=42)
 
-    clf = RandomForestClassifier(n_estimators=100, max_depth=15, class_weight='balanced', random_state=42)
+    clf = RandomForestClassifier(n_estimators=100, max_depth=15, class_weight='balanced', random_state=42, n_jobs=n_jobs)
+    start = time.perf_counter()
     clf.fit(X_train, y_train, sample_weight=w_train)
+    fit_s = time.perf_counter() - start
 
     # Evaluate
     y_pred = clf.predict(X_test)
     acc = accuracy_score(y_test, y_pred)
     report = classification_report(y_test, y_pred, output_dict=True)
 
-    # Feature Importance
-    importances = clf.feature_importances_
-    
-    # Save
+    return clf, {
+        'accuracy': acc,
+        'report': report,
+        # Feature Importance
+        'feature_importances': clf.feature_importances_,
+        'fit_s': fit_s,
+        'n_train_rows': len(y_train)
+    }
+
+# --- INCREMENTAL RETRAIN (WARM START) ---
+def tree_block(n_trees, window, n_rows):
+    """Bookkeeping entry for a contiguous block of trees in estimators_."""
+    return {
+        'n_trees': int(n_trees),
+        'window': window,
+        'n_rows': int(n_rows),
+        'trained_at': pd.Timestamp.now().isoformat(timespec='seconds')
+    }
+
+def load_tree_blocks(clf):
+    """Reads the tree block history; a model without one counts as a single full-fit block."""
+    if os.path.exists(MODEL_META_PATH):
+        with open(MODEL_META_PATH) as f:
+            blocks = json.load(f).get('blocks', [])
+        if sum(b['n_trees'] for b in blocks) == len(clf.estimators_):
+            return blocks
+        print("Warning: tree block history does not match the saved model, resetting it.")
+    return [tree_block(len(clf.estimators_), {'source': 'unknown'}, 0)]
+
+def save_tree_blocks(blocks):
+    with open(MODEL_META_PATH, 'w') as f:
+        json.dump({'blocks': blocks}, f, indent=2)
+
+def retire_oldest_trees(clf, blocks, n_retire):
+    """Drops the n_retire oldest trees (estimators_ is in insertion order) and trims the block history."""
+    clf.estimators_ = clf.estimators_[n_retire:]
+    clf.n_estimators = len(clf.estimators_)
+
+    remaining = []
+    for block in blocks:
+        dropped = min(n_retire, block['n_trees'])
+        n_retire -= dropped
+        if block['n_trees'] > dropped:
+            remaining.append(dict(block, n_trees=block['n_trees'] - dropped))
+    return remaining
+
+def update_model(df_train, window, n_new_trees=20, max_trees=None, save_model=True, use_cache=True):
+    """
+    Incremental retrain: loads the saved forest and grows n_new_trees on new (or reweighted) rows
+    with warm_start, keeping the existing trees untouched.
+    max_trees caps the ensemble by retiring the oldest trees first.
+    window describes the data the new block saw and is recorded next to the model.
+    """
+    if not os.path.exists(MODEL_OUTPUT_PATH):
+        raise FileNotFoundError("No saved model to update. Run a full train first.")
+
+    df_train, df_stats = load_data(df_train)
+    X, y, sample_weights, stat_feature_names = featurize(df_train, df_stats, use_cache=use_cache)
+
+    clf = joblib.load(MODEL_OUTPUT_PATH)
+    if clf.n_features_in_ != X.shape[1]:
+        raise ValueError(f"Model expects {clf.n_features_in_} features but data has {X.shape[1]}. "
+                         "The hero pool changed, run a full train.")
+    if not np.array_equal(np.unique(y), clf.classes_):
+        raise ValueError("New data must contain both good (1) and bad (0) picks. "
+                         "Mix in synthetic rows (generate_data) before updating.")
+
+    blocks = load_tree_blocks(clf)
+
+    # Retire before growing so the cap holds after the update
+    if max_trees is not None:
+        n_retire = max(0, len(clf.estimators_) + n_new_trees - max_trees)
+        n_retire = min(n_retire, len(clf.estimators_))
+        if n_retire:
+            print(f"Retiring {n_retire} oldest trees (cap {max_trees}).")
+            blocks = retire_oldest_trees(clf, blocks, n_retire)
+
+    X_train, X_test, y_train, y_test, w_train, w_test = train_test_split(X, y, sample_weights, test_size=0.2, random_state=42)
+
+    # 'balanced' is resolved on the new block's rows only, as it was for the original fit
+    block_class_weight = dict(zip(clf.classes_, compute_class_weight('balanced', classes=clf.classes_, y=y_train)))
+
+    print(f"Growing {n_new_trees} trees on {len(y_train)} new rows ({len(clf.estimators_)} existing)...")
+    clf.set_params(warm_start=True, n_estimators=len(clf.estimators_) + n_new_trees, class_weight=block_class_weight)
+    clf.fit(X_train, y_train, sample_weight=w_train)
+    clf.set_params(warm_start=False, class_weight='balanced')
+
+    blocks.append(tree_block(n_new_trees, window, len(y_train)))
+
+    # Evaluate on held-out new rows
+    y_pred = clf.predict(X_test)
+    acc = accuracy_score(y_test, y_pred)
+    report = classification_report(y_test, y_pred, output_dict=True)
+
+    print(f"Held-out accuracy on new rows: {acc:.4f}")
+
     if save_model:
         joblib.dump(clf, MODEL_OUTPUT_PATH)
-        print(f"Model saved to {MODEL_OUTPUT_PATH}")
-        
+        save_tree_blocks(blocks)
+        save_bundle(clf, df_stats, metadata={'source': 'incremental', 'n_train_rows': len(y_train), 'accuracy': acc})
+        print(f"Model updated ({clf.n_estimators} trees) and saved to {MODEL_OUTPUT_PATH}")
+
     return {
         'accuracy': acc,
         'report': report,
-        'feature_importances': importances,
-        'stat_feature_names': stat_feature_names
+        'feature_importances': clf.feature_importances_,
+        'stat_feature_names': stat_feature_names,
+        'tree_blocks': blocks
     }
 
+def last_seen_match_id():
+    """Highest Match_ID any recorded tree block has trained on (None if unknown)."""
+    if not os.path.exists(MODEL_META_PATH):
+        return None
+    with open(MODEL_META_PATH) as f:
+        blocks = json.load(f).get('blocks', [])
+    seen = [b['window']['last_match_id'] for b in blocks if 'last_match_id' in b['window']]
+    return max(seen) if seen else None
+
+def update_from_new_matches(since_match_id=None, n_new_trees=20, max_trees=None):
+    """Grows a tree block on the matches logged after since_match_id (default: the last one trained on)."""
+    if since_match_id is None:
+        since_match_id = last_seen_match_id()
+    if since_match_id is None:
+        raise ValueError("No previous window recorded, pass since_match_id explicitly.")
+
+    df_logs = pd.read_csv(REAL_LOGS_PATH, dtype={'Day': str})
+    df_new = df_logs[df_logs['Match_ID'] > since_match_id]
+    if df_new.empty:
+        print(f"No matches after Match_ID {since_match_id}, model is up to date.")
+        return None
+
+    window = {
+        'source': 'incremental',
+        'first_match_id': int(df_new['Match_ID'].min()),
+        'last_match_id': int(df_new['Match_ID'].max()),
+        'stages': sorted(df_new['Stage'].dropna().astype(str).unique().tolist()),
+        'days': sorted(df_new['Day'].dropna().astype(str).unique().tolist())
+    }
+    print(f"Updating on {len(df_new)} new matches (Match_ID {window['first_match_id']}-{window['last_match_id']})...")
+
+    # Real picks are all positives: the generator mixes in fresh synthetic rows of both classes
+    df_train = generate_data(df_logs_override=df_new)
+    return update_model(df_train, window, n_new_trees=n_new_trees, max_trees=max_trees)
+
+def memory_report(df_train_override=None):
+    """Compares the memory footprint of the dense and sparse feature layouts."""
+    df_train, df_stats = load_data(df_train_override)
+
+    X64, *_ = preprocess_features(df_train, df_stats, dtype=np.float64)
+    X32, *_ = preprocess_features(df_train, df_stats, dtype=np.float32)
+    X_csr, *_ = preprocess_features(df_train, df_stats, sparse=True, dtype=np.float32)
+
+    # Context blocks (One-Hots + Role Counts) are small integers and fit in uint8
+    stats_offset = X32.shape[1] - len(STAT_COLS)
+    blocks_bytes = X32[:, :stats_offset].astype(np.uint8).nbytes + X32[:, stats_offset:].nbytes
+
+    layouts = [
+        ('Dense float64 (legacy)', matrix_nbytes(X64)),
+        ('Dense float32', matrix_nbytes(X32)),
+        ('Dense uint8 context + float32 stats', blocks_bytes),
+        ('CSR float32', matrix_nbytes(X_csr))
+    ]
+
+    n_rows, n_cols = X32.shape
+    density = X_csr.nnz / float(n_rows * n_cols) if n_rows else 0.0
+    print(f"\n--- Feature Matrix Memory ({n_rows} rows x {n_cols} features, density {density:.2%}) ---")
+    baseline = layouts[0][1]
+    for name, nbytes in layouts:
+        ratio = baseline / nbytes if nbytes else 0.0
+        print(f"{name:<38} {nbytes / 1e6:>9.2f} MB  ({ratio:.1f}x smaller)")
+
+    return dict(layouts)
+
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the draft recommendation model.")
+    parser.add_argument('--sparse', action='store_true', help="Train on a CSR feature matrix")
+    parser.add_argument('--memory-report', action='store_true', help="Only compare feature matrix layouts")
+    parser.add_argument('--no-cache', action='store_true', help="Always recompute the feature matrix")
+    parser.add_argument('--clear-cache', action='store_true', help="Delete cached feature matrices first")
+    parser.add_argument('--incremental', action='store_true', help="Grow trees on new matches instead of a full refit")
+    parser.add_argument('--since-match', type=int, default=None, help="Use matches with a higher Match_ID (default: last trained)")
+    parser.add_argument('--new-trees', type=int, default=20, help="Trees to add in incremental mode")
+    parser.add_argument('--max-trees', type=int, default=None, help="Retire oldest trees above this ensemble size")
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        feature_cache.clear()
+
+    if args.memory_report:
+        memory_report()
+    elif args.incremental:
+        update_from_new_matches(args.since_match, n_new_trees=args.new_trees, max_trees=args.max_trees)
+    else:
+        train_model(sparse=args.sparse, use_cache=not args.no_cache)
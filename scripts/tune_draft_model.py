@@ -0,0 +1,236 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.metrics import accuracy_score
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.train_draft_model import DATA_DIR, load_data, featurize
+
+# Paths
+RESULTS_PATH = os.path.join(DATA_DIR, 'hyperparameter_search.json')
+REPORT_PATH = 'hyperparameter_search_report.md'
+
+# Search Space
+PARAM_GRID = {
+    'max_depth': [6, 10, 15, 20, None],
+    'n_estimators': [10, 25, 50, 100, 200],
+    'max_features': ['sqrt', 'log2', 0.3],
+    'min_samples_leaf': [1, 2, 5, 10]
+}
+
+# One draft scores every hero at once (131 candidates)
+LATENCY_BATCH = 131
+LATENCY_REPEATS = 30
+
+def sample_candidates(n_candidates, seed=42):
+    """Draws distinct random configurations from PARAM_GRID."""
+    rng = np.random.default_rng(seed)
+    grid_size = int(np.prod([len(v) for v in PARAM_GRID.values()]))
+    n_candidates = min(n_candidates, grid_size)
+
+    configs, seen = [], set()
+    while len(configs) < n_candidates:
+        config = {k: v[rng.integers(len(v))] for k, v in PARAM_GRID.items()}
+        key = json.dumps(config, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+def make_model(config):
+    return RandomForestClassifier(class_weight='balanced', random_state=42, n_jobs=1, **config)
+
+def measure_latency(clf, X_batch, repeats=LATENCY_REPEATS):
+    """Per-draft scoring latency in ms: (p50, p99) of predict_proba on one candidate batch."""
+    clf.predict_proba(X_batch) # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        clf.predict_proba(X_batch)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 99))
+
+def evaluate_fold(config, X, y, w, train_idx, test_idx, X_batch):
+    """Fits one candidate on one fold. X/y/w are memory-mapped and shared between workers."""
+    clf = make_model(config)
+    start = time.perf_counter()
+    clf.fit(X[train_idx], y[train_idx], sample_weight=w[train_idx])
+    fit_s = time.perf_counter() - start
+
+    acc = accuracy_score(y[test_idx], clf.predict(X[test_idx]))
+    p50, _ = measure_latency(clf, X_batch, repeats=5)
+    return acc, p50, fit_s
+
+def objective(accuracy, latency_ms, latency_weight):
+    """Combined score: accuracy minus a penalty per millisecond of per-draft latency."""
+    return accuracy - latency_weight * latency_ms
+
+def pareto_front(results):
+    """Results not dominated on (higher accuracy, lower p50 latency)."""
+    front = []
+    for r in results:
+        dominated = any(
+            o['accuracy'] >= r['accuracy'] and o['latency_p50_ms'] <= r['latency_p50_ms'] and
+            (o['accuracy'] > r['accuracy'] or o['latency_p50_ms'] < r['latency_p50_ms'])
+            for o in results
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r['latency_p50_ms'])
+
+def successive_halving(X, y, w, configs, eta=3, min_fraction=0.1, keep_final=6, n_folds=3,
+                       latency_weight=0.01, n_jobs=-1):
+    """
+    Evaluates all configs on a small row budget, keeps the best 1/eta by the combined objective
+    and multiplies the budget by eta, until keep_final survivors remain. Each rung runs every
+    (config, fold) pair in parallel worker processes.
+    """
+    rng = np.random.default_rng(42)
+    order = rng.permutation(len(y))
+    X_batch = np.asarray(X[order[:LATENCY_BATCH]])
+
+    survivors = list(range(len(configs)))
+    fraction = min_fraction
+    rung = 0
+    history = []
+
+    while True:
+        n_rows = max(n_folds * 50, int(len(y) * min(fraction, 1.0)))
+        rows = np.sort(order[:n_rows])
+        folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42).split(rows, y[rows]))
+
+        print(f"Rung {rung}: {len(survivors)} candidates x {n_folds} folds on {n_rows} rows...")
+        jobs = [(c, rows[tr], rows[te]) for c in survivors for tr, te in folds]
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(evaluate_fold)(configs[c], X, y, w, tr, te, X_batch) for c, tr, te in jobs
+        )
+
+        rung_results = {}
+        for (c, _, _), (acc, p50, fit_s) in zip(jobs, scores):
+            rung_results.setdefault(c, []).append((acc, p50, fit_s))
+
+        ranked = []
+        for c, vals in rung_results.items():
+            acc, p50, fit_s = np.mean(vals, axis=0)
+            score = objective(acc, p50, latency_weight)
+            history.append({'rung': rung, 'rows': n_rows, 'config': configs[c],
+                            'cv_accuracy': float(acc), 'latency_p50_ms': float(p50), 'fit_s': float(fit_s)})
+            ranked.append((score, c))
+        ranked.sort(reverse=True)
+
+        if len(survivors) <= keep_final or fraction >= 1.0:
+            return survivors, history
+
+        n_keep = max(keep_final, len(survivors) // eta)
+        survivors = [c for _, c in ranked[:n_keep]]
+        fraction *= eta
+        rung += 1
+
+def fit_final(config, X_train, y_train, w_train, X_test, y_test):
+    clf = make_model(config)
+    start = time.perf_counter()
+    clf.fit(X_train, y_train, sample_weight=w_train)
+    fit_s = time.perf_counter() - start
+    return clf, accuracy_score(y_test, clf.predict(X_test)), fit_s
+
+def run_search(n_candidates=30, eta=3, keep_final=6, latency_weight=0.01, budget_ms=None, n_jobs=-1):
+    df_train, df_stats = load_data()
+    # Memory-mapped from data/cache/features: workers share the pages
+    X, y, w, _ = featurize(df_train, df_stats)
+
+    configs = sample_candidates(n_candidates)
+    survivors, history = successive_halving(X, y, w, configs, eta=eta, keep_final=keep_final,
+                                            latency_weight=latency_weight, n_jobs=n_jobs)
+
+    # Final rung: full data, same split as train_model, latency measured serially (no worker contention)
+    print(f"Final rung: refitting {len(survivors)} candidates on the full split...")
+    idx_train, idx_test = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    X_train, y_train, w_train = X[np.sort(idx_train)], y[np.sort(idx_train)], w[np.sort(idx_train)]
+    X_test, y_test = X[np.sort(idx_test)], y[np.sort(idx_test)]
+
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(fit_final)(configs[c], X_train, y_train, w_train, X_test, y_test) for c in survivors
+    )
+
+    X_batch = np.asarray(X_test[:LATENCY_BATCH])
+    results = []
+    for c, (clf, acc, fit_s) in zip(survivors, fitted):
+        p50, p99 = measure_latency(clf, X_batch)
+        n_nodes = sum(est.tree_.node_count for est in clf.estimators_)
+        results.append({
+            'config': configs[c],
+            'accuracy': float(acc),
+            'latency_p50_ms': p50,
+            'latency_p99_ms': p99,
+            'fit_s': float(fit_s),
+            'n_nodes': int(n_nodes),
+            'objective': objective(acc, p50, latency_weight)
+        })
+
+    front = pareto_front(results)
+    write_report(results, front, history, latency_weight, budget_ms)
+    return results, front
+
+def format_config(config):
+    return ", ".join(f"{k}={v}" for k, v in config.items())
+
+def write_report(results, front, history, latency_weight, budget_ms):
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump({'results': results, 'pareto_front': front, 'history': history}, f, indent=2, default=str)
+
+    df_front = pd.DataFrame([{
+        'Config': format_config(r['config']),
+        'Accuracy': r['accuracy'],
+        'p50 (ms)': r['latency_p50_ms'],
+        'p99 (ms)': r['latency_p99_ms'],
+        'Tree Nodes': r['n_nodes'],
+        'Fit (s)': r['fit_s']
+    } for r in front])
+
+    with open(REPORT_PATH, 'w') as f:
+        f.write("# Hyperparameter Search Report\n")
+        f.write(f"Successive halving over {len(PARAM_GRID)} forest parameters. ")
+        f.write(f"Objective = accuracy - {latency_weight} x per-draft p50 latency (ms), ")
+        f.write(f"latency measured on one {LATENCY_BATCH}-candidate draft.\n\n")
+
+        f.write("## Pareto Front (Accuracy vs Latency)\n")
+        f.write(df_front.to_markdown(index=False, floatfmt=".4f"))
+        f.write("\n\n")
+
+        best = max(results, key=lambda r: r['objective'])
+        f.write("## Best Combined Objective\n")
+        f.write(f"- `{format_config(best['config'])}`: accuracy {best['accuracy']:.4f}, p50 {best['latency_p50_ms']:.2f} ms\n")
+
+        if budget_ms is not None:
+            in_budget = [r for r in front if r['latency_p99_ms'] <= budget_ms]
+            f.write(f"\n## Within {budget_ms} ms (p99) Budget\n")
+            if in_budget:
+                pick = max(in_budget, key=lambda r: r['accuracy'])
+                f.write(f"- `{format_config(pick['config'])}`: accuracy {pick['accuracy']:.4f}, p99 {pick['latency_p99_ms']:.2f} ms\n")
+            else:
+                f.write("- No candidate fits the budget.\n")
+
+    print(f"Report saved to {REPORT_PATH} (raw results: {RESULTS_PATH})")
+    print(df_front.to_string(index=False))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Budgeted hyperparameter search for the draft forest.")
+    parser.add_argument('--n-candidates', type=int, default=30)
+    parser.add_argument('--eta', type=int, default=3, help="Halving rate: keep 1/eta per rung")
+    parser.add_argument('--keep-final', type=int, default=6, help="Candidates refit on the full data")
+    parser.add_argument('--latency-weight', type=float, default=0.01, help="Accuracy points traded per ms")
+    parser.add_argument('--budget-ms', type=float, default=None, help="Real-time budget (p99 ms) to pick for")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    run_search(args.n_candidates, eta=args.eta, keep_final=args.keep_final,
+               latency_weight=args.latency_weight, budget_ms=args.budget_ms, n_jobs=args.n_jobs)
@@ -1,13 +1,22 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # Paths
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
 OUTPUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../analysis_plots'))
 BASE_STATS_PATH = os.path.join(DATA_DIR, 'hero_base_stats.csv')
 META_STATS_PATH = os.path.join(DATA_DIR, 'hero_meta_performance.csv')
+CACHE_PATH = os.path.join(OUTPUT_DIR, '.plot_cache.json')
+
+# Bump when the plotting code changes, so every PNG is re-rendered once
+PLOT_VERSION = 1
+
+LANE_MAP = {1: 'Exp Lane', 2: 'Mid Lane', 3: 'Roamer', 4: 'Jungler', 5: 'Gold Lane'}
 
 def load_and_merge_data():
     if not os.path.exists(BASE_STATS_PATH) or not os.path.exists(META_STATS_PATH):
@@ -19,45 +28,57 @@ def load_and_merge_data():
 
     # Merge
     df = pd.merge(df_base, df_meta, on='Hero_ID')
-    
+
     # Map Lane ID to Name
-    lane_map = {1: 'Exp Lane', 2: 'Mid Lane', 3: 'Roamer', 4: 'Jungler', 5: 'Gold Lane'}
-    df['Lane_Name'] = df['Primary_Lane'].map(lane_map)
-    
+    df['Lane_Name'] = df['Primary_Lane'].map(LANE_MAP)
+
     return df
 
-def plot_meta_matrix(df):
+def _pyplot():
+    """matplotlib/seaborn are only imported once something is actually rendered."""
+    import matplotlib
+    if 'matplotlib.pyplot' not in sys.modules and 'ipykernel' not in sys.modules:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+def _save(plt, output_path, dpi=None):
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi)
+    print(f"Saved {output_path}")
+    plt.close()
+
+def plot_meta_matrix(df, output_path, figsize=(12, 8), label_pick_rate=0.4, label_win_rate=(0.44, 0.54)):
     """Scatter Plot: Pick Rate vs Win Rate"""
-    plt.figure(figsize=(12, 8))
-    sns.set_style("whitegrid")
-    
+    plt, sns = _pyplot()
+    plt.figure(figsize=figsize)
+
     # Scatter
-    scatter = sns.scatterplot(
-        data=df, 
-        x='Pick_Rate', 
-        y='Base_Win_Rate', 
-        hue='Lane_Name', 
-        style='Lane_Name', 
-        s=100, 
+    sns.scatterplot(
+        data=df,
+        x='Pick_Rate',
+        y='Base_Win_Rate',
+        hue='Lane_Name',
+        style='Lane_Name',
+        s=100,
         alpha=0.8
     )
-    
+
     # Add Threshold Lines
     plt.axhline(0.50, color='gray', linestyle='--', alpha=0.5, label='50% Win Rate')
     plt.axvline(df['Pick_Rate'].mean(), color='gray', linestyle=':', alpha=0.5, label='Avg Pick Rate')
 
-    # Annotate Top/Unique Heroes
-    # Annotate extreme outliers
-    for line in range(0, df.shape[0]):
-        row = df.iloc[line]
-        # Label if high pick rate OR high win rate
-        if row['Pick_Rate'] > 0.4 or row['Base_Win_Rate'] > 0.54 or row['Base_Win_Rate'] < 0.44:
+    # Annotate extreme outliers: high pick rate OR unusually high/low win rate
+    low_wr, high_wr = label_win_rate
+    for _, row in df.iterrows():
+        if row['Pick_Rate'] > label_pick_rate or row['Base_Win_Rate'] > high_wr or row['Base_Win_Rate'] < low_wr:
             plt.text(
-                row['Pick_Rate']+0.005, 
-                row['Base_Win_Rate'], 
-                row['Hero_Name'], 
-                horizontalalignment='left', 
-                size='small', 
+                row['Pick_Rate']+0.005,
+                row['Base_Win_Rate'],
+                row['Hero_Name'],
+                horizontalalignment='left',
+                size='small',
                 color='black'
             )
 
@@ -65,79 +86,235 @@ def plot_meta_matrix(df):
     plt.xlabel('Pick Rate (Popularity)', fontsize=12)
     plt.ylabel('Win Rate (Efficiency)', fontsize=12)
     plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    
-    output_path = os.path.join(OUTPUT_DIR, '1_meta_matrix.png')
-    plt.tight_layout()
-    plt.savefig(output_path)
-    print(f"Saved {output_path}")
-    plt.close()
+    _save(plt, output_path)
 
-def plot_power_curve_by_role(df):
+def plot_power_curve_by_role(df, output_path, figsize=(12, 6), ylim=(0.3, 0.8)):
     """Grouped Bar Chart: Power Spikes by Role"""
+    plt, sns = _pyplot()
     # Melt data for sns
     power_cols = ['Early_Power', 'Mid_Power', 'Late_Power']
     df_melt = df.melt(id_vars=['Lane_Name'], value_vars=power_cols, var_name='Game_Phase', value_name='Power_Score')
-    
-    plt.figure(figsize=(12, 6))
-    
+
+    plt.figure(figsize=figsize)
+
     sns.barplot(
         data=df_melt,
         x='Lane_Name',
         y='Power_Score',
         hue='Game_Phase',
         palette='viridis',
-        ci=None  # Remove error bars for cleaner look
+        errorbar=None  # Remove error bars for cleaner look
     )
-    
+
     plt.title('Avg Hero Power Spikes by Role', fontsize=16)
     plt.ylabel('Power Score (0-1)', fontsize=12)
     plt.xlabel('Role', fontsize=12)
-    plt.ylim(0.3, 0.8) # Zoom in on the relevant range
+    plt.ylim(*ylim) # Zoom in on the relevant range
     plt.legend(title='Phase')
-    
-    output_path = os.path.join(OUTPUT_DIR, '2_power_curve.png')
-    plt.tight_layout()
-    plt.savefig(output_path)
-    print(f"Saved {output_path}")
-    plt.close()
+    _save(plt, output_path)
 
-def plot_difficulty_impact(df):
+def plot_difficulty_impact(df, output_path, figsize=(10, 6), seed=0):
     """Reg Plot: Difficulty vs Win Rate"""
-    plt.figure(figsize=(10, 6))
-    
+    plt, sns = _pyplot()
+    plt.figure(figsize=figsize)
+
     sns.regplot(
         data=df,
         x='Difficulty',
         y='Base_Win_Rate',
         scatter_kws={'alpha':0.5},
-        line_kws={'color':'red'}
+        line_kws={'color':'red'},
+        seed=seed # fixed bootstrap for the CI band, so the same data gives the same PNG
     )
-    
+
     plt.title('Does Difficulty Correlate to Wins?', fontsize=16)
     plt.xlabel('Difficulty (0-100)', fontsize=12)
     plt.ylabel('Win Rate', fontsize=12)
-    
+
     # Correlation
     corr = df[['Difficulty', 'Base_Win_Rate']].corr().iloc[0,1]
     plt.text(10, 0.55, f'Correlation: {corr:.2f}', fontsize=12, color='red', bbox=dict(facecolor='white', alpha=0.8))
-    
-    output_path = os.path.join(OUTPUT_DIR, '3_difficulty_analysis.png')
+    _save(plt, output_path)
+
+def plot_official_meta_matrix(df, output_path=None, figsize=(14, 10), dpi=300, show=False):
+    """Presentation version of the meta matrix (quadrant labels, role colors), used by the notebook."""
+    plt, sns = _pyplot()
+    plt.figure(figsize=figsize, facecolor='white')
+
+    # Metrics
+    mean_pr = df['Pick_Rate'].mean()
+    mean_wr = 0.50 # Baseline 50%
+
+    # Custom Role Colors - Esports Style
+    role_colors = {
+        'Exp Lane': '#e74c3c',   # Red (Fighter)
+        'Mid Lane': '#9b59b6',   # Purple (Mage)
+        'Roamer':   '#f1c40f',   # Yellow (Support/Tank)
+        'Jungler':  '#2ecc71',   # Green (Assassin)
+        'Gold Lane':'#3498db'    # Blue (Marksman)
+    }
+
+    # Scatter Plot
+    sns.scatterplot(
+        data=df,
+        x='Pick_Rate',
+        y='Base_Win_Rate',
+        hue='Lane_Name',
+        style='Lane_Name',
+        palette=role_colors,
+        s=150,
+        alpha=0.9,
+        edgecolor='black',
+        linewidth=1
+    )
+
+    # --- Quadrants ---
+    plt.axhline(mean_wr, color='black', linestyle='--', alpha=0.3)
+    plt.axvline(mean_pr, color='black', linestyle='--', alpha=0.3)
+
+    # Quadrant Labels
+    # Top Right: High Win, High Pick
+    plt.text(df['Pick_Rate'].max()*0.9, 0.58, "S-TIER\n(Meta / OP)",
+             fontsize=14, color='green', fontweight='bold', ha='right')
+
+    # Top Left: High Win, Low Pick
+    plt.text(0, 0.58, "A-TIER\n(Hidden Gems)",
+             fontsize=14, color='orange', fontweight='bold', ha='left')
+
+    # Bottom Right: Low Win, High Pick
+    plt.text(df['Pick_Rate'].max()*0.9, 0.42, "POPULAR BUT RISK\n(Comfort Picks)",
+             fontsize=12, color='gray', ha='right')
+
+    # Bottom Left: Low Win, Low Pick
+    plt.text(0, 0.42, "OFF-META\n(Underpowered)",
+             fontsize=12, color='red', ha='left')
+
+    # --- Smart Annotations ---
+    # Label only significant heroes to keep it clean: Top 10% Pick Rate OR >55% WR OR <45% WR
+    top_pr = df['Pick_Rate'].quantile(0.90)
+    for _, row in df.iterrows():
+        if row['Pick_Rate'] > top_pr or row['Base_Win_Rate'] > 0.55 or row['Base_Win_Rate'] < 0.45:
+            plt.text(
+                row['Pick_Rate']+0.002,
+                row['Base_Win_Rate']+0.002,
+                row['Hero_Name'],
+                horizontalalignment='left',
+                size='medium',
+                color='#333333',
+                weight='semibold'
+            )
+
+    plt.title('Official Meta Matrix: Hero Performance Analysis', fontsize=20, pad=20, weight='bold')
+    plt.xlabel('Popularity (Pick Rate)', fontsize=14, labelpad=10)
+    plt.ylabel('Efficiency (Win Rate)', fontsize=14, labelpad=10)
+    plt.legend(bbox_to_anchor=(1.02, 1), loc='upper left', title='Role / Lane', frameon=False)
+
+    sns.despine()
     plt.tight_layout()
-    plt.savefig(output_path)
-    print(f"Saved {output_path}")
-    plt.close()
+    if output_path:
+        plt.savefig(output_path, dpi=dpi) # High Res Save
+    if show:
+        plt.show()
+    else:
+        plt.close()
+
+# Nightly plots: output file -> function, the columns it reads and its parameters.
+# A PNG is re-rendered only when the hash of exactly these inputs changes.
+PLOTS = {
+    '1_meta_matrix.png': {
+        'func': plot_meta_matrix,
+        'columns': ['Hero_Name', 'Pick_Rate', 'Base_Win_Rate', 'Lane_Name'],
+        'params': {'figsize': (12, 8), 'label_pick_rate': 0.4, 'label_win_rate': (0.44, 0.54)}
+    },
+    '2_power_curve.png': {
+        'func': plot_power_curve_by_role,
+        'columns': ['Lane_Name', 'Early_Power', 'Mid_Power', 'Late_Power'],
+        'params': {'figsize': (12, 6), 'ylim': (0.3, 0.8)}
+    },
+    '3_difficulty_analysis.png': {
+        'func': plot_difficulty_impact,
+        'columns': ['Difficulty', 'Base_Win_Rate'],
+        'params': {'figsize': (10, 6), 'seed': 0}
+    }
+}
+
+def plot_key(df, name):
+    """Hash of a plot's input columns (values and order) and its parameters."""
+    spec = PLOTS[name]
+    h = hashlib.sha256(json.dumps([PLOT_VERSION, name, spec['func'].__name__, spec['params']], default=list).encode())
+    h.update(pd.util.hash_pandas_object(df[spec['columns']], index=False).to_numpy().tobytes())
+    h.update(json.dumps(spec['columns']).encode())
+    return h.hexdigest()
+
+def _read_cache(path=CACHE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache(cache, path=CACHE_PATH):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def stale_plots(df, names=None, output_dir=OUTPUT_DIR, cache_path=CACHE_PATH):
+    """(name, key) of every plot whose PNG is missing or was rendered from different inputs."""
+    cache = _read_cache(cache_path)
+    stale = []
+    for name in names or PLOTS:
+        key = plot_key(df, name)
+        if cache.get(name) != key or not os.path.exists(os.path.join(output_dir, name)):
+            stale.append((name, key))
+    return stale
+
+def _render(name, df_inputs, output_dir):
+    spec = PLOTS[name]
+    # Every nightly plot gets the same style, whichever process renders it
+    _pyplot()[1].set_style("whitegrid")
+    spec['func'](df_inputs, os.path.join(output_dir, name), **spec['params'])
+    return name
+
+def render_plots(df, names=None, force=False, jobs=None, output_dir=OUTPUT_DIR, cache_path=CACHE_PATH):
+    """
+    Renders the stale plots (all of them with force=True), in worker processes when more than one
+    needs work. Each worker gets only the columns its plot reads. Returns the names rendered.
+    """
+    names = list(names or PLOTS)
+    todo = [(name, plot_key(df, name)) for name in names] if force else stale_plots(df, names, output_dir, cache_path)
+    for name in names:
+        if name not in dict(todo):
+            print(f"Up to date: {os.path.join(output_dir, name)}")
+    if not todo:
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    inputs = [df[PLOTS[name]['columns']].copy() for name, _ in todo]
+    workers = min(len(todo), jobs or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render, [n for n, _ in todo], inputs, [output_dir] * len(todo)))
+    else:
+        for (name, _), df_inputs in zip(todo, inputs):
+            _render(name, df_inputs, output_dir)
+
+    # Only record keys once every PNG is on disk, so a failed run is retried next time
+    cache = _read_cache(cache_path)
+    cache.update(dict(todo))
+    _write_cache(cache, cache_path)
+    return [name for name, _ in todo]
 
-def main():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        
+def main(force=False, jobs=None):
     df = load_and_merge_data()
     if df is not None:
         print(f"Loaded {len(df)} heroes.")
-        plot_meta_matrix(df)
-        plot_power_curve_by_role(df)
-        plot_difficulty_impact(df)
-        print("All plots generated successfully.")
+        rendered = render_plots(df, force=force, jobs=jobs)
+        print(f"All plots generated successfully ({len(rendered)} rendered, {len(PLOTS) - len(rendered)} up to date).")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Render the hero analytics plots into analysis_plots/ (only the ones whose inputs changed).")
+    parser.add_argument('--force', action='store_true', help="Re-render every plot")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes for stale plots (default: one per plot, up to the core count)")
+    args = parser.parse_args()
+    main(args.force, args.jobs)
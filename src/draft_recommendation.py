@@ -1,9 +1,12 @@
 import pandas as pd
-import numpy as np
 import os
-import joblib
 import sys
-import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.feature_encoder import STAT_COLS, build_encoder, score_candidates
+from scripts.model_registry import has_default_model, load_model, load_registry
 
 # Paths
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
@@ -12,18 +15,21 @@ META_STATS_PATH = os.path.join(DATA_DIR, 'hero_meta_performance.csv')
 MODEL_PATH = os.path.join(DATA_DIR, 'draft_model_rf.pkl')
 REAL_LOGS_PATH = os.path.join(DATA_DIR, 'match_logs_real.csv')
 
-def load_resources():
-    if not os.path.exists(BASE_STATS_PATH) or not os.path.exists(MODEL_PATH) or not os.path.exists(META_STATS_PATH):
+def load_resources(budget=None):
+    has_model = has_default_model() or (budget is not None and load_registry())
+    if not os.path.exists(BASE_STATS_PATH) or not has_model or not os.path.exists(META_STATS_PATH):
         print("Error: Missing data or model file.")
         sys.exit(1)
 
     df_base = pd.read_csv(BASE_STATS_PATH)
     df_meta = pd.read_csv(META_STATS_PATH)
-    clf = joblib.load(MODEL_PATH)
 
     # Merge Base + Meta
     df_stats = pd.merge(df_base, df_meta[['Hero_ID', 'Early_Power', 'Mid_Power', 'Late_Power']], on='Hero_ID', how='left')
 
+    # Default model (bundle, schema-checked against df_stats), or the most accurate registered model within the latency budget
+    clf = load_model(budget, df_stats=df_stats)
+
     return df_stats, clf
 
 def get_real_match_heroes(name_to_id):
@@ -63,8 +69,8 @@ def get_hero_id(name, name_to_id):
     name_clean = name.strip().lower()
     return name_to_id.get(name_clean)
 
-def recommend(allies, enemies, top_k=5, restrict=True):
-    df_stats, clf = load_resources()
+def recommend(allies, enemies, top_k=5, restrict=True, budget=None):
+    df_stats, clf = load_resources(budget)
 
     # Mappings
     name_to_id = {name.lower(): pid for name, pid in zip(df_stats['Hero_Name'], df_stats['Hero_ID'])}
@@ -127,14 +133,11 @@ def recommend(allies, enemies, top_k=5, restrict=True):
     ally_ids, ally_roles = parse_team_input(allies, "Ally")
     enemy_ids, enemy_roles = parse_team_input(enemies, "Enemy")
 
-    # Feature Engineering Prep (Must match train_model.py)
-    hero_ids = sorted(df_stats['Hero_ID'].unique())
-    id_to_idx = {hid: i for i, hid in enumerate(hero_ids)}
-    n_heroes = len(hero_ids)
+    # Feature Engineering Prep (shared with train_draft_model.py)
+    encoder = build_encoder(df_stats)
+    hero_ids = encoder['hero_ids']
 
-    stat_cols = ['Primary_Lane', 'Damage_Type', 'Hard_CC_Count', 'Flex_Pick_Score', 'Escape_Reliability',
-                 'Difficulty', 'Economy_Dependency', 'Early_Power', 'Mid_Power', 'Late_Power']
-    stats_map = df_stats.set_index('Hero_ID')[stat_cols].to_dict('index')
+    stats_map = df_stats.set_index('Hero_ID')[STAT_COLS].to_dict('index')
 
     # Filter taken heroes
     taken_ids = set(ally_ids + enemy_ids)
@@ -150,60 +153,27 @@ def recommend(allies, enemies, top_k=5, restrict=True):
 
     print(f"\nAnalyzing {len(candidates)} candidates for Allied Team: {allies} vs Enemy Team: {enemies}...")
 
-    predictions = []
-
-    # Base Vectors (Context)
-    ally_vec = np.zeros(n_heroes)
-    enemy_vec = np.zeros(n_heroes)
-
     # Precompute Role Map
     lane_map = df_stats.set_index('Hero_ID')['Primary_Lane'].to_dict()
     roles_vec = [0.0] * 5
 
     for h in ally_ids:
-        if h in id_to_idx: ally_vec[id_to_idx[h]] = 1
-        
         # Check for override, else allow default
         lane = ally_roles.get(h, lane_map.get(h, 0))
         
         if 1 <= lane <= 5:
                 roles_vec[lane-1] += 1.0
 
-    for h in enemy_ids:
-        if h in id_to_idx: enemy_vec[id_to_idx[h]] = 1
-
     # Evaluate Candidates
-    X_pred = []
-    valid_candidates = []
-
-    for cand_id in candidates:
-        c_stats = stats_map.get(cand_id)
-        if not c_stats: continue
-
-        cand_vec = [
-            c_stats['Primary_Lane'],
-            c_stats['Damage_Type'],
-            c_stats['Hard_CC_Count'],
-            c_stats['Flex_Pick_Score'],
-            c_stats['Escape_Reliability'],
-            c_stats['Difficulty'],
-            c_stats['Economy_Dependency'],
-            c_stats['Early_Power'],
-            c_stats['Mid_Power'],
-            c_stats['Late_Power']
-        ]
-
-        full_vec = np.concatenate([ally_vec, enemy_vec, roles_vec, cand_vec])
-        X_pred.append(full_vec)
-        valid_candidates.append(cand_id)
-
-    if not X_pred:
+    valid_candidates = [cand_id for cand_id in candidates if cand_id in stats_map]
+
+    if not valid_candidates:
         print("No valid candidates found.")
         return
 
     # Batch Predict Probabilities
     # We want Probability of Class 1 (Good Pick)
-    probs = clf.predict_proba(X_pred)[:, 1]
+    probs = score_candidates(clf, encoder, ally_ids, enemy_ids, valid_candidates, role_counts=roles_vec)
 
     # Rank
     results = []